@@ -1,15 +1,22 @@
-from concrete.entity.predictor import ConcretePredictor, ConcreteData
-from concrete.constant import CONFIG_DIR, get_current_time_stamp
+from concrete.entity.predictor import ConcretePredictor, ConcreteData, ConcreteBatchData
+from concrete.constant import CONFIG_DIR, SCHEMA_FILE_PATH, EXPERIMENT_STATUSES, EXPERIMENT_DIR_NAME, \
+    EXPERIMENT_DB_FILE_NAME, get_current_time_stamp
+from concrete.entity.serving_metrics import track_request, get_metrics, ExperimentCollector, PHASE_PARSE, \
+    PHASE_VALIDATION, PHASE_MODEL_RESOLVE, PHASE_PREDICT, METRICS_CONTENT_TYPE
 from concrete.util.util import read_yaml_file, write_yaml_file
 from concrete.config.configuration import Configuration
-from flask import send_file, abort, render_template
-from concrete.pipline.pipline import Pipeline
-from concrete.logger import get_log_dataframe
-from concrete.logger import logging
-from flask import Flask, request
+from flask import send_file, abort, render_template, stream_template
+from concrete.pipline.training_queue import TrainingJobQueue
+from concrete.logger.log_reader import LogIndex, LOG_LEVEL_NUMBERS
+from concrete.logger import get_logger, configure_logging
+from concrete.exception import ConcreteException
+from flask import Flask, request, jsonify, Response
 import os
+import io
 import json
+import time
 
+logger = get_logger(__name__)
 
 ROOT_DIR = os.getcwd()
 LOG_FOLDER_NAME = "logs"
@@ -22,18 +29,41 @@ MODEL_DIR = os.path.join(ROOT_DIR, SAVED_MODELS_DIR_NAME)
 
 CONCRETE_DATA_KEY = "concrete_data"
 CONCRETE_STRENGTH_VALUE_KEY = "concrete_strength_value"
+EXPERIMENT_PAGE_SIZE = 20
+MAX_EXPERIMENT_PAGE_SIZE = 100
+LOG_PAGE_SIZE = 200
+MAX_LOG_PAGE_SIZE = 1000
 
 app = Flask(__name__)
 
+concrete_batch_data = ConcreteBatchData(schema_file_path=SCHEMA_FILE_PATH)
+config = Configuration()
+serving_config = config.get_serving_config()
+experiment_collector = ExperimentCollector(experiment_db_file_path=os.path.join(
+    config.training_pipeline_config.artifact_dir, EXPERIMENT_DIR_NAME, EXPERIMENT_DB_FILE_NAME))
+
+
+def preload_model():
+    # with gunicorn --preload workers are forked with the model loaded, compiled model arrays are memory mapped
+    # so every worker shares them through the page cache
+    if not os.path.isdir(MODEL_DIR):
+        return
+    try:
+        ConcretePredictor(model_dir=MODEL_DIR, serving_config=serving_config).get_model()
+    except Exception as e:
+        logger.info(f"Model is not preloaded: {e}")
+
+
+preload_model()
+
 
 @app.route('/artifact', defaults={'req_path': 'concrete'})
 @app.route('/artifact/<path:req_path>')
 def render_artifact_dir(req_path):
     os.makedirs("concrete", exist_ok=True)
     # Joining the base and the requested path
-    print(f"req_path: {req_path}")
+    logger.debug("req_path: %s", req_path)
     abs_path = os.path.join(req_path)
-    print(abs_path)
     # Return 404 if path doesn't exist
     if not os.path.exists(abs_path):
         return abort(404)
@@ -70,21 +100,61 @@ def index():
 
 @app.route('/view_experiment_hist', methods=['GET', 'POST'])
 def view_experiment_history():
-    experiment_df = Pipeline.get_experiments_status()
+    # one page of history is read from the experiment store, ?page=2&per_page=20&status=failed
+    # with the step breakdown of ?experiment_id=..., the newest experiment of the page by default
+    from concrete.pipline.pipline import Pipeline
+    Pipeline(config=Configuration())
+    page = max(request.args.get("page", default=1, type=int), 1)
+    per_page = min(max(request.args.get("per_page", default=EXPERIMENT_PAGE_SIZE, type=int), 1),
+                   MAX_EXPERIMENT_PAGE_SIZE)
+    status = request.args.get("status") if request.args.get("status") in EXPERIMENT_STATUSES else None
+    is_model_accepted = {"true": True, "false": False}.get(request.args.get("is_model_accepted", "").lower())
+
+    experiment_df = Pipeline.get_experiments_status(limit=per_page, offset=(page - 1) * per_page, status=status,
+                                                    is_model_accepted=is_model_accepted)
+    experiment_count = Pipeline.get_experiment_count(status=status, is_model_accepted=is_model_accepted)
+    experiment_ids = experiment_df["experiment_id"].tolist() if "experiment_id" in experiment_df else []
+    experiment_id = request.args.get("experiment_id") or (experiment_ids[0] if experiment_ids else None)
     context = {
-        "experiment": experiment_df.to_html(classes='table table-striped col-12')
+        "experiment": experiment_df.to_html(classes='table table-striped col-12', index=False),
+        "page": page,
+        "per_page": per_page,
+        "page_count": max((experiment_count + per_page - 1) // per_page, 1),
+        "experiment_count": experiment_count,
+        "status": status,
+        "statuses": EXPERIMENT_STATUSES,
+        "experiment_ids": experiment_ids,
+        "experiment_id": experiment_id,
+        "profile": Pipeline.get_experiment_profile(experiment_id)
     }
     return render_template('experiment_history.html', context=context)
 
 
+def get_training_job_queue(config: Configuration) -> TrainingJobQueue:
+    training_pipeline_config = config.training_pipeline_config
+    return TrainingJobQueue(queue_dir=training_pipeline_config.training_queue_dir,
+                            stale_timeout=training_pipeline_config.job_stale_timeout)
+
+
 @app.route('/train', methods=['GET', 'POST'])
 def train():
+    # training runs in a separate worker process, the web process only queues the job and reads its records
+    # the job queue is shared by all web processes, a request made while a job is pending or running gets
+    # that job back instead of starting a second training
+    # the training pipeline is imported by the training routes only, so that a serving process starts without
+    # importing kaggle, evidently and the training components
+    from concrete.pipline.pipline import Pipeline
+    from concrete.pipline.training_worker import record_stale_jobs, start_training_worker
     pipeline = Pipeline(config=Configuration(current_time_stamp=get_current_time_stamp()))
-    if not Pipeline.experiment.running_status:
+    training_job_queue = get_training_job_queue(pipeline.config)
+    record_stale_jobs(training_job_queue)
+    training_job, is_enqueued = training_job_queue.enqueue()
+    if is_enqueued:
+        pipeline.save_queued_experiment(experiment_id=training_job.experiment_id)
         message = "Training started."
-        pipeline.start()
     else:
         message = "Training is already in progress."
+    start_training_worker(training_job_queue=training_job_queue)
     context = {
         "experiment": pipeline.get_experiments_status().to_html(classes='table table-striped col-12'),
         "message": message
@@ -92,6 +162,36 @@ def train():
     return render_template('train.html', context=context)
 
 
+@app.route('/train_status', methods=['GET'])
+def train_status():
+    # ?experiment_id=<id> for a given experiment, the last queued job otherwise
+    from concrete.pipline.pipline import Pipeline
+    from concrete.pipline.training_worker import record_stale_jobs
+    config = Configuration()
+    Pipeline.init_experiment_store(artifact_dir=config.training_pipeline_config.artifact_dir)
+    training_job_queue = get_training_job_queue(config)
+    record_stale_jobs(training_job_queue)
+    experiment_id = request.args.get("experiment_id")
+    training_job = training_job_queue.get_job(experiment_id) if experiment_id else training_job_queue.get_last_job()
+    if experiment_id and training_job is None and Pipeline.experiment_store.get_experiment(experiment_id) is None:
+        return jsonify({"errors": [f"Unknown experiment: {experiment_id}"]}), 404
+    now = time.time()
+    active_jobs = training_job_queue.get_active_jobs()
+    return jsonify({
+        "is_busy": len(active_jobs) > 0,
+        "active_jobs": [{"experiment_id": active_job.experiment_id,
+                         "status": active_job.status,
+                         "worker_host": active_job.worker_host,
+                         "worker_pid": active_job.worker_pid,
+                         "heartbeat_age": None if active_job.heartbeat_time is None
+                         else round(now - active_job.heartbeat_time, 1)}
+                        for active_job in active_jobs],
+        "job": None if training_job is None else training_job._asdict(),
+        "experiment": None if training_job is None and not experiment_id
+        else Pipeline.experiment_store.get_experiment(experiment_id or training_job.experiment_id)
+    })
+
+
 @app.route('/predict', methods=['GET', 'POST'])
 def predict():
     context = {
@@ -100,43 +200,113 @@ def predict():
     }
 
     if request.method == 'POST':
-        cement = float(request.form['cement'])
-        blast_furnace_slag = float(request.form['blast_furnace_slag'])
-        fly_ash = float(request.form['fly_ash'])
-        water = float(request.form['water'])
-        superplasticizer = float(request.form['superplasticizer'])
-        coarse_aggregate = float(request.form['coarse_aggregate'])
-        fine_aggregate = float(request.form['fine_aggregate'])
-        age = int(request.form['age'])
-
-        concrete_data = ConcreteData(cement=cement,
-                                     blast_furnace_slag=blast_furnace_slag,
-                                     fly_ash=fly_ash,
-                                     water=water,
-                                     superplasticizer=superplasticizer,
-                                     coarse_aggregate=coarse_aggregate,
-                                     fine_aggregate=fine_aggregate,
-                                     age=age
-                                     )
-        concrete_df = concrete_data.get_concrete_input_data_frame()
-        concrete_predictor = ConcretePredictor(model_dir=MODEL_DIR)
-        median_concrete_value = concrete_predictor.predict(X=concrete_df)
-        context = {
-            CONCRETE_DATA_KEY: concrete_data.get_concrete_input_data_frame(),
-            CONCRETE_STRENGTH_VALUE_KEY: median_concrete_value,
-        }
-        return render_template('predict.html', context=context)
+        with track_request("predict") as request_timer:
+            form = request.form
+            request_timer.mark(PHASE_PARSE)
+            concrete_data = ConcreteData.from_dict(form)
+            concrete_input_values = concrete_data.get_concrete_input_values()
+            request_timer.mark(PHASE_VALIDATION)
+            concrete_predictor = ConcretePredictor(model_dir=MODEL_DIR, serving_config=serving_config)
+            cached_model = concrete_predictor.get_cached_model()
+            request_timer.mark(PHASE_MODEL_RESOLVE)
+            # repeated mix designs are answered from the prediction cache without building a dataframe
+            median_concrete_value = concrete_predictor.predict_row(concrete_input_values, cached_model=cached_model)
+            request_timer.mark(PHASE_PREDICT)
+            context = {
+                CONCRETE_DATA_KEY: concrete_data.get_concrete_input_data_frame(),
+                CONCRETE_STRENGTH_VALUE_KEY: median_concrete_value,
+            }
+            return render_template('predict.html', context=context)
     return render_template("predict.html", context=context)
 
 
+@app.route('/predict_batch', methods=['POST'])
+def predict_batch():
+    with track_request("predict_batch") as request_timer:
+        try:
+            if request.is_json:
+                concrete_df = ConcreteBatchData.get_data_frame_from_json(request.get_json())
+            elif 'file' in request.files:
+                concrete_df = ConcreteBatchData.get_data_frame_from_csv(request.files['file'])
+            elif request.mimetype == 'text/csv':
+                concrete_df = ConcreteBatchData.get_data_frame_from_csv(io.BytesIO(request.get_data()))
+            else:
+                request_timer.status = 400
+                return jsonify({"errors": ["Send rows as application/json, text/csv or a csv file upload"]}), 400
+        except Exception as e:
+            logger.exception(e)
+            request_timer.status = 400
+            return jsonify({"errors": [f"Could not parse batch: {e.__cause__ or e}"]}), 400
+        request_timer.mark(PHASE_PARSE)
+
+        concrete_df, errors = concrete_batch_data.validate_input_data_frame(concrete_df)
+        request_timer.mark(PHASE_VALIDATION)
+        if errors:
+            request_timer.status = 400
+            return jsonify({"errors": errors}), 400
+
+        concrete_predictor = ConcretePredictor(model_dir=MODEL_DIR)
+        cached_model = concrete_predictor.get_cached_model()
+        request_timer.mark(PHASE_MODEL_RESOLVE)
+        concrete_strength_values = concrete_predictor.predict(X=concrete_df, cached_model=cached_model)
+        request_timer.mark(PHASE_PREDICT)
+        return jsonify({
+            "count": len(concrete_strength_values),
+            CONCRETE_STRENGTH_VALUE_KEY: concrete_strength_values.tolist()
+        })
+
+
+@app.route('/predict_sweep', methods=['POST'])
+def predict_sweep():
+    # {"base": {mix}, "sweep": {"age": {"start": 1, "stop": 365}, "water_cement_ratio": {"start": 0.3, ...}}}
+    with track_request("predict_sweep") as request_timer:
+        payload = request.get_json(silent=True)
+        request_timer.mark(PHASE_PARSE)
+        if not isinstance(payload, dict) or not isinstance(payload.get("sweep"), dict):
+            request_timer.status = 400
+            return jsonify({"errors": ["Send json with a 'base' mix and a 'sweep' of input ranges"]}), 400
+        concrete_predictor = ConcretePredictor(model_dir=MODEL_DIR)
+        try:
+            # the sweep is validated and scored in one call
+            sweep_result = concrete_predictor.predict_sweep(base=payload.get("base") or {}, sweep=payload["sweep"])
+        except ConcreteException as e:
+            root_error = e
+            while isinstance(root_error, ConcreteException) and root_error.__cause__ is not None:
+                root_error = root_error.__cause__
+            if isinstance(root_error, (ValueError, TypeError)):
+                request_timer.status = 400
+                return jsonify({"errors": [str(root_error)]}), 400
+            raise
+        request_timer.mark(PHASE_PREDICT)
+        return jsonify({
+            "axes": {name: values.tolist() for name, values in sweep_result.axes.items()},
+            "count": int(sweep_result.surface.size),
+            CONCRETE_STRENGTH_VALUE_KEY: sweep_result.surface.tolist()
+        })
+
+
+@app.route('/serving_stats', methods=['GET'])
+def serving_stats():
+    concrete_predictor = ConcretePredictor(model_dir=MODEL_DIR, serving_config=serving_config)
+    return jsonify({
+        "model_cache": concrete_predictor.get_cache_stats(),
+        "prediction_cache": concrete_predictor.get_prediction_cache_stats(),
+    })
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    # prometheus text format, aggregated over every gunicorn worker, with training gauges of the experiment store
+    return Response(get_metrics(experiment_collector=experiment_collector), content_type=METRICS_CONTENT_TYPE)
+
+
 @app.route('/saved_models', defaults={'req_path': 'saved_models'})
 @app.route('/saved_models/<path:req_path>')
 def saved_models_dir(req_path):
     os.makedirs("saved_models", exist_ok=True)
     # Joining the base and the requested path
-    print(f"req_path: {req_path}")
+    logger.debug("req_path: %s", req_path)
     abs_path = os.path.join(req_path)
-    print(abs_path)
     # Return 404 if path doesn't exist
     if not os.path.exists(abs_path):
         return abort(404)
@@ -162,7 +332,7 @@ def update_model_config():
         if request.method == 'POST':
             model_config = request.form['new_model_config']
             model_config = model_config.replace("'", '"')
-            print(model_config)
+            logger.debug("New model config: %s", model_config)
             model_config = json.loads(model_config)
 
             write_yaml_file(file_path=MODEL_CONFIG_FILE_PATH, data=model_config)
@@ -171,7 +341,7 @@ def update_model_config():
         return render_template('update_model.html', result={"model_config": model_config})
 
     except Exception as e:
-        logging.exception(e)
+        logger.exception(e)
         return str(e)
 
 
@@ -180,18 +350,39 @@ def update_model_config():
 def render_log_dir(req_path):
     os.makedirs(LOG_FOLDER_NAME, exist_ok=True)
     # Joining the base and the requested path
-    logging.info(f"req_path: {req_path}")
+    logger.debug("req_path: %s", req_path)
     abs_path = os.path.join(req_path)
-    print(abs_path)
     # Return 404 if path doesn't exist
     if not os.path.exists(abs_path):
         return abort(404)
 
     # Check if path is a file and serve
+    # a file is shown one page at a time from its line index, the last page by default
+    # ?page=3&per_page=200&level=WARNING&logger=concrete.component&function=initiate_data_ingestion
     if os.path.isfile(abs_path):
-        log_df = get_log_dataframe(abs_path)
-        context = {"log": log_df.to_html(classes="table-striped", index=False)}
-        return render_template('log.html', context=context)
+        per_page = min(max(request.args.get("per_page", default=LOG_PAGE_SIZE, type=int), 1), MAX_LOG_PAGE_SIZE)
+        level = request.args.get("level") if request.args.get("level") in LOG_LEVEL_NUMBERS else None
+        logger_name = request.args.get("logger") or None
+        function_name = request.args.get("function") or None
+        log_index = LogIndex.get_instance(abs_path)
+        log_page = log_index.get_page(page=request.args.get("page", type=int), per_page=per_page, level=level,
+                                      logger_name=logger_name, function_name=function_name)
+        context = {
+            "log_path": abs_path,
+            "records": log_page.records,
+            "page": log_page.page,
+            "per_page": per_page,
+            "page_count": log_page.page_count,
+            "record_count": log_page.record_count,
+            "level": level,
+            "levels": list(LOG_LEVEL_NUMBERS),
+            "logger": logger_name,
+            "loggers": log_index.get_logger_names(),
+            "function": function_name,
+            "functions": log_index.get_function_names()
+        }
+        # rows are rendered while the records are read
+        return stream_template('log.html', context=context)
 
     # Show directory contents
     files = {os.path.join(abs_path, file): file for file in os.listdir(abs_path)}
@@ -205,4 +396,5 @@ def render_log_dir(req_path):
 
 
 if __name__ == "__main__":
+    configure_logging()
     app.run()
\ No newline at end of file
@@ -0,0 +1,184 @@
+from concrete.entity.predictor import ConcretePredictor, ConcreteData, ConcreteBatchData
+from concrete.entity.micro_batcher import MicroBatcher, PredictionQueueFull
+from concrete.entity.serving_metrics import track_request, get_metrics, ExperimentCollector, PHASE_PARSE, \
+    PHASE_VALIDATION, PHASE_PREDICT, METRICS_CONTENT_TYPE
+from concrete.config.configuration import Configuration
+from concrete.constant import ROOT_DIR, SAVED_MODELS_DIR_NAME, SCHEMA_FILE_PATH, EXPERIMENT_DIR_NAME, \
+    EXPERIMENT_DB_FILE_NAME
+from concrete.logger import get_logger, configure_logging
+from concrete.exception import ConcreteException
+from aiohttp import web
+import argparse
+import io
+import os
+
+logger = get_logger(__name__)
+
+MODEL_DIR = os.path.join(ROOT_DIR, SAVED_MODELS_DIR_NAME)
+CONCRETE_STRENGTH_VALUE_KEY = "concrete_strength_value"
+
+# plain string app keys, web.AppKey needs aiohttp 3.9 which does not support python 3.7 of the docker image
+concrete_predictor_key = "concrete_predictor"
+concrete_batch_data_key = "concrete_batch_data"
+micro_batcher_key = "micro_batcher"
+experiment_collector_key = "experiment_collector"
+
+
+async def predict(request: web.Request) -> web.Response:
+    # single row as json object or form fields, rows of concurrent requests are scored together
+    with track_request("predict") as request_timer:
+        try:
+            data = await request.json() if request.content_type == "application/json" else await request.post()
+            request_timer.mark(PHASE_PARSE)
+            concrete_data = ConcreteData.from_dict(data)
+        except Exception as e:
+            request_timer.status = 400
+            return web.json_response({"errors": [f"Could not parse input: {e.__cause__ or e}"]}, status=400)
+
+        concrete_input_values = concrete_data.get_concrete_input_values()
+        request_timer.mark(PHASE_VALIDATION)
+        # the model is resolved by the micro batcher for the whole batch, predict includes the wait for the batch
+        concrete_strength_value = request.app[concrete_predictor_key].get_cached_prediction(concrete_input_values)
+        if concrete_strength_value is None:
+            try:
+                concrete_strength_value = await request.app[micro_batcher_key].predict(concrete_input_values)
+            except PredictionQueueFull:
+                request_timer.status = 503
+                return web.json_response({"errors": ["Server is busy, retry later"]}, status=503)
+        request_timer.mark(PHASE_PREDICT)
+        return web.json_response({CONCRETE_STRENGTH_VALUE_KEY: float(concrete_strength_value)})
+
+
+async def predict_batch(request: web.Request) -> web.Response:
+    with track_request("predict_batch") as request_timer:
+        try:
+            if request.content_type == "application/json":
+                concrete_df = ConcreteBatchData.get_data_frame_from_json(await request.json())
+            elif request.content_type == "text/csv":
+                concrete_df = ConcreteBatchData.get_data_frame_from_csv(io.BytesIO(await request.read()))
+            elif request.content_type == "multipart/form-data":
+                data = await request.post()
+                if "file" not in data:
+                    request_timer.status = 400
+                    return web.json_response({"errors": ["Upload the csv as the 'file' field"]}, status=400)
+                concrete_df = ConcreteBatchData.get_data_frame_from_csv(data["file"].file)
+            else:
+                request_timer.status = 400
+                return web.json_response(
+                    {"errors": ["Send rows as application/json, text/csv or a csv file upload"]}, status=400)
+        except Exception as e:
+            logger.exception(e)
+            request_timer.status = 400
+            return web.json_response({"errors": [f"Could not parse batch: {e.__cause__ or e}"]}, status=400)
+        request_timer.mark(PHASE_PARSE)
+
+        concrete_df, errors = request.app[concrete_batch_data_key].validate_input_data_frame(concrete_df)
+        request_timer.mark(PHASE_VALIDATION)
+        if errors:
+            request_timer.status = 400
+            return web.json_response({"errors": errors}, status=400)
+
+        # predict includes the wait for a slot of the thread pool
+        concrete_strength_values = await request.app[micro_batcher_key].run_in_executor(
+            request.app[concrete_predictor_key].predict, concrete_df)
+        request_timer.mark(PHASE_PREDICT)
+        return web.json_response({
+            "count": len(concrete_strength_values),
+            CONCRETE_STRENGTH_VALUE_KEY: concrete_strength_values.tolist()
+        })
+
+
+async def predict_sweep(request: web.Request) -> web.Response:
+    with track_request("predict_sweep") as request_timer:
+        try:
+            payload = await request.json()
+        except Exception:
+            payload = None
+        request_timer.mark(PHASE_PARSE)
+        if not isinstance(payload, dict) or not isinstance(payload.get("sweep"), dict):
+            request_timer.status = 400
+            return web.json_response({"errors": ["Send json with a 'base' mix and a 'sweep' of input ranges"]},
+                                     status=400)
+        try:
+            sweep_result = await request.app[micro_batcher_key].run_in_executor(
+                request.app[concrete_predictor_key].predict_sweep, payload.get("base") or {}, payload["sweep"])
+        except ConcreteException as e:
+            root_error = e
+            while isinstance(root_error, ConcreteException) and root_error.__cause__ is not None:
+                root_error = root_error.__cause__
+            if isinstance(root_error, (ValueError, TypeError)):
+                request_timer.status = 400
+                return web.json_response({"errors": [str(root_error)]}, status=400)
+            raise
+        request_timer.mark(PHASE_PREDICT)
+        return web.json_response({
+            "axes": {name: values.tolist() for name, values in sweep_result.axes.items()},
+            "count": int(sweep_result.surface.size),
+            CONCRETE_STRENGTH_VALUE_KEY: sweep_result.surface.tolist()
+        })
+
+
+async def metrics(request: web.Request) -> web.Response:
+    # same metrics as the flask app, training gauges are read from the experiment store
+    return web.Response(body=get_metrics(experiment_collector=request.app[experiment_collector_key]),
+                        headers={"Content-Type": METRICS_CONTENT_TYPE})
+
+
+async def serving_stats(request: web.Request) -> web.Response:
+    return web.json_response({
+        "model_cache": request.app[concrete_predictor_key].get_cache_stats(),
+        "prediction_cache": request.app[concrete_predictor_key].get_prediction_cache_stats(),
+        "micro_batcher": request.app[micro_batcher_key].get_stats(),
+    })
+
+
+def create_app(model_dir: str = MODEL_DIR, config: Configuration = None) -> web.Application:
+    """
+    Description: Function is used to create the asyncio prediction server, it shares the model cache and input
+                 schema handling of the flask app
+    return: aiohttp application, run it with web.run_app or gunicorn --worker-class aiohttp.GunicornWebWorker
+    """
+    config = config or Configuration()
+    serving_config = config.get_serving_config()
+    concrete_predictor = ConcretePredictor(model_dir=model_dir, serving_config=serving_config)
+    micro_batcher = MicroBatcher(predict_function=concrete_predictor.predict_rows,
+                                 max_batch_size=serving_config.max_batch_size,
+                                 max_batch_delay=serving_config.max_batch_delay,
+                                 executor_workers=serving_config.executor_workers,
+                                 max_pending_requests=serving_config.max_pending_requests)
+
+    app = web.Application()
+    app[concrete_predictor_key] = concrete_predictor
+    app[concrete_batch_data_key] = ConcreteBatchData(schema_file_path=SCHEMA_FILE_PATH)
+    app[micro_batcher_key] = micro_batcher
+    app[experiment_collector_key] = ExperimentCollector(experiment_db_file_path=os.path.join(
+        config.training_pipeline_config.artifact_dir, EXPERIMENT_DIR_NAME, EXPERIMENT_DB_FILE_NAME))
+
+    async def start_micro_batcher(app: web.Application):
+        await app[micro_batcher_key].start()
+
+    async def close_micro_batcher(app: web.Application):
+        await app[micro_batcher_key].close()
+
+    app.on_startup.append(start_micro_batcher)
+    app.on_cleanup.append(close_micro_batcher)
+    app.router.add_post("/predict", predict)
+    app.router.add_post("/predict_batch", predict_batch)
+    app.router.add_post("/predict_sweep", predict_sweep)
+    app.router.add_get("/serving_stats", serving_stats)
+    app.router.add_get("/metrics", metrics)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve predictions with an asyncio server and micro batching.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    args = parser.parse_args()
+    configure_logging()
+    web.run_app(create_app(model_dir=args.model_dir), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Import time budget of the serving entry points.
+
+Every module is imported in a fresh interpreter with `python -X importtime`, the fastest of a few runs is
+compared to the budget and the modules a serving process must not import (training dependencies) are checked.
+Each module is also imported once after `configure_logging()`, an import must not write anything to `logs/`:
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py app --budget-ms 800 --top 15
+
+The exit status is 1 when a budget is exceeded, a training dependency is imported or an import creates a log
+file, so it can guard the startup time in CI.
+"""
+from collections import namedtuple
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODULES = ["app", "async_app"]
+DEFAULT_BUDGET_MS = 1000
+# imported by the training pipeline only, a serving process works without them installed
+FORBIDDEN_MODULES = ["kaggle", "evidently", "sklearn", "concrete.pipline.pipline", "concrete.component"]
+LOG_DIR_NAME = "logs"
+IMPORT_TIME_PATTERN = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+ImportTime = namedtuple("ImportTime", ["module", "self_us", "cumulative_us", "depth"])
+
+
+def get_env() -> dict:
+    return dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT_DIR, os.environ.get("PYTHONPATH")])))
+
+
+def get_import_times(module: str, cwd: str) -> list:
+    """
+    Description: Function is used to import a module in a new interpreter and parse its -X importtime report
+    return: list of ImportTime, the imported module is the last one
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=cwd, env=get_env(),
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Could not import [{module}]:\n{result.stderr[-2000:]}")
+    import_times = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_PATTERN.match(line)
+        if match:
+            import_times.append(ImportTime(module=match.group(4), self_us=int(match.group(1)),
+                                           cumulative_us=int(match.group(2)), depth=len(match.group(3)) // 2))
+    return import_times
+
+
+def get_log_files(cwd: str) -> set:
+    log_dir = os.path.join(cwd, LOG_DIR_NAME)
+    return set(os.listdir(log_dir)) if os.path.isdir(log_dir) else set()
+
+
+def get_created_log_files(module: str, cwd: str) -> list:
+    """
+    Description: Function is used to import a module, with the logging of an entry point configured, in a new
+    interpreter and list the log files the import created
+    return: list of the new file names in logs/
+    """
+    log_files = get_log_files(cwd)
+    code = f"from concrete.logger import configure_logging; configure_logging(); import {module}"
+    result = subprocess.run([sys.executable, "-c", code], cwd=cwd, env=get_env(), capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Could not import [{module}]:\n{result.stderr[-2000:]}")
+    return sorted(get_log_files(cwd) - log_files)
+
+
+def get_forbidden_modules(import_times: list) -> list:
+    return sorted({import_time.module for import_time in import_times
+                   if any(import_time.module == name or import_time.module.startswith(f"{name}.")
+                          for name in FORBIDDEN_MODULES)})
+
+
+def measure(module: str, cwd: str, repeat: int, top: int) -> dict:
+    runs = [get_import_times(module, cwd) for _ in range(repeat)]
+    import_times = min(runs, key=lambda run: run[-1].cumulative_us)
+    # packages imported directly by the entry point or one level below, by cumulative time
+    slowest = sorted((import_time for import_time in import_times if 1 <= import_time.depth <= 2),
+                     key=lambda import_time: import_time.cumulative_us, reverse=True)[:top]
+    return {
+        "module": module,
+        "import_ms": import_times[-1].cumulative_us / 1000,
+        "runs_ms": [run[-1].cumulative_us / 1000 for run in runs],
+        "module_count": len(import_times),
+        "forbidden_modules": get_forbidden_modules(import_times),
+        "log_files": get_created_log_files(module, cwd),
+        "slowest": [{"module": import_time.module, "cumulative_ms": import_time.cumulative_us / 1000}
+                    for import_time in slowest],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import time of the serving entry points.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--cwd", default=ROOT_DIR, help="dir holding config/ and saved_models/")
+    parser.add_argument("--json", action="store_true", help="print the results as json")
+    args = parser.parse_args()
+
+    results = [measure(module, cwd=args.cwd, repeat=args.repeat, top=args.top) for module in args.modules]
+    failures = []
+    for result in results:
+        if result["import_ms"] > args.budget_ms:
+            failures.append(f"{result['module']}: {result['import_ms']:.0f} ms > budget {args.budget_ms:.0f} ms")
+        if result["forbidden_modules"]:
+            failures.append(f"{result['module']} imports training dependencies: "
+                            f"{', '.join(result['forbidden_modules'])}")
+        if result["log_files"]:
+            failures.append(f"{result['module']} writes log files on import: {', '.join(result['log_files'])}")
+
+    if args.json:
+        print(json.dumps({"budget_ms": args.budget_ms, "results": results, "failures": failures}, indent=4))
+    else:
+        for result in results:
+            print(f"{result['module']}: {result['import_ms']:.0f} ms, {result['module_count']} modules "
+                  f"(runs: {', '.join(f'{run_ms:.0f}' for run_ms in result['runs_ms'])} ms)")
+            for slow_import in result["slowest"]:
+                print(f"    {slow_import['cumulative_ms']:8.1f} ms  {slow_import['module']}")
+        for failure in failures:
+            print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Load test of the prediction endpoint of one or more running servers.
+
+Every url gets the same number of concurrent clients sending single row form posts to /predict for a fixed
+duration, e.g. the flask app and the asyncio app:
+
+    gunicorn --workers=1 --bind 127.0.0.1:5000 app:app
+    python async_app.py --port 8080
+    python benchmarks/load_test.py http://127.0.0.1:5000/predict http://127.0.0.1:8080/predict --concurrency 64
+"""
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+import numpy as np
+import argparse
+import asyncio
+import time
+
+CONCRETE_INPUT = {"cement": 540.0, "blast_furnace_slag": 0.0, "fly_ash": 0.0, "water": 162.0,
+                  "superplasticizer": 2.5, "coarse_aggregate": 1040.0, "fine_aggregate": 676.0, "age": 28}
+
+
+async def run_client(session: ClientSession, url: str, stop_time: float, latencies: list, errors: list):
+    while time.perf_counter() < stop_time:
+        start_time = time.perf_counter()
+        try:
+            async with session.post(url, data=CONCRETE_INPUT) as response:
+                await response.read()
+                if response.status != 200:
+                    errors.append(response.status)
+                    continue
+        except Exception as e:
+            errors.append(type(e).__name__)
+            continue
+        latencies.append(time.perf_counter() - start_time)
+
+
+async def load_test(url: str, concurrency: int, duration: float) -> dict:
+    latencies, errors = [], []
+    connector = TCPConnector(limit=concurrency)
+    async with ClientSession(connector=connector, timeout=ClientTimeout(total=60)) as session:
+        # one request to load the model before measuring
+        async with session.post(url, data=CONCRETE_INPUT) as response:
+            await response.read()
+        stop_time = time.perf_counter() + duration
+        await asyncio.gather(*[run_client(session, url, stop_time, latencies, errors) for _ in range(concurrency)])
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "url": url,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "requests_per_second": len(latencies) / duration,
+        "p50_ms": float(np.percentile(latencies_ms, 50)) if len(latencies) else None,
+        "p95_ms": float(np.percentile(latencies_ms, 95)) if len(latencies) else None,
+        "p99_ms": float(np.percentile(latencies_ms, 99)) if len(latencies) else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test prediction servers with concurrent single row requests.")
+    parser.add_argument("urls", nargs="+", help="predict urls of running servers")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per url")
+    args = parser.parse_args()
+
+    print(f"{'url':<40} {'requests/s':>12} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for url in args.urls:
+        result = asyncio.run(load_test(url, concurrency=args.concurrency, duration=args.duration))
+        print(f"{url:<40} {result['requests_per_second']:>12.1f} {result['p50_ms']:>9.2f} "
+              f"{result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} {result['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
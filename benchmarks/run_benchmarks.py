@@ -0,0 +1,478 @@
+"""
+Benchmark suite of the data stages, training and serving.
+
+Synthetic concrete mixes following config/schema.yaml (see synthetic_data.py) are generated for every size and
+the suite measures:
+- data: load_data csv parse throughput of the train file
+- transformation: time and memory of DataTransformation on the train and test files
+- training: ModelFactory.get_best_model wall time per model family of config/model.yaml
+- predictor: ConcretePredictor.predict latency of single rows and of the whole test file
+- flask: /predict requests per second through the flask test client
+
+Groups needed by the selected ones also run (serving needs a trained model). Every benchmark runs in a scratch
+working directory holding a copy of config/, so artifacts, logs and saved models of the repository are
+untouched. Results are written as json, and with --baseline every metric is compared to a stored run. The exit
+status is 1 when a metric regressed by more than the threshold:
+
+    python benchmarks/run_benchmarks.py --output baseline.json
+    python benchmarks/run_benchmarks.py --baseline baseline.json --output current.json
+    python benchmarks/run_benchmarks.py --sizes 1k,100k,10m --only data transformation
+    python benchmarks/run_benchmarks.py --compare current.json --baseline baseline.json
+"""
+from synthetic_data import parse_size, write_csv_file
+from collections import namedtuple
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import argparse
+import platform
+import subprocess
+import tempfile
+import shutil
+import json
+import time
+import gc
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_DIR_NAME = "config"
+DEFAULT_SIZES = "1k,100k"
+BENCHMARK_GROUPS = ["data", "transformation", "training", "predictor", "flask"]
+# groups whose outputs a group needs
+GROUP_DEPENDENCIES = {"training": ["transformation"], "predictor": ["training"], "flask": ["training"]}
+DEFAULT_THRESHOLD = 0.2
+# about the 1030 rows of the concrete dataset the pipeline trains on, the searches grow fast with rows
+DEFAULT_MAX_TRAIN_ROWS = 1000
+TEST_SHARE = 0.2
+# repeated runs of a benchmark on more rows take long and vary little
+MAX_REPEATED_ROWS = 100000
+BYTES_PER_MB = 1024 * 1024
+
+# compared metrics and whether a higher value is better, other values of a result are informational
+COMPARED_METRICS = {
+    "seconds": False,
+    "rows_per_second": True,
+    "mb_per_second": True,
+    "peak_rss_mb": False,
+    "p50_ms": False,
+    "p95_ms": False,
+    "requests_per_second": True,
+}
+
+Measurement = namedtuple("Measurement", ["result", "seconds", "peak_rss_mb", "peak_rss_increase_mb", "read_mb",
+                                         "write_mb"])
+Comparison = namedtuple("Comparison", ["benchmark", "metric", "baseline", "current", "change", "is_regression"])
+
+
+def set_working_dir(work_dir: str):
+    """
+    Description: Function is used to run the suite in a scratch dir, concrete reads config/ from the working
+                 directory when it is first imported so this is called before any concrete import
+    """
+    config_dir = os.path.join(work_dir, CONFIG_DIR_NAME)
+    os.makedirs(config_dir, exist_ok=True)
+    for file_name in os.listdir(os.path.join(ROOT_DIR, CONFIG_DIR_NAME)):
+        shutil.copy(os.path.join(ROOT_DIR, CONFIG_DIR_NAME, file_name), config_dir)
+    os.chdir(work_dir)
+    sys.path.insert(0, ROOT_DIR)
+
+
+def measure(function, repeat: int = 1) -> Measurement:
+    """
+    Description: Function is used to run a benchmark with the pipeline profiler
+    return: result of the last run, median wall time and the resources of the slowest run
+    """
+    from concrete.util.profiler import Profiler, profile_step, get_peak_rss, reset_peak_rss
+    runs = []
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        profiler = Profiler().start()
+        # peak rss is reset to the current rss, which is not possible on every platform
+        rss_before = get_peak_rss() if reset_peak_rss() else None
+        with profile_step("benchmark"):
+            result = function()
+        # steps recorded inside the benchmark are nested in its root step
+        runs.append(([step for step in profiler.stop() if step.parent_step_id is None][0], rss_before))
+    step, rss_before = max(runs, key=lambda run: run[0].wall_time)
+    return Measurement(result=result,
+                       seconds=float(np.median([run_step.wall_time for run_step, _ in runs])),
+                       peak_rss_mb=get_mb(step.peak_rss),
+                       peak_rss_increase_mb=None if rss_before is None else get_mb(step.peak_rss - rss_before),
+                       read_mb=get_mb(step.read_bytes),
+                       write_mb=get_mb(step.write_bytes))
+
+
+def get_mb(byte_count):
+    return None if byte_count is None else byte_count / BYTES_PER_MB
+
+
+def get_repeat(row_count: int, repeat: int) -> int:
+    return repeat if row_count <= MAX_REPEATED_ROWS else 1
+
+
+def get_latency_metrics(latencies: list) -> dict:
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "mean_ms": float(latencies_ms.mean()),
+    }
+
+
+def prepare_data(size: str, data_dir: str, seed: int) -> dict:
+    """
+    Description: Function is used to generate the train and test csv of a size, files of earlier runs with the
+                 same size and seed are reused
+    """
+    row_count = parse_size(size)
+    test_row_count = max(int(row_count * TEST_SHARE), 1)
+    dataset_dir = os.path.join(data_dir, f"concrete_{size}_{seed}")
+    return {
+        "size": size,
+        "train_row_count": row_count - test_row_count,
+        "test_row_count": test_row_count,
+        "train_file_path": write_csv_file(os.path.join(dataset_dir, "train.csv"), row_count - test_row_count,
+                                          seed=seed),
+        "test_file_path": write_csv_file(os.path.join(dataset_dir, "test.csv"), test_row_count, seed=seed + 1),
+    }
+
+
+def benchmark_load_data(dataset: dict, repeat: int) -> dict:
+    from concrete.constant import SCHEMA_FILE_PATH
+    from concrete.util.util import load_data
+    row_count = dataset["train_row_count"]
+    measurement = measure(lambda: load_data(file_path=dataset["train_file_path"], schema_file_path=SCHEMA_FILE_PATH),
+                          repeat=get_repeat(row_count, repeat))
+    file_mb = get_mb(os.path.getsize(dataset["train_file_path"]))
+    return {
+        "rows": row_count,
+        "file_mb": file_mb,
+        "seconds": measurement.seconds,
+        "rows_per_second": row_count / measurement.seconds,
+        "mb_per_second": file_mb / measurement.seconds,
+        "peak_rss_mb": measurement.peak_rss_mb,
+        "peak_rss_increase_mb": measurement.peak_rss_increase_mb,
+    }
+
+
+def benchmark_data_transformation(dataset: dict, repeat: int, artifact_dir: str):
+    """
+    return: result and DataTransformationArtifact of the dataset
+    """
+    from concrete.component.data_transformation import DataTransformation
+    from concrete.config.configuration import Configuration
+    from concrete.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
+    from concrete.constant import SCHEMA_FILE_PATH
+    transformed_dir = os.path.join(artifact_dir, "data_transformation", dataset["size"])
+    data_transformation_config = Configuration().get_data_transformation_config()._replace(
+        transformed_train_dir=os.path.join(transformed_dir, "train"),
+        transformed_test_dir=os.path.join(transformed_dir, "test"),
+        preprocessed_object_file_path=os.path.join(transformed_dir, "preprocessed.pkl"))
+    data_transformation = DataTransformation(
+        data_transformation_config=data_transformation_config,
+        data_ingestion_artifact=DataIngestionArtifact(train_file_path=dataset["train_file_path"],
+                                                      test_file_path=dataset["test_file_path"],
+                                                      is_ingested=True, message=""),
+        data_validation_artifact=DataValidationArtifact(schema_file_path=SCHEMA_FILE_PATH, report_file_path=None,
+                                                        report_page_file_path=None, is_validated=True, message=""))
+    row_count = dataset["train_row_count"] + dataset["test_row_count"]
+    measurement = measure(data_transformation.initiate_data_transformation, repeat=get_repeat(row_count, repeat))
+    return {
+        "rows": row_count,
+        "seconds": measurement.seconds,
+        "rows_per_second": row_count / measurement.seconds,
+        "peak_rss_mb": measurement.peak_rss_mb,
+        "peak_rss_increase_mb": measurement.peak_rss_increase_mb,
+        "read_mb": measurement.read_mb,
+        "write_mb": measurement.write_mb,
+    }, measurement.result
+
+
+def write_family_model_config(model_config: dict, model_key: str, file_path: str) -> str:
+    # model config of one family, searches stay quiet so their output does not mix with the report
+    from concrete.util.util import write_yaml_file
+    grid_search_config = dict(model_config["grid_search"])
+    grid_search_config["params"] = dict(grid_search_config.get("params") or {}, verbose=0)
+    write_yaml_file(file_path=file_path, data=dict(model_config, grid_search=grid_search_config,
+                                                   model_selection={model_key: model_config["model_selection"][
+                                                       model_key]}))
+    return file_path
+
+
+def benchmark_training(data_transformation_artifact, max_train_rows: int, families: list, artifact_dir: str):
+    """
+    return: result per model family and the best model of all families
+    """
+    from concrete.entity.model_factory import ModelFactory
+    from concrete.util.util import read_yaml_file, load_numpy_array_data
+    from sklearn.model_selection import ParameterGrid
+    model_config = read_yaml_file(os.path.join(CONFIG_DIR_NAME, "model.yaml"))
+    X = load_numpy_array_data(data_transformation_artifact.transformed_train_file_path)[:max_train_rows]
+    y = load_numpy_array_data(data_transformation_artifact.transformed_train_target_file_path)[:max_train_rows]
+    results, best_model = {}, None
+    for model_key, model_initialization_config in model_config["model_selection"].items():
+        family = model_initialization_config["class"]
+        if families and family not in families:
+            continue
+        model_config_path = write_family_model_config(model_config, model_key,
+                                                      os.path.join(artifact_dir, "model_config", f"{family}.yaml"))
+        model_factory = ModelFactory(model_config_path=model_config_path)
+        measurement = measure(lambda: model_factory.get_best_model(X, y, base_accuracy=float("-inf")))
+        results[family] = {
+            "rows": len(X),
+            "candidates": len(ParameterGrid(model_initialization_config.get("search_param_grid") or {})),
+            "best_score": float(measurement.result.best_score),
+            "seconds": measurement.seconds,
+            "peak_rss_mb": measurement.peak_rss_mb,
+        }
+        if best_model is None or measurement.result.best_score > best_model.best_score:
+            best_model = measurement.result
+    return results, best_model
+
+
+def export_model(best_model, data_transformation_artifact, artifact_dir: str):
+    """
+    Description: Function is used to push the best model to saved_models of the working dir as the pipeline does
+    return: ModelPusherArtifact
+    """
+    from concrete.component.model_trainer import ConcreteEstimatorModel
+    from concrete.component.model_pusher import ModelPusher
+    from concrete.config.configuration import Configuration
+    from concrete.entity.artifact_entity import ModelEvaluationArtifact
+    from concrete.util.util import load_object, save_object
+    model_file_path = os.path.join(artifact_dir, "model_trainer", "model.pkl")
+    save_object(file_path=model_file_path, obj=ConcreteEstimatorModel(
+        preprocessing_object=load_object(data_transformation_artifact.preprocessed_object_file_path),
+        trained_model_object=best_model.best_model))
+    model_pusher = ModelPusher(model_pusher_config=Configuration().get_model_pusher_config(),
+                               model_evaluation_artifact=ModelEvaluationArtifact(is_model_accepted=True,
+                                                                                 evaluated_model_path=model_file_path))
+    return model_pusher.initiate_model_pusher()
+
+
+def read_inputs(file_path: str, row_count: int = None) -> pd.DataFrame:
+    from concrete.entity.predictor import ConcreteData
+    return pd.read_csv(file_path, nrows=row_count)[ConcreteData.input_columns]
+
+
+def benchmark_single_row_predictions(model_dir: str, dataset: dict, request_count: int) -> dict:
+    from concrete.entity.predictor import ConcretePredictor
+    concrete_predictor = ConcretePredictor(model_dir=model_dir)
+    load_start_time = time.perf_counter()
+    concrete_predictor.get_model()
+    load_seconds = time.perf_counter() - load_start_time
+    inputs = read_inputs(dataset["test_file_path"], request_count)
+    rows = [inputs.iloc[[index % len(inputs)]] for index in range(request_count)]
+    latencies = []
+    for row in rows:
+        start_time = time.perf_counter()
+        concrete_predictor.predict(X=row)
+        latencies.append(time.perf_counter() - start_time)
+    return dict(requests=request_count, model_load_seconds=load_seconds, **get_latency_metrics(latencies))
+
+
+def benchmark_batch_predictions(model_dir: str, dataset: dict, repeat: int) -> dict:
+    from concrete.entity.predictor import ConcretePredictor
+    concrete_predictor = ConcretePredictor(model_dir=model_dir)
+    inputs = read_inputs(dataset["test_file_path"])
+    measurement = measure(lambda: concrete_predictor.predict(X=inputs), repeat=get_repeat(len(inputs), repeat))
+    return {
+        "rows": len(inputs),
+        "seconds": measurement.seconds,
+        "rows_per_second": len(inputs) / measurement.seconds,
+        "peak_rss_increase_mb": measurement.peak_rss_increase_mb,
+    }
+
+
+def benchmark_flask_predict(dataset: dict, request_count: int) -> dict:
+    # the app serves saved_models of the working dir
+    import app
+    client = app.app.test_client()
+    inputs = read_inputs(dataset["test_file_path"], request_count)
+    forms = [{column: str(value) for column, value in zip(inputs.columns, inputs.iloc[index % len(inputs)])}
+             for index in range(request_count)]
+    client.post("/predict", data=forms[0])
+    latencies, errors = [], 0
+    start_time = time.perf_counter()
+    for form in forms:
+        request_start_time = time.perf_counter()
+        response = client.post("/predict", data=form)
+        latencies.append(time.perf_counter() - request_start_time)
+        errors += response.status_code != 200
+    seconds = time.perf_counter() - start_time
+    return dict(requests=request_count, errors=errors, requests_per_second=request_count / seconds,
+                **get_latency_metrics(latencies))
+
+
+def get_groups(only: list) -> list:
+    groups = set(only or BENCHMARK_GROUPS)
+    for group in list(groups):
+        pending = [group]
+        while pending:
+            dependencies = GROUP_DEPENDENCIES.get(pending.pop(), [])
+            groups.update(dependencies)
+            pending.extend(dependencies)
+    return [group for group in BENCHMARK_GROUPS if group in groups]
+
+
+def run_benchmarks(args, work_dir: str) -> dict:
+    groups = get_groups(args.only)
+    artifact_dir = os.path.join(work_dir, "benchmark_artifact")
+    results = {}
+
+    def add_result(name: str, result: dict):
+        results[name] = result
+        print(f"{name:<40} " + "  ".join(f"{metric}={result[metric]:.4g}" for metric in COMPARED_METRICS
+                                         if result.get(metric) is not None), flush=True)
+
+    datasets = []
+    for size in args.sizes.split(","):
+        generation_start_time = time.perf_counter()
+        datasets.append(prepare_data(size.strip().lower(), data_dir=args.data_dir, seed=args.seed))
+        print(f"dataset {size}: {time.perf_counter() - generation_start_time:.1f} s", flush=True)
+
+    data_transformation_artifact = None
+    for dataset in datasets:
+        if "data" in groups:
+            add_result(f"load_data/{dataset['size']}", benchmark_load_data(dataset, repeat=args.repeat))
+        if "transformation" in groups:
+            result, data_transformation_artifact = benchmark_data_transformation(dataset, repeat=args.repeat,
+                                                                                 artifact_dir=artifact_dir)
+            add_result(f"data_transformation/{dataset['size']}", result)
+
+    if "training" in groups:
+        # trained on the first rows of the largest dataset
+        training_results, best_model = benchmark_training(data_transformation_artifact,
+                                                          max_train_rows=args.max_train_rows,
+                                                          families=args.families, artifact_dir=artifact_dir)
+        for family, result in training_results.items():
+            add_result(f"training/{family}", result)
+        if "predictor" in groups or "flask" in groups:
+            model_pusher_artifact = export_model(best_model, data_transformation_artifact, artifact_dir=artifact_dir)
+            print(f"serving {type(best_model.best_model).__name__} "
+                  f"({'compiled' if model_pusher_artifact.compiled_model_file_path else 'pickled'})", flush=True)
+
+    model_dir = os.path.join(work_dir, "saved_models")
+    if "predictor" in groups:
+        add_result("predictor/single_row", benchmark_single_row_predictions(model_dir, datasets[0],
+                                                                            request_count=args.requests))
+        for dataset in datasets:
+            add_result(f"predictor/batch/{dataset['size']}",
+                       benchmark_batch_predictions(model_dir, dataset, repeat=args.repeat))
+    if "flask" in groups:
+        add_result("flask/predict", benchmark_flask_predict(datasets[0], request_count=args.requests))
+    return results
+
+
+def get_git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def get_metadata(args) -> dict:
+    return {
+        "time_stamp": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": get_git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "sizes": args.sizes,
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "max_train_rows": args.max_train_rows,
+        "requests": args.requests,
+    }
+
+
+def compare_results(current: dict, baseline: dict, threshold: float) -> list:
+    """
+    Description: Function is used to compare the metrics of two runs present in both
+    return: list of Comparison, a metric is a regression when it is worse than the baseline by more than threshold
+    """
+    comparisons = []
+    for benchmark, result in current["results"].items():
+        baseline_result = baseline["results"].get(benchmark)
+        if baseline_result is None:
+            continue
+        for metric, is_higher_better in COMPARED_METRICS.items():
+            current_value, baseline_value = result.get(metric), baseline_result.get(metric)
+            if current_value is None or not baseline_value:
+                continue
+            change = current_value / baseline_value - 1
+            comparisons.append(Comparison(benchmark=benchmark, metric=metric, baseline=baseline_value,
+                                          current=current_value, change=change,
+                                          is_regression=-change > threshold if is_higher_better
+                                          else change > threshold))
+    return comparisons
+
+
+def print_comparisons(comparisons: list, current: dict, baseline: dict, threshold: float):
+    for key in ["python", "platform", "cpu_count"]:
+        if current["metadata"].get(key) != baseline["metadata"].get(key):
+            print(f"WARNING {key} differs from the baseline: {baseline['metadata'].get(key)} -> "
+                  f"{current['metadata'].get(key)}")
+    print(f"{'benchmark':<36} {'metric':<20} {'baseline':>12} {'current':>12} {'change':>8}")
+    for comparison in comparisons:
+        print(f"{comparison.benchmark:<36} {comparison.metric:<20} {comparison.baseline:>12.4g} "
+              f"{comparison.current:>12.4g} {comparison.change:>+8.1%}"
+              f"{'  REGRESSION' if comparison.is_regression else ''}")
+    regression_count = sum(comparison.is_regression for comparison in comparisons)
+    print(f"{regression_count} of {len(comparisons)} metrics regressed by more than {threshold:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the data stages, training and serving on synthetic data.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma separated row counts, e.g. 1k,100k,10m")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARK_GROUPS, help="groups to run, all by default")
+    parser.add_argument("--families", nargs="+", help="model classes of model.yaml to train, all by default")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark up to 100k rows, median is kept")
+    parser.add_argument("--max-train-rows", type=int, default=DEFAULT_MAX_TRAIN_ROWS)
+    parser.add_argument("--requests", type=int, default=1000, help="single row predictions and /predict requests")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", help="dir keeping generated datasets between runs, scratch dir by default")
+    parser.add_argument("--work-dir", help="working dir kept after the run, a removed temporary dir by default")
+    parser.add_argument("--output", help="json file of the results")
+    parser.add_argument("--baseline", help="json results of an earlier run to compare with")
+    parser.add_argument("--compare", help="json results to compare with the baseline without running")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative change of a metric counted as a regression")
+    args = parser.parse_args()
+    # paths given relative to the directory the suite is started from
+    for path_arg in ["data_dir", "work_dir", "output", "baseline", "compare"]:
+        if getattr(args, path_arg):
+            setattr(args, path_arg, os.path.abspath(getattr(args, path_arg)))
+
+    if args.compare:
+        with open(args.compare) as current_file:
+            current = json.load(current_file)
+    else:
+        work_dir = args.work_dir or tempfile.mkdtemp(prefix="concrete_benchmark_")
+        args.data_dir = args.data_dir or os.path.join(work_dir, "data")
+        start_dir = os.getcwd()
+        set_working_dir(work_dir)
+        try:
+            current = {"metadata": get_metadata(args), "results": run_benchmarks(args, work_dir=work_dir)}
+        finally:
+            os.chdir(start_dir)
+            if not args.work_dir:
+                shutil.rmtree(work_dir, ignore_errors=True)
+        if args.output:
+            with open(args.output, "w") as output_file:
+                json.dump(current, output_file, indent=4)
+            print(f"results written to [{args.output}]")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        comparisons = compare_results(current, baseline, threshold=args.threshold)
+        print_comparisons(comparisons, current, baseline, threshold=args.threshold)
+        sys.exit(1 if any(comparison.is_regression for comparison in comparisons) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Synthetic concrete mix datasets following config/schema.yaml.
+
+Inputs are drawn from the ranges of the UCI concrete dataset (slag, fly ash and superplasticizer are absent from
+part of the mixes, age is one of the usual test ages) and the compressive strength follows Abrams' law on the
+water/binder ratio with an ACI age curve and noise, so the models have something to learn. Rows are written in
+chunks with a seed per chunk, a dataset of any size is reproducible and never held in memory:
+
+    python benchmarks/synthetic_data.py 100k concrete_100k.csv
+    python benchmarks/synthetic_data.py 10m concrete_10m.csv --seed 7
+"""
+import numpy as np
+import pandas as pd
+import argparse
+import os
+import time
+import yaml
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA_FILE_PATH = os.path.join(ROOT_DIR, "config", "schema.yaml")
+CHUNK_SIZE = 500000
+SIZE_SUFFIXES = {"k": 1000, "m": 1000000}
+TEST_AGES = np.array([1, 3, 7, 14, 28, 56, 90, 120, 180, 270, 365])
+TEST_AGE_WEIGHTS = np.array([0.01, 0.13, 0.12, 0.06, 0.41, 0.09, 0.08, 0.01, 0.03, 0.01, 0.05])
+
+
+def parse_size(size: str) -> int:
+    """
+    Description: Function is used to read a row count written as 1000, 1k or 10m
+    """
+    size = str(size).strip().lower()
+    if size[-1:] in SIZE_SUFFIXES:
+        return int(float(size[:-1]) * SIZE_SUFFIXES[size[-1]])
+    return int(size)
+
+
+def get_optional_amount(rng: np.random.Generator, row_count: int, present_share: float, low: float,
+                        high: float) -> np.ndarray:
+    # amount of an ingredient used in only part of the mixes
+    return np.where(rng.random(row_count) < present_share, rng.uniform(low, high, row_count), 0.0)
+
+
+def generate_chunk(rng: np.random.Generator, row_count: int) -> dict:
+    """
+    Description: Function is used to draw the inputs and strength of a chunk of mixes
+    return: column name -> values, columns named as in config/schema.yaml
+    """
+    cement = rng.uniform(102.0, 540.0, row_count)
+    blast_furnace_slag = get_optional_amount(rng, row_count, 0.55, 11.0, 359.4)
+    fly_ash = get_optional_amount(rng, row_count, 0.45, 24.5, 200.1)
+    superplasticizer = get_optional_amount(rng, row_count, 0.63, 1.7, 32.2)
+    binder = cement + blast_furnace_slag + fly_ash
+    # more superplasticizer, less water
+    water = np.clip(rng.normal(0.42, 0.08, row_count) * binder - 2.0 * superplasticizer, 121.8, 247.0)
+    coarse_aggregate = rng.uniform(801.0, 1145.0, row_count)
+    fine_aggregate = rng.uniform(594.0, 992.6, row_count)
+    age = rng.choice(TEST_AGES, size=row_count, p=TEST_AGE_WEIGHTS)
+
+    # slag and fly ash are weaker binders than cement
+    effective_binder = cement + 0.6 * blast_furnace_slag + 0.4 * fly_ash
+    strength_28_days = 96.5 / 7.5 ** (water / effective_binder) + 0.3 * superplasticizer
+    strength = strength_28_days * age / (4.0 + 0.85 * age) + rng.normal(0.0, 3.0, row_count)
+    return {
+        "cement": cement,
+        "blast_furnace_slag": blast_furnace_slag,
+        "fly_ash": fly_ash,
+        "water": water,
+        "superplasticizer": superplasticizer,
+        "coarse_aggregate": coarse_aggregate,
+        "fine_aggregate": fine_aggregate,
+        "age": age,
+        "concrete_compressive_strength": np.clip(strength, 2.3, 82.6),
+    }
+
+
+def generate_data_frames(row_count: int, seed: int = 42, schema_file_path: str = SCHEMA_FILE_PATH,
+                         chunk_size: int = CHUNK_SIZE):
+    """
+    Description: Function is used to generate a dataset as chunks typed and ordered as per schema file
+    return: generator of dataframes of at most chunk_size rows
+    """
+    with open(schema_file_path) as schema_file:
+        columns = yaml.safe_load(schema_file)["columns"]
+    chunk_seeds = np.random.SeedSequence(seed).spawn((row_count + chunk_size - 1) // chunk_size)
+    for chunk_number, chunk_seed in enumerate(chunk_seeds):
+        chunk_row_count = min(chunk_size, row_count - chunk_number * chunk_size)
+        chunk = generate_chunk(np.random.default_rng(chunk_seed), chunk_row_count)
+        missing_columns = [column for column in columns if column not in chunk]
+        if missing_columns:
+            raise ValueError(f"No generator for schema columns: {missing_columns}")
+        dataframe = pd.DataFrame({column: chunk[column] for column in columns})
+        float_columns = [column for column, dtype in columns.items() if np.issubdtype(np.dtype(dtype), np.floating)]
+        # amounts of the source dataset have one decimal
+        dataframe[float_columns] = dataframe[float_columns].round(1)
+        yield dataframe.astype(columns)
+
+
+def write_csv_file(file_path: str, row_count: int, seed: int = 42, schema_file_path: str = SCHEMA_FILE_PATH) -> str:
+    """
+    Description: Function is used to write a dataset as csv, an existing file of the same rows and seed is reused
+    return: file path
+    """
+    if os.path.exists(file_path):
+        return file_path
+    os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+    # written under a temporary name so an interrupted run does not leave a partial dataset behind
+    partial_file_path = f"{file_path}.partial"
+    for chunk_number, dataframe in enumerate(generate_data_frames(row_count, seed=seed,
+                                                                  schema_file_path=schema_file_path)):
+        dataframe.to_csv(partial_file_path, mode="w" if chunk_number == 0 else "a", header=chunk_number == 0,
+                         index=False)
+    os.replace(partial_file_path, file_path)
+    return file_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic concrete mix dataset as csv.")
+    parser.add_argument("size", help="row count, e.g. 1000, 100k or 10m")
+    parser.add_argument("file_path")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--schema", default=SCHEMA_FILE_PATH)
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    row_count = parse_size(args.size)
+    write_csv_file(args.file_path, row_count, seed=args.seed, schema_file_path=args.schema)
+    print(f"{row_count} rows written to [{args.file_path}] in {time.perf_counter() - start_time:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
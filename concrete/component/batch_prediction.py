@@ -0,0 +1,162 @@
+from concrete.constant import ROOT_DIR, SCHEMA_FILE_PATH, SAVED_MODELS_DIR_NAME, BATCH_PREDICTION_CHUNK_SIZE, \
+    TARGET_COLUMNS_KEY
+from concrete.entity.predictor import ConcretePredictor, ConcreteBatchData
+from concrete.entity.artifact_entity import BatchPredictionArtifact
+from concrete.exception import ConcreteException
+from concrete.util.util import read_yaml_file
+from concrete.logger import get_logger, configure_logging
+import pandas as pd
+import importlib.util
+import argparse
+import logging
+import os, sys
+import time
+
+logger = get_logger(__name__)
+
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+
+
+class BatchPrediction:
+
+    def __init__(self, input_file_path: str, output_file_path: str,
+                 model_dir: str = os.path.join(ROOT_DIR, SAVED_MODELS_DIR_NAME),
+                 schema_file_path: str = SCHEMA_FILE_PATH,
+                 chunk_size: int = BATCH_PREDICTION_CHUNK_SIZE):
+        """
+        Description: Function is used to get the batch prediction config
+        param input_file_path: csv or parquet file with the input columns of schema file, other columns (ids,
+                               keys) are passed through to the output
+        param output_file_path: csv or parquet file where the input rows and their predictions are written
+        param model_dir: directory where models are exported by model pusher
+        param schema_file_path: path of schema file
+        param chunk_size: number of rows read, scored and written at a time
+        """
+        try:
+            logger.info(f"{'>>' * 20}Batch Prediction log started.{'<<' * 20} ")
+            self.input_file_path = input_file_path
+            self.output_file_path = output_file_path
+            self.chunk_size = chunk_size
+            self.concrete_batch_data = ConcreteBatchData(schema_file_path=schema_file_path)
+            self.concrete_predictor = ConcretePredictor(model_dir=model_dir)
+            self.prediction_column_name = read_yaml_file(file_path=schema_file_path)[TARGET_COLUMNS_KEY]
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def read_chunks(self):
+        """
+        Description: Function is used to read the input file chunk by chunk
+        return: generator of dataframe with at most chunk_size rows, column names stripped
+        """
+        try:
+            if self.input_file_path.endswith(PARQUET_EXTENSIONS):
+                import pyarrow.parquet as pq
+                parquet_file = pq.ParquetFile(self.input_file_path)
+                chunks = (record_batch.to_pandas()
+                          for record_batch in parquet_file.iter_batches(batch_size=self.chunk_size))
+            else:
+                chunks = pd.read_csv(self.input_file_path, chunksize=self.chunk_size)
+            for chunk_df in chunks:
+                chunk_df.columns = chunk_df.columns.astype(str).str.strip()
+                yield chunk_df
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def initiate_batch_prediction(self) -> BatchPredictionArtifact:
+        """
+        Description: Function is used to score the input file with the latest model and stream the
+                     predictions into output file, memory is bounded by chunk_size. Columns other than the
+                     input columns of schema file are written unchanged so that the output can be joined back to
+                     the input, a column named as the prediction is replaced by it
+        return: is_predicted: True if whole file is scored
+                message: message after batch prediction completed
+                output_file_path: path of the output file
+                row_count: number of rows scored
+                rows_per_second: scoring throughput of the whole run
+        """
+        parquet_writer = None
+        try:
+            # model is resolved once so that the whole file is scored by the same model version
+            model = self.concrete_predictor.get_model()
+            logger.info(f"Scoring [{self.input_file_path}] with model: {model}")
+
+            os.makedirs(os.path.dirname(os.path.abspath(self.output_file_path)), exist_ok=True)
+            write_parquet = self.output_file_path.endswith(PARQUET_EXTENSIONS)
+
+            row_count = 0
+            start_time = time.perf_counter()
+            for chunk_number, chunk_df in enumerate(self.read_chunks()):
+                input_columns = [column for column in chunk_df.columns
+                                 if column in self.concrete_batch_data.input_schema]
+                passthrough_columns = [column for column in chunk_df.columns
+                                       if column not in input_columns and column != self.prediction_column_name]
+                input_df, errors = self.concrete_batch_data.validate_input_data_frame(chunk_df[input_columns])
+                if errors:
+                    raise Exception(f"Invalid rows in chunk starting at row {row_count}: {errors}")
+
+                output_df = pd.concat([chunk_df[passthrough_columns], input_df], axis=1)[
+                    [column for column in chunk_df.columns if column != self.prediction_column_name]]
+                output_df[self.prediction_column_name] = model.predict(input_df)
+
+                if write_parquet:
+                    import pyarrow as pa
+                    import pyarrow.parquet as pq
+                    table = pa.Table.from_pandas(output_df, preserve_index=False)
+                    if parquet_writer is None:
+                        parquet_writer = pq.ParquetWriter(self.output_file_path, table.schema)
+                    parquet_writer.write_table(table)
+                else:
+                    output_df.to_csv(self.output_file_path, index=False, header=chunk_number == 0,
+                                    mode="w" if chunk_number == 0 else "a")
+
+                row_count += len(output_df)
+                elapsed_time = time.perf_counter() - start_time
+                logger.info("Scored %d rows in %.1fs [%.0f rows/sec]", row_count, elapsed_time,
+                            row_count / elapsed_time)
+
+            elapsed_time = time.perf_counter() - start_time
+            batch_prediction_artifact = BatchPredictionArtifact(
+                is_predicted=True,
+                message="Batch prediction completed successfully.",
+                output_file_path=self.output_file_path,
+                row_count=row_count,
+                rows_per_second=row_count / elapsed_time if elapsed_time > 0 else None
+            )
+            logger.info(f"Batch prediction artifact: {batch_prediction_artifact}")
+            return batch_prediction_artifact
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+        finally:
+            if parquet_writer is not None:
+                parquet_writer.close()
+
+    def __del__(self):
+        logger.info(f"{'>>' * 20}Batch Prediction log completed.{'<<' * 20} \n\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a csv/parquet file of concrete mix designs in chunks.")
+    parser.add_argument("input_file_path", help="csv or parquet file with the input columns of schema file")
+    parser.add_argument("output_file_path", help="csv or parquet file to write predictions to")
+    parser.add_argument("--model-dir", default=os.path.join(ROOT_DIR, SAVED_MODELS_DIR_NAME))
+    parser.add_argument("--schema-file-path", default=SCHEMA_FILE_PATH)
+    parser.add_argument("--chunk-size", type=int, default=BATCH_PREDICTION_CHUNK_SIZE)
+    args = parser.parse_args()
+    if any(file_path.endswith(PARQUET_EXTENSIONS) for file_path in [args.input_file_path, args.output_file_path]) \
+            and importlib.util.find_spec("pyarrow") is None:
+        parser.error("parquet files need pyarrow, install it with: pip install pyarrow")
+    configure_logging()
+    # progress of the chunks on the console as well as in the log file
+    logger.addHandler(logging.StreamHandler())
+
+    batch_prediction = BatchPrediction(input_file_path=args.input_file_path,
+                                       output_file_path=args.output_file_path,
+                                       model_dir=args.model_dir,
+                                       schema_file_path=args.schema_file_path,
+                                       chunk_size=args.chunk_size)
+    batch_prediction_artifact = batch_prediction.initiate_batch_prediction()
+    print(batch_prediction_artifact)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,45 @@
 from concrete.entity.artifact_entity import DataIngestionArtifact
 from concrete.entity.config_entity import DataIngestionConfig
-from sklearn.model_selection import train_test_split
-from kaggle.api.kaggle_api_extended import KaggleApi
+from concrete.pipline.artifact_writer import ArtifactWriter, write_artifact
 from concrete.exception import ConcreteException
-from concrete.logger import logging
+from concrete.util.util import get_file_hash, save_columnar_data, load_columnar_data, is_columnar_data, \
+    get_schema_typed_data_frame, read_data_frame
+from concrete.util.profiler import profile_step
+from concrete.constant import COLUMNAR_DATA_EXTENSION
+from concrete.logger import get_logger
+import numpy as np
 import pandas as pd
+import shutil
+import json
 import sys, os
 
+logger = get_logger(__name__)
+
+SOURCE_TYPE_LOCAL = "local"
+INGESTION_MODE_INCREMENTAL = "incremental"
+TEST_SIZE = 0.2
+HASH_BUCKETS = 10000
+# hashes of the rows of all source files kept by earlier versions
+ROW_HASHES_FILE_NAME = "row_hashes.npy"
+ROW_HASHES_DIR_NAME = "row_hashes"
+
+SOURCE_FINGERPRINT_KEY = "source_fingerprint"
+FILES_KEY = "files"
+PARTITION_FILE_NAME_KEY = "partition_file_name"
+PARTITION_GENERATION_KEY = "partition_generation"
+
+
+def get_kaggle_api():
+    # kaggle reads the credentials as soon as it is imported, it is only imported when kaggle data is used
+    from kaggle.api.kaggle_api_extended import KaggleApi
+    api = KaggleApi()
+    api.authenticate()
+    return api
+
 
 class DataIngestion:
 
-    def __init__(self, data_ingestion_config: DataIngestionConfig):
+    def __init__(self, data_ingestion_config: DataIngestionConfig, artifact_writer: ArtifactWriter = None):
         """
         Description: Function is used to get ingestion config
         param data_ingestion_config:
@@ -20,17 +49,113 @@ class DataIngestion:
                 ingested_dir: name of directory where to split file
                 ingested_train_dir: name of directory to save train file
                 ingested_test_dir: name of directory to save test file
+                source_type: kaggle or local
+                local_source_dir: directory of csv files used when source type is local
+                ingestion_mode: full to split all data on every run or incremental to append new rows only
+                source_data_dir: shared directory where kaggle dataset is downloaded in incremental mode
+                partitioned_train_dir: shared train partition of incremental mode
+                partitioned_test_dir: shared test partition of incremental mode
+                state_file_path: file keeping source fingerprint and file stats between runs
+                schema_file_path: schema file whose dtypes are used to store ingested data
+                export_csv: True to also export ingested train and test file as csv
+        param artifact_writer: background writer of in-memory pipeline mode, ingested data is also handed to
+                               the next stage as dataframe, None to write files before returning
         """
         try:
-            logging.info(f"{'>>' * 20}Data Ingestion log started.{'<<' * 20} ")
+            logger.info(f"{'>>' * 20}Data Ingestion log started.{'<<' * 20} ")
             self.data_ingestion_config = data_ingestion_config
+            self.artifact_writer = artifact_writer
+            self._source_fingerprint = None
 
         except Exception as e:
             raise ConcreteException(e, sys)
 
-    def download_concrete_data(self, ) -> str:
+    def read_ingestion_state(self) -> dict:
+        """
+        Description: Function is used to read the state kept between ingestion runs
+        return: source fingerprint, stat and hash of every source file and partition details
+        """
+        try:
+            state_file_path = self.data_ingestion_config.state_file_path
+            if not os.path.exists(state_file_path):
+                return dict()
+            with open(state_file_path) as state_file:
+                return json.load(state_file)
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def write_ingestion_state(self, state: dict):
+        try:
+            state_file_path = self.data_ingestion_config.state_file_path
+            os.makedirs(os.path.dirname(state_file_path), exist_ok=True)
+            temp_file_path = f"{state_file_path}.tmp"
+            with open(temp_file_path, "w") as state_file:
+                json.dump(state, state_file, indent=4)
+            os.replace(temp_file_path, state_file_path)
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    @staticmethod
+    def get_data_file_paths(data_dir: str) -> list:
+        """
+        Description: Function is used to list the csv files of a data directory in a stable order
+        """
+        try:
+            if not os.path.isdir(data_dir):
+                return []
+            return [os.path.join(data_dir, file_name) for file_name in sorted(os.listdir(data_dir))
+                    if file_name.lower().endswith(".csv")]
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def get_source_file_state(self, file_path: str, files_state: dict) -> dict:
+        """
+        Description: Function is used to get size, mtime and sha256 of a source file, the file is only hashed
+                     when its size or mtime differ from the previous run
+        """
+        try:
+            file_stat = os.stat(file_path)
+            previous_file_state = files_state.get(os.path.basename(file_path))
+            if previous_file_state is not None and previous_file_state["size"] == file_stat.st_size \
+                    and previous_file_state["mtime_ns"] == file_stat.st_mtime_ns:
+                return previous_file_state
+            return {"size": file_stat.st_size, "mtime_ns": file_stat.st_mtime_ns, "sha256": get_file_hash(file_path)}
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def get_source_fingerprint(self):
+        """
+        Description: Function is used to fingerprint the source data without downloading or reading it
+                     kaggle: file metadata (name, size, creation date) of the dataset
+                     local: name and sha256 of every csv file, hashed only if size or mtime changed
+        return: list of file fingerprints or None if the source could not be fingerprinted
+        """
+        try:
+            if self._source_fingerprint is not None:
+                return self._source_fingerprint
+            if self.data_ingestion_config.source_type == SOURCE_TYPE_LOCAL:
+                files_state = self.read_ingestion_state().get(FILES_KEY, dict())
+                self._source_fingerprint = [
+                    [os.path.basename(file_path), self.get_source_file_state(file_path, files_state)["sha256"]]
+                    for file_path in self.get_data_file_paths(self.data_ingestion_config.local_source_dir)]
+            else:
+                username = self.data_ingestion_config.author_username
+                dataset_name = self.data_ingestion_config.kaggel_dataset_name
+
+                api = get_kaggle_api()
+                dataset_files = api.dataset_list_files(f'{username}/{dataset_name}').files
+                self._source_fingerprint = sorted([sorted([key, str(value)] for key, value in vars(dataset_file).items())
+                                                   for dataset_file in dataset_files])
+            return self._source_fingerprint
+        except Exception as e:
+            logger.info(f"Could not fingerprint source data: {e}")
+            return None
+
+    @profile_step("kaggle download")
+    def download_concrete_data(self, download_path: str = None) -> str:
         """
         Description: Function is used to download the data from kaggle website.
+        param download_path: directory to download into, raw data dir of the run if None
         return: Path of downloaded file from kaggle
         """
         try:
@@ -38,24 +163,70 @@ class DataIngestion:
             username = self.data_ingestion_config.author_username
             dataset_name = self.data_ingestion_config.kaggel_dataset_name
 
-            api = KaggleApi()
-            api.authenticate()
+            api = get_kaggle_api()
 
-            download_path = self.data_ingestion_config.raw_data_dir
+            download_path = download_path or self.data_ingestion_config.raw_data_dir
 
-            logging.info(f"Downloading file from :[https://www.kaggle.com/datasets/{username}/{dataset_name}] "
+            logger.info(f"Downloading file from :[https://www.kaggle.com/datasets/{username}/{dataset_name}] "
                          f"into :[{download_path}]")
             api.dataset_download_files(f'{username}/{dataset_name}', path=download_path, unzip=True)
 
-            logging.info(f"File :[{download_path}] has been downloaded successfully.")
+            logger.info(f"File :[{download_path}] has been downloaded successfully.")
             return download_path
 
         except Exception as e:
             raise ConcreteException(e, sys) from e
 
-    def split_data_as_train_test(self) -> DataIngestionArtifact:
+    def get_source_data_dir(self) -> str:
+        """
+        Description: Function is used to get the directory holding the source csv files
+                     local: the local source directory is used as it is
+                     kaggle full mode: dataset is downloaded into raw data dir of the run
+                     kaggle incremental mode: dataset is downloaded into the shared source data dir
+                                              only if its fingerprint changed since the previous run
+        return: directory of source csv files
+        """
+        try:
+            if self.data_ingestion_config.source_type == SOURCE_TYPE_LOCAL:
+                return self.data_ingestion_config.local_source_dir
+            if self.data_ingestion_config.ingestion_mode != INGESTION_MODE_INCREMENTAL:
+                return self.download_concrete_data()
+
+            source_data_dir = self.data_ingestion_config.source_data_dir
+            source_fingerprint = self.get_source_fingerprint()
+            previous_fingerprint = self.read_ingestion_state().get(SOURCE_FINGERPRINT_KEY)
+            if source_fingerprint is not None and source_fingerprint == previous_fingerprint \
+                    and len(self.get_data_file_paths(source_data_dir)) > 0:
+                logger.info(f"Kaggle dataset is unchanged, skipping download. Using: [{source_data_dir}]")
+                return source_data_dir
+            return self.download_concrete_data(download_path=source_data_dir)
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    @staticmethod
+    def get_ingested_file_path(ingested_dir: str, file_name: str) -> str:
+        return os.path.join(ingested_dir, f"{os.path.splitext(file_name)[0]}{COLUMNAR_DATA_EXTENSION}")
+
+    def export_data(self, dataframe: pd.DataFrame, ingested_file_path: str):
+        """
+        Description: Function is used to store ingested data once in columnar format typed as per schema file,
+                     downstream components memory map it instead of parsing csv again
+        param ingested_file_path: path of columnar data directory
+        """
+        try:
+            logger.info(f"Exporting dataset to columnar data: [{ingested_file_path}]")
+            save_columnar_data(dir_path=ingested_file_path, dataframe=dataframe)
+            if self.data_ingestion_config.export_csv:
+                csv_file_path = f"{os.path.splitext(ingested_file_path)[0]}.csv"
+                logger.info(f"Exporting dataset to file: [{csv_file_path}]")
+                dataframe.to_csv(csv_file_path, index=False)
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def split_data_as_train_test(self, raw_data_dir: str = None) -> DataIngestionArtifact:
         """
         Description: function is used to split the dataset into test and train file
+        param raw_data_dir: directory of source csv files, raw data dir of the run if None
         return:
             train_file_path: directory of train file
             test_file_path: directory of test file
@@ -63,43 +234,261 @@ class DataIngestion:
             message: message after completing
         """
         try:
-            raw_data_dir = self.data_ingestion_config.raw_data_dir
+            raw_data_dir = raw_data_dir or self.data_ingestion_config.raw_data_dir
+
+            concrete_file_paths = self.get_data_file_paths(raw_data_dir)
+            file_name = os.path.basename(concrete_file_paths[0])
+
+            logger.info(f"Reading csv files: {concrete_file_paths}")
+            concrete_data_frame = pd.concat([read_data_frame(concrete_file_path)
+                                             for concrete_file_path in concrete_file_paths], ignore_index=True)
+
+            logger.info(f"Splitting data into train and test")
+
+            concrete_data_frame = get_schema_typed_data_frame(concrete_data_frame,
+                                                              self.data_ingestion_config.schema_file_path)
+            from sklearn.model_selection import train_test_split
+            strat_train_set, strat_test_set = train_test_split(concrete_data_frame, test_size=TEST_SIZE,
+                                                               random_state=42)
+
+            train_file_path = self.get_ingested_file_path(self.data_ingestion_config.ingested_train_dir, file_name)
+            test_file_path = self.get_ingested_file_path(self.data_ingestion_config.ingested_test_dir, file_name)
+            write_artifact(self.artifact_writer, self.export_data, dataframe=strat_train_set,
+                           ingested_file_path=train_file_path)
+            write_artifact(self.artifact_writer, self.export_data, dataframe=strat_test_set,
+                           ingested_file_path=test_file_path)
+
+            data_ingestion_artifact = DataIngestionArtifact(train_file_path=train_file_path,
+                                                            test_file_path=test_file_path,
+                                                            is_ingested=True,
+                                                            message=f"Data ingestion completed successfully."
+                                                            )
+            logger.info(f"Data Ingestion artifact:[{data_ingestion_artifact}]")
+            if self.artifact_writer is not None:
+                data_ingestion_artifact = data_ingestion_artifact._replace(train_df=strat_train_set,
+                                                                           test_df=strat_test_set)
+            return data_ingestion_artifact
+
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    @staticmethod
+    def get_partition_file_path(partition_dir: str, partition_file_name: str, generation) -> str:
+        # every run adding rows writes a new generation of the partitions, it becomes current with the state file
+        if generation is None:
+            # partitions of earlier versions
+            return os.path.join(partition_dir, partition_file_name)
+        return os.path.join(partition_dir, str(generation), partition_file_name)
+
+    def get_row_hashes_file_path(self, sha256: str) -> str:
+        # hashes of the rows of a source file content, named by the sha256 of the content
+        return os.path.join(os.path.dirname(self.data_ingestion_config.state_file_path), ROW_HASHES_DIR_NAME,
+                            f"{sha256}.npy")
+
+    def save_row_hashes(self, sha256: str, row_hashes: np.ndarray):
+        row_hashes_file_path = self.get_row_hashes_file_path(sha256)
+        os.makedirs(os.path.dirname(row_hashes_file_path), exist_ok=True)
+        with open(f"{row_hashes_file_path}.tmp", "wb") as row_hashes_file:
+            np.save(row_hashes_file, row_hashes)
+        os.replace(f"{row_hashes_file_path}.tmp", row_hashes_file_path)
+
+    def get_ingested_row_hashes(self, file_state: dict) -> np.ndarray:
+        """
+        Description: Function is used to get the hashes of the rows already ingested from a source file
+        param file_state: state of the file in the previous run, None for a new file
+        """
+        try:
+            if file_state is None:
+                return np.array([], dtype=np.uint64)
+            row_hashes_file_path = self.get_row_hashes_file_path(file_state["sha256"])
+            if os.path.exists(row_hashes_file_path):
+                return np.load(row_hashes_file_path)
+            # earlier versions kept the hashes of the rows of every file in one array
+            legacy_row_hashes_file_path = os.path.join(
+                os.path.dirname(self.data_ingestion_config.partitioned_train_dir), ROW_HASHES_FILE_NAME)
+            if os.path.exists(legacy_row_hashes_file_path):
+                return np.load(legacy_row_hashes_file_path)
+            return np.array([], dtype=np.uint64)
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
 
-            file_name = os.listdir(raw_data_dir)[0]
+    @staticmethod
+    def get_new_rows(row_hashes: np.ndarray, ingested_row_hashes: np.ndarray) -> np.ndarray:
+        """
+        Description: Function is used to find the rows of a source file not ingested yet. Rows are compared as a
+                     multiset: the k-th occurrence of a row is new if fewer than k equal rows were ingested from
+                     the file, so appended rows are found and repeated observations with equal values are kept
+        return: boolean mask of the new rows
+        """
+        order = np.argsort(row_hashes, kind="stable")
+        sorted_row_hashes = row_hashes[order]
+        group_starts = np.flatnonzero(np.r_[True, sorted_row_hashes[1:] != sorted_row_hashes[:-1]])
+        group_sizes = np.diff(np.r_[group_starts, len(row_hashes)])
+        occurrences = np.empty(len(row_hashes), dtype=np.int64)
+        occurrences[order] = np.arange(len(row_hashes)) - np.repeat(group_starts, group_sizes)
 
-            concrete_file_path = os.path.join(raw_data_dir, file_name)
+        ingested_values, ingested_counts = np.unique(ingested_row_hashes, return_counts=True)
+        ingested_count = np.zeros(len(row_hashes), dtype=np.int64)
+        if len(ingested_values) > 0:
+            positions = np.minimum(np.searchsorted(ingested_values, row_hashes), len(ingested_values) - 1)
+            is_ingested_value = ingested_values[positions] == row_hashes
+            ingested_count[is_ingested_value] = ingested_counts[positions[is_ingested_value]]
+        return occurrences >= ingested_count
 
-            logging.info(f"Reading csv file: [{concrete_file_path}]")
-            concrete_data_frame = pd.read_csv(concrete_file_path)
+    @staticmethod
+    def load_partition(partition_file_path: str):
+        if is_columnar_data(partition_file_path):
+            return load_columnar_data(partition_file_path)
+        if os.path.isfile(partition_file_path):
+            # partitions written as csv by earlier versions
+            return read_data_frame(partition_file_path)
+        return None
 
-            logging.info(f"Splitting data into train and test")
+    def remove_unused_files(self, state: dict):
+        """
+        Description: Function is used to remove partition generations and row hashes the state does not refer
+                     to, left by previous runs or by a run stopped before its state was written
+        """
+        try:
+            partition_file_name = state.get(PARTITION_FILE_NAME_KEY)
+            generation = state.get(PARTITION_GENERATION_KEY)
+            for partition_dir in [self.data_ingestion_config.partitioned_train_dir,
+                                  self.data_ingestion_config.partitioned_test_dir]:
+                if not os.path.isdir(partition_dir):
+                    continue
+                for file_name in os.listdir(partition_dir):
+                    if generation is not None and file_name == str(generation):
+                        continue
+                    if generation is None and file_name == partition_file_name:
+                        continue
+                    file_path = os.path.join(partition_dir, file_name)
+                    if os.path.isdir(file_path):
+                        shutil.rmtree(file_path)
+                    else:
+                        os.remove(file_path)
 
-            strat_train_set, strat_test_set = train_test_split(concrete_data_frame, test_size=0.2, random_state=42)
+            row_hashes_dir = os.path.dirname(self.get_row_hashes_file_path(""))
+            used_file_names = {f"{file_state['sha256']}.npy" for file_state in state.get(FILES_KEY, {}).values()}
+            if os.path.isdir(row_hashes_dir):
+                for file_name in os.listdir(row_hashes_dir):
+                    if file_name not in used_file_names:
+                        os.remove(os.path.join(row_hashes_dir, file_name))
+            legacy_row_hashes_file_path = os.path.join(
+                os.path.dirname(self.data_ingestion_config.partitioned_train_dir), ROW_HASHES_FILE_NAME)
+            if os.path.exists(legacy_row_hashes_file_path):
+                os.remove(legacy_row_hashes_file_path)
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
 
-            train_file_path = os.path.join(self.data_ingestion_config.ingested_train_dir,
-                                           file_name)
+    def append_new_data_to_partitions(self, source_data_dir: str) -> DataIngestionArtifact:
+        """
+        Description: function is used to append only the rows not ingested in previous runs to the shared train
+                     and test partitions. Unchanged source files are not read at all, for a changed file the rows
+                     beyond those already ingested from it are appended (see get_new_rows). A row goes to test
+                     partition when the hash of its content falls in the first TEST_SIZE of the hash range, so
+                     the assignment of a row never changes between runs.
+                     Partitions and row hashes are written to new files and the state file, replaced last, makes
+                     them current, so a run stopped halfway leaves the previous partitions and state in use.
+                     Partitions are then copied into the ingested dirs of the run.
+        return:
+            train_file_path: directory of train file
+            test_file_path: directory of test file
+            is_ingested: True if ingested or False
+            message: message after completing
+        """
+        try:
+            state = self.read_ingestion_state()
+            files_state = state.get(FILES_KEY, dict())
+            partitioned_train_dir = self.data_ingestion_config.partitioned_train_dir
+            partitioned_test_dir = self.data_ingestion_config.partitioned_test_dir
+            partition_file_name = state.get(PARTITION_FILE_NAME_KEY)
+            generation = state.get(PARTITION_GENERATION_KEY)
+
+            new_files_state = dict()
+            new_data_frames = []
+            for concrete_file_path in self.get_data_file_paths(source_data_dir):
+                file_name = os.path.basename(concrete_file_path)
+                file_state = self.get_source_file_state(concrete_file_path, files_state)
+                new_files_state[file_name] = file_state
+                is_unchanged = files_state.get(file_name, dict()).get("sha256") == file_state["sha256"]
+                if is_unchanged and os.path.exists(self.get_row_hashes_file_path(file_state["sha256"])):
+                    logger.info("Source file is unchanged, skipping: [%s]", concrete_file_path)
+                    continue
 
-            test_file_path = os.path.join(self.data_ingestion_config.ingested_test_dir,
-                                          file_name)
+                logger.info("Reading csv file: [%s]", concrete_file_path)
+                concrete_data_frame = read_data_frame(concrete_file_path)
+                row_hashes = pd.util.hash_pandas_object(concrete_data_frame, index=False).to_numpy(dtype=np.uint64)
+                # written under the sha256 of the new content, the state still refers to the previous one
+                self.save_row_hashes(file_state["sha256"], row_hashes)
+                if is_unchanged:
+                    # ingested by an earlier version keeping the hashes of all files in one array
+                    continue
+                is_new_row = self.get_new_rows(row_hashes, self.get_ingested_row_hashes(files_state.get(file_name)))
+                logger.info("Found %s new rows out of %s rows", int(is_new_row.sum()), len(concrete_data_frame))
+                if not is_new_row.any():
+                    continue
 
-            if strat_train_set is not None:
-                os.makedirs(self.data_ingestion_config.ingested_train_dir, exist_ok=True)
-                logging.info(f"Exporting training dataset to file: [{train_file_path}]")
-                strat_train_set.to_csv(train_file_path, index=False)
+                partition_file_name = partition_file_name or \
+                    f"{os.path.splitext(file_name)[0]}{COLUMNAR_DATA_EXTENSION}"
+                new_data_frames.append((get_schema_typed_data_frame(concrete_data_frame[is_new_row].copy(),
+                                                                    self.data_ingestion_config.schema_file_path),
+                                        row_hashes[is_new_row]))
 
-            if strat_test_set is not None:
-                os.makedirs(self.data_ingestion_config.ingested_test_dir, exist_ok=True)
-                logging.info(f"Exporting testing dataset to file: [{test_file_path}]")
-                strat_test_set.to_csv(test_file_path, index=False)
+            if partition_file_name is None:
+                raise Exception(f"No data found in source directory: [{source_data_dir}]")
+
+            new_row_count = sum(len(new_data_frame) for new_data_frame, _ in new_data_frames)
+            # partitions written as csv by earlier versions are converted once
+            new_partition_file_name = f"{os.path.splitext(partition_file_name)[0]}{COLUMNAR_DATA_EXTENSION}"
+            if new_row_count > 0 or new_partition_file_name != partition_file_name:
+                new_generation = (generation or 0) + 1
+                new_data_frame = pd.concat([new_data_frame for new_data_frame, _ in new_data_frames],
+                                           ignore_index=True) if new_data_frames else None
+                new_row_hashes = np.concatenate([new_row_hashes for _, new_row_hashes in new_data_frames]) \
+                    if new_data_frames else np.array([], dtype=np.uint64)
+                is_test_row = (new_row_hashes % HASH_BUCKETS) < int(TEST_SIZE * HASH_BUCKETS)
+                for partition_dir, is_partition_row in [(partitioned_train_dir, ~is_test_row),
+                                                        (partitioned_test_dir, is_test_row)]:
+                    partition_data_frames = [self.load_partition(
+                        self.get_partition_file_path(partition_dir, partition_file_name, generation))]
+                    if new_data_frame is not None:
+                        partition_data_frames.append(new_data_frame[is_partition_row])
+                    save_columnar_data(dir_path=self.get_partition_file_path(partition_dir, new_partition_file_name,
+                                                                             new_generation),
+                                       dataframe=pd.concat([partition_data_frame for partition_data_frame
+                                                            in partition_data_frames
+                                                            if partition_data_frame is not None],
+                                                           ignore_index=True))
+                partition_file_name, generation = new_partition_file_name, new_generation
+
+            state.update({
+                SOURCE_FINGERPRINT_KEY: self.get_source_fingerprint(),
+                FILES_KEY: new_files_state,
+                PARTITION_FILE_NAME_KEY: partition_file_name,
+                PARTITION_GENERATION_KEY: generation,
+            })
+            self.write_ingestion_state(state)
+            self.remove_unused_files(state)
+
+            train_file_path = os.path.join(self.data_ingestion_config.ingested_train_dir, partition_file_name)
+            test_file_path = os.path.join(self.data_ingestion_config.ingested_test_dir, partition_file_name)
+            for partition_dir, ingested_file_path in [(partitioned_train_dir, train_file_path),
+                                                      (partitioned_test_dir, test_file_path)]:
+                logger.info("Exporting partition to columnar data: [%s]", ingested_file_path)
+                shutil.copytree(self.get_partition_file_path(partition_dir, partition_file_name, generation),
+                                ingested_file_path)
+                if self.data_ingestion_config.export_csv:
+                    load_columnar_data(ingested_file_path).to_csv(
+                        f"{os.path.splitext(ingested_file_path)[0]}.csv", index=False)
 
             data_ingestion_artifact = DataIngestionArtifact(train_file_path=train_file_path,
                                                             test_file_path=test_file_path,
                                                             is_ingested=True,
-                                                            message=f"Data ingestion completed successfully."
+                                                            message=f"Incremental data ingestion completed "
+                                                                    f"successfully, {new_row_count} new rows."
                                                             )
-            logging.info(f"Data Ingestion artifact:[{data_ingestion_artifact}]")
+            logger.info("Data Ingestion artifact:[%s]", data_ingestion_artifact)
             return data_ingestion_artifact
-
         except Exception as e:
             raise ConcreteException(e, sys) from e
 
@@ -109,10 +498,12 @@ class DataIngestion:
         return: train and test file path with message
         """
         try:
-            self.download_concrete_data()
-            return self.split_data_as_train_test()
+            source_data_dir = self.get_source_data_dir()
+            if self.data_ingestion_config.ingestion_mode == INGESTION_MODE_INCREMENTAL:
+                return self.append_new_data_to_partitions(source_data_dir=source_data_dir)
+            return self.split_data_as_train_test(raw_data_dir=source_data_dir)
         except Exception as e:
             raise ConcreteException(e, sys) from e
 
     def __del__(self):
-        logging.info(f"{'>>' * 20}Data Ingestion log completed.{'<<' * 20} \n\n")
+        logger.info(f"{'>>' * 20}Data Ingestion log completed.{'<<' * 20} \n\n")
@@ -2,19 +2,23 @@ from concrete.entity.artifact_entity import DataIngestionArtifact, DataValidatio
     DataTransformationArtifact
 from concrete.util.util import load_data, read_yaml_file, save_numpy_array_data, save_object
 from concrete.entity.config_entity import DataTransformationConfig
+from concrete.pipline.artifact_writer import ArtifactWriter, write_artifact
 from sklearn.preprocessing import StandardScaler
 from concrete.exception import ConcreteException
-from concrete.logger import logging
+from concrete.logger import get_logger
 from concrete.constant import *
 import numpy as np
 import sys, os
 
+logger = get_logger(__name__)
+
 
 class DataTransformation:
 
     def __init__(self, data_transformation_config: DataTransformationConfig,
                  data_ingestion_artifact: DataIngestionArtifact,
-                 data_validation_artifact: DataValidationArtifact
+                 data_validation_artifact: DataValidationArtifact,
+                 artifact_writer: ArtifactWriter = None
                  ):
         """
         Description: This Function is used to get the data transformation ,data ingestion and
@@ -34,12 +38,15 @@ class DataTransformation:
                                       schema_file_name: name of schema file
                                       report_file_name: name of report of data drift
                                       report_page_file_name: name of the html file of report
+        param artifact_writer: background writer of in-memory pipeline mode, arrays and preprocessing object
+                               are also handed to the trainer, None to write files before returning
         """
         try:
-            logging.info(f"{'=' * 20}Data Transformation log started.{'=' * 20} ")
+            logger.info(f"{'=' * 20}Data Transformation log started.{'=' * 20} ")
             self.data_transformation_config = data_transformation_config
             self.data_ingestion_artifact = data_ingestion_artifact
             self.data_validation_artifact = data_validation_artifact
+            self.artifact_writer = artifact_writer
 
         except Exception as e:
             raise ConcreteException(e, sys) from e
@@ -47,77 +54,100 @@ class DataTransformation:
     def initiate_data_transformation(self) -> DataTransformationArtifact:
         """
         Description: Function is used to standardize the data(train and test both) with standard scaler and
-                     saved it in array form
+                     saved input features and target in separate .npy arrays
         return: is_transformed: Ture for transform and False for not transform
                 message: message after data transform completed
-                transformed_train_file_path: Path of transformed train file
-                transformed_test_file_path: Path of transformed test file
+                transformed_train_file_path: Path of transformed train input features
+                transformed_test_file_path: Path of transformed test input features
                 preprocessed_object_file_path: Save preprocessed object for predict data
+                transformed_train_target_file_path: Path of train target
+                transformed_test_target_file_path: Path of test target
         """
         try:
-            logging.info(f"Obtaining preprocessing object.")
+            logger.info(f"Obtaining preprocessing object.")
             preprocessing_obj = StandardScaler()
 
-            logging.info(f"Obtaining training and test file path.")
+            logger.info(f"Obtaining training and test file path.")
             train_file_path = self.data_ingestion_artifact.train_file_path
             test_file_path = self.data_ingestion_artifact.test_file_path
 
             schema_file_path = self.data_validation_artifact.schema_file_path
 
-            logging.info(f"Loading training and test data as pandas dataframe.")
-            train_df = load_data(file_path=train_file_path, schema_file_path=schema_file_path)
+            logger.info(f"Loading training and test data as pandas dataframe.")
+            train_df = load_data(file_path=train_file_path, schema_file_path=schema_file_path,
+                                 dataframe=self.data_ingestion_artifact.train_df)
 
-            test_df = load_data(file_path=test_file_path, schema_file_path=schema_file_path)
+            test_df = load_data(file_path=test_file_path, schema_file_path=schema_file_path,
+                                dataframe=self.data_ingestion_artifact.test_df)
 
             schema = read_yaml_file(file_path=schema_file_path)
 
             target_column_name = schema[TARGET_COLUMNS_KEY]
 
-            logging.info(f"Splitting input and target feature from training and testing dataframe.")
+            logger.info(f"Splitting input and target feature from training and testing dataframe.")
             input_feature_train_df = train_df.drop(columns=[target_column_name], axis=1)
             target_feature_train_df = train_df[target_column_name]
 
             input_feature_test_df = test_df.drop(columns=[target_column_name], axis=1)
             target_feature_test_df = test_df[target_column_name]
 
-            logging.info(f"Applying preprocessing object on training dataframe and testing dataframe")
+            logger.info(f"Applying preprocessing object on training dataframe and testing dataframe")
             input_feature_train_arr = preprocessing_obj.fit_transform(input_feature_train_df)
             input_feature_test_arr = preprocessing_obj.transform(input_feature_test_df)
 
-            train_arr = np.c_[input_feature_train_arr, np.array(target_feature_train_df)]
-
-            test_arr = np.c_[input_feature_test_arr, np.array(target_feature_test_df)]
+            # features and target are stored as separate arrays so the trainer can memory map them without
+            # slicing copies, dtype float32 halves their size
+            dtype = np.dtype(self.data_transformation_config.dtype)
+            input_feature_train_arr = np.ascontiguousarray(input_feature_train_arr, dtype=dtype)
+            input_feature_test_arr = np.ascontiguousarray(input_feature_test_arr, dtype=dtype)
+            target_feature_train_arr = np.ascontiguousarray(target_feature_train_df, dtype=dtype)
+            target_feature_test_arr = np.ascontiguousarray(target_feature_test_df, dtype=dtype)
 
             transformed_train_dir = self.data_transformation_config.transformed_train_dir
             transformed_test_dir = self.data_transformation_config.transformed_test_dir
 
-            train_file_name = os.path.basename(train_file_path).replace(".csv", ".npz")
-            test_file_name = os.path.basename(test_file_path).replace(".csv", ".npz")
+            train_file_name = os.path.splitext(os.path.basename(train_file_path))[0]
+            test_file_name = os.path.splitext(os.path.basename(test_file_path))[0]
 
-            transformed_train_file_path = os.path.join(transformed_train_dir, train_file_name)
-            transformed_test_file_path = os.path.join(transformed_test_dir, test_file_name)
+            transformed_train_file_path = os.path.join(transformed_train_dir, f"{train_file_name}_features.npy")
+            transformed_test_file_path = os.path.join(transformed_test_dir, f"{test_file_name}_features.npy")
+            transformed_train_target_file_path = os.path.join(transformed_train_dir, f"{train_file_name}_target.npy")
+            transformed_test_target_file_path = os.path.join(transformed_test_dir, f"{test_file_name}_target.npy")
 
-            logging.info(f"Saving transformed training and testing array.")
+            logger.info(f"Saving transformed training and testing array.")
 
-            save_numpy_array_data(file_path=transformed_train_file_path, array=train_arr)
-            save_numpy_array_data(file_path=transformed_test_file_path, array=test_arr)
+            for file_path, array in [(transformed_train_file_path, input_feature_train_arr),
+                                     (transformed_test_file_path, input_feature_test_arr),
+                                     (transformed_train_target_file_path, target_feature_train_arr),
+                                     (transformed_test_target_file_path, target_feature_test_arr)]:
+                write_artifact(self.artifact_writer, save_numpy_array_data, file_path=file_path, array=array)
 
             preprocessing_obj_file_path = self.data_transformation_config.preprocessed_object_file_path
 
-            logging.info(f"Saving preprocessing object.")
-            save_object(file_path=preprocessing_obj_file_path, obj=preprocessing_obj)
+            logger.info(f"Saving preprocessing object.")
+            write_artifact(self.artifact_writer, save_object, file_path=preprocessing_obj_file_path,
+                           obj=preprocessing_obj)
 
             data_transformation_artifact = DataTransformationArtifact(is_transformed=True,
                                                                       message="Data transformation successfully.",
                                                                       transformed_train_file_path=transformed_train_file_path,
                                                                       transformed_test_file_path=transformed_test_file_path,
-                                                                      preprocessed_object_file_path=preprocessing_obj_file_path
-
+                                                                      preprocessed_object_file_path=preprocessing_obj_file_path,
+                                                                      transformed_train_target_file_path=transformed_train_target_file_path,
+                                                                      transformed_test_target_file_path=transformed_test_target_file_path
                                                                       )
-            logging.info(f"Data transformation artifact: {data_transformation_artifact}")
+            logger.info(f"Data transformation artifact: {data_transformation_artifact}")
+            if self.artifact_writer is not None:
+                data_transformation_artifact = data_transformation_artifact._replace(
+                    train_input_feature=input_feature_train_arr,
+                    train_target_feature=target_feature_train_arr,
+                    test_input_feature=input_feature_test_arr,
+                    test_target_feature=target_feature_test_arr,
+                    preprocessing_object=preprocessing_obj
+                )
             return data_transformation_artifact
         except Exception as e:
             raise ConcreteException(e, sys) from e
 
     def __del__(self):
-        logging.info(f"{'=' * 20}Data Transformation log completed.{'=' * 20} \n\n")
+        logger.info(f"{'=' * 20}Data Transformation log completed.{'=' * 20} \n\n")
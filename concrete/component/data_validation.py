@@ -1,16 +1,13 @@
 from concrete.entity.artifact_entity import DataValidationArtifact, DataIngestionArtifact
 from concrete.entity.config_entity import DataValidationConfig
 from concrete.exception import ConcreteException
-from concrete.util.util import read_yaml_file
-from concrete.logger import logging
-from evidently.model_profile import Profile
-from evidently.model_profile.sections import DataDriftProfileSection
-from evidently.dashboard import Dashboard
-from evidently.dashboard.tabs import DataDriftTab
+from concrete.util.util import read_yaml_file, read_data_frame
+from concrete.logger import get_logger
 import json
-import pandas as pd
 import os, sys
 
+logger = get_logger(__name__)
+
 
 class DataValidation:
 
@@ -34,34 +31,43 @@ class DataValidation:
 
         """
         try:
-            logging.info(f"{'>>' * 20}Data Validation log started.{'<<' * 20} ")
+            logger.info(f"{'>>' * 20}Data Validation log started.{'<<' * 20} ")
             self.data_validation_config = data_validation_config
             self.data_ingestion_artifact = data_ingestion_artifact
+            # dataframes handed over by ingestion in in-memory pipeline mode
+            self.train_df = data_ingestion_artifact.train_df
+            self.test_df = data_ingestion_artifact.test_df
         except Exception as e:
             raise ConcreteException(e, sys) from e
 
     def get_train_and_test_df(self):
         """
-        Description: Function is used to read the train file and test file and convert it into dataframe
+        Description: Function is used to read the train and test data (columnar or csv) into dataframe
         return: train and test dataframe
         """
         try:
-            train_df = pd.read_csv(self.data_ingestion_artifact.train_file_path)
-            test_df = pd.read_csv(self.data_ingestion_artifact.test_file_path)
-            return train_df, test_df
+            # train and test data are read once and shared by schema check and both drift reports
+            if self.train_df is None:
+                self.train_df = read_data_frame(self.data_ingestion_artifact.train_file_path)
+                self.test_df = read_data_frame(self.data_ingestion_artifact.test_file_path)
+            return self.train_df, self.test_df
         except Exception as e:
             raise ConcreteException(e, sys) from e
 
     def is_train_test_file_exists(self) -> bool:
         try:
-            logging.info("Checking if training and test file is available")
+            if self.train_df is not None and self.test_df is not None:
+                logger.info("Training and test data are handed over in memory, files are written in background")
+                return True
+
+            logger.info("Checking if training and test file is available")
 
             is_train_file_exist = os.path.exists(self.data_ingestion_artifact.train_file_path)
             is_test_file_exist = os.path.exists(self.data_ingestion_artifact.test_file_path)
 
             is_available = is_train_file_exist and is_test_file_exist
 
-            logging.info(f"Is train and test file exists?-> {is_available}")
+            logger.info(f"Is train and test file exists?-> {is_available}")
 
             if not is_available:
                 training_file = self.data_ingestion_artifact.train_file_path
@@ -90,7 +96,7 @@ class DataValidation:
             # Checking train file
             train_checked: bool = True
 
-            logging.info("Validating Train file  with Schema file,"
+            logger.info("Validating Train file  with Schema file,"
                          f"Train file path {self.data_ingestion_artifact.train_file_path}"
                          f"Schema file path {self.data_validation_config.schema_file_path}")
 
@@ -98,25 +104,25 @@ class DataValidation:
             len_col_train = len(train_df.columns)
             if len_col != len_col_train:
                 train_checked: bool = False
-                logging.info("length of columns of Train file is not equal to length of columns in schema config"
+                logger.info("length of columns of Train file is not equal to length of columns in schema config"
                              f"length of columns in train file is {len_col_train}, required length is {len_col}")
 
             # Check column names in train file
             col_names = list(train_df.columns.str.rstrip()[:-1])
             if names_of_columns != col_names:
                 train_checked: bool = False
-                logging.info("columns name not matching with schema config in train file")
+                logger.info("columns name not matching with schema config in train file")
 
             # Check target column in train file
             target_column_name = train_df.columns[-1]
             if target_column != target_column_name:
                 train_checked: bool = False
-                logging.info("train file target column does not match with schema file")
+                logger.info("train file target column does not match with schema file")
 
             # test file
             test_checked: bool = True
 
-            logging.info("Validating Test file  with Schema file"
+            logger.info("Validating Test file  with Schema file"
                          f"Test file path {self.data_ingestion_artifact.test_file_path}"
                          f"Schema file path {self.data_validation_config.schema_file_path}")
 
@@ -124,20 +130,20 @@ class DataValidation:
             len_col_test = len(test_df.columns)
             if len_col != len_col_test:
                 test_checked: bool = False
-                logging.info("length of columns of Test file is not equal to length of columns in schema config"
+                logger.info("length of columns of Test file is not equal to length of columns in schema config"
                              f"length of columns in test file is {len_col_test}, required length is {len_col}")
 
             # Check column names in test file
             col_names = list(test_df.columns.str.rstrip()[:-1])
             if names_of_columns != col_names:
                 test_checked: bool = False
-                logging.info("columns name not matching with schema config in test file")
+                logger.info("columns name not matching with schema config in test file")
 
             # Check target column in test file
             target_column_name = test_df.columns[-1]
             if target_column != target_column_name:
                 test_checked: bool = False
-                logging.info("test file target column does not match with schema file")
+                logger.info("test file target column does not match with schema file")
 
             validation_status = train_checked and test_checked
 
@@ -151,6 +157,9 @@ class DataValidation:
         return: It returns the report of data drift in json file
         """
         try:
+            # evidently is imported by the validation stage only, serving does not need it installed
+            from evidently.model_profile import Profile
+            from evidently.model_profile.sections import DataDriftProfileSection
             profile = Profile(sections=[DataDriftProfileSection()])
 
             train_df, test_df = self.get_train_and_test_df()
@@ -175,6 +184,8 @@ class DataValidation:
         return: It returns the report in html format to view it
         """
         try:
+            from evidently.dashboard import Dashboard
+            from evidently.dashboard.tabs import DataDriftTab
             dashboard = Dashboard(tabs=[DataDriftTab()])
             train_df, test_df = self.get_train_and_test_df()
             dashboard.calculate(train_df, test_df)
@@ -219,10 +230,10 @@ class DataValidation:
                 is_validated=True,
                 message="Data Validation performed successfully."
             )
-            logging.info(f"Data validation artifact: {data_validation_artifact}")
+            logger.info(f"Data validation artifact: {data_validation_artifact}")
             return data_validation_artifact
         except Exception as e:
             raise ConcreteException(e, sys) from e
 
     def __del__(self):
-        logging.info(f"{'>>' * 20}Data Validation log completed.{'<<' * 20} \n\n")
+        logger.info(f"{'>>' * 20}Data Validation log completed.{'<<' * 20} \n\n")
@@ -1,4 +1,4 @@
-from concrete.logger import logging
+from concrete.logger import get_logger
 from concrete.exception import ConcreteException
 from concrete.entity.config_entity import ModelEvaluationConfig
 from concrete.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact, ModelTrainerArtifact, \
@@ -10,6 +10,8 @@ import sys
 from concrete.util.util import write_yaml_file, read_yaml_file, load_object, load_data
 from concrete.entity.model_factory import evaluate_regression_model
 
+logger = get_logger(__name__)
+
 
 class ModelEvaluation:
 
@@ -41,7 +43,7 @@ class ModelEvaluation:
                                       model_accuracy: accuracy of model
         """
         try:
-            logging.info(f"{'>>' * 30}Model Evaluation log started.{'<<' * 30} ")
+            logger.info(f"{'>>' * 30}Model Evaluation log started.{'<<' * 30} ")
             self.model_evaluation_config = model_evaluation_config
             self.model_trainer_artifact = model_trainer_artifact
             self.data_ingestion_artifact = data_ingestion_artifact
@@ -49,6 +51,22 @@ class ModelEvaluation:
         except Exception as e:
             raise ConcreteException(e, sys) from e
 
+    def get_best_model_path(self):
+        """
+        Description: Function is used to get path of best model from model evaluation file
+        return: path of best model or None if there is no best model yet
+        """
+        try:
+            model_evaluation_file_path = self.model_evaluation_config.model_evaluation_file_path
+            if not os.path.exists(model_evaluation_file_path):
+                return None
+            model_eval_file_content = read_yaml_file(file_path=model_evaluation_file_path) or dict()
+            if BEST_MODEL_KEY not in model_eval_file_content:
+                return None
+            return model_eval_file_content[BEST_MODEL_KEY][MODEL_PATH_KEY]
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
     def get_best_model(self):
         """
         Description: Function is used to get best model from model file
@@ -90,7 +108,7 @@ class ModelEvaluation:
             if BEST_MODEL_KEY in model_eval_content:
                 previous_best_model = model_eval_content[BEST_MODEL_KEY]
 
-            logging.info(f"Previous eval result: {model_eval_content}")
+            logger.info(f"Previous eval result: {model_eval_content}")
             eval_result = {
                 BEST_MODEL_KEY: {
                     MODEL_PATH_KEY: model_evaluation_artifact.evaluated_model_path,
@@ -106,7 +124,7 @@ class ModelEvaluation:
                     model_eval_content[HISTORY_KEY].update(model_history)
 
             model_eval_content.update(eval_result)
-            logging.info(f"Updated eval result:{model_eval_content}")
+            logger.info(f"Updated eval result:{model_eval_content}")
             write_yaml_file(file_path=eval_file_path, data=model_eval_content)
 
         except Exception as e:
@@ -115,7 +133,14 @@ class ModelEvaluation:
     def initiate_model_evaluation(self) -> ModelEvaluationArtifact:
         try:
             trained_model_file_path = self.model_trainer_artifact.trained_model_file_path
-            trained_model_object = load_object(file_path=trained_model_file_path)
+            if self.get_best_model_path() == trained_model_file_path:
+                # trained model was reused from stage cache and has already been accepted
+                logger.info("Trained model is already the best model hence not evaluating it again")
+                return ModelEvaluationArtifact(evaluated_model_path=trained_model_file_path,
+                                               is_model_accepted=False)
+            trained_model_object = self.model_trainer_artifact.trained_model_object
+            if trained_model_object is None:
+                trained_model_object = load_object(file_path=trained_model_file_path)
 
             train_file_path = self.data_ingestion_artifact.train_file_path
             test_file_path = self.data_ingestion_artifact.test_file_path
@@ -124,33 +149,35 @@ class ModelEvaluation:
 
             train_dataframe = load_data(file_path=train_file_path,
                                         schema_file_path=schema_file_path,
+                                        dataframe=self.data_ingestion_artifact.train_df
                                         )
             test_dataframe = load_data(file_path=test_file_path,
                                        schema_file_path=schema_file_path,
+                                       dataframe=self.data_ingestion_artifact.test_df
                                        )
             schema_content = read_yaml_file(file_path=schema_file_path)
             target_column_name = schema_content[TARGET_COLUMNS_KEY]
 
             # target_column
-            logging.info(f"Converting target column into numpy array.")
+            logger.info(f"Converting target column into numpy array.")
             train_target_arr = np.array(train_dataframe[target_column_name])
             test_target_arr = np.array(test_dataframe[target_column_name])
-            logging.info(f"Conversion completed target column into numpy array.")
+            logger.info(f"Conversion completed target column into numpy array.")
 
             # dropping target column from the dataframe
-            logging.info(f"Dropping target column from the dataframe.")
+            logger.info(f"Dropping target column from the dataframe.")
             train_dataframe.drop(target_column_name, axis=1, inplace=True)
             test_dataframe.drop(target_column_name, axis=1, inplace=True)
-            logging.info(f"Dropping target column from the dataframe completed.")
+            logger.info(f"Dropping target column from the dataframe completed.")
 
             model = self.get_best_model()
 
             if model is None:
-                logging.info("Not found any existing model. Hence accepting trained model")
+                logger.info("Not found any existing model. Hence accepting trained model")
                 model_evaluation_artifact = ModelEvaluationArtifact(evaluated_model_path=trained_model_file_path,
                                                                     is_model_accepted=True)
                 self.update_evaluation_report(model_evaluation_artifact)
-                logging.info(f"Model accepted. Model eval artifact {model_evaluation_artifact} created")
+                logger.info(f"Model accepted. Model eval artifact {model_evaluation_artifact} created")
                 return model_evaluation_artifact
 
             model_list = [model, trained_model_object]
@@ -162,23 +189,23 @@ class ModelEvaluation:
                                                              y_test=test_target_arr,
                                                              base_accuracy=self.model_trainer_artifact.model_accuracy,
                                                              )
-            logging.info(f"Model evaluation completed. model metric artifact: {metric_info_artifact}")
+            logger.info(f"Model evaluation completed. model metric artifact: {metric_info_artifact}")
 
             if metric_info_artifact is None:
                 response = ModelEvaluationArtifact(is_model_accepted=False,
                                                    evaluated_model_path=trained_model_file_path
                                                    )
-                logging.info(response)
+                logger.info(response)
                 return response
 
             if metric_info_artifact.index_number == 1:
                 model_evaluation_artifact = ModelEvaluationArtifact(evaluated_model_path=trained_model_file_path,
                                                                     is_model_accepted=True)
                 self.update_evaluation_report(model_evaluation_artifact)
-                logging.info(f"Model accepted. Model eval artifact {model_evaluation_artifact} created")
+                logger.info(f"Model accepted. Model eval artifact {model_evaluation_artifact} created")
 
             else:
-                logging.info("Trained model is no better than existing model hence not accepting trained model")
+                logger.info("Trained model is no better than existing model hence not accepting trained model")
                 model_evaluation_artifact = ModelEvaluationArtifact(evaluated_model_path=trained_model_file_path,
                                                                     is_model_accepted=False)
             return model_evaluation_artifact
@@ -186,4 +213,4 @@ class ModelEvaluation:
             raise ConcreteException(e, sys) from e
 
     def __del__(self):
-        logging.info(f"{'=' * 20}Model Evaluation log completed.{'=' * 20} ")
+        logger.info(f"{'=' * 20}Model Evaluation log completed.{'=' * 20} ")
@@ -1,52 +1,112 @@
-from concrete.logger import logging
+from concrete.logger import get_logger
 from concrete.exception import ConcreteException
-from concrete.entity.artifact_entity import ModelPusherArtifact, ModelEvaluationArtifact 
+from concrete.entity.artifact_entity import ModelPusherArtifact, ModelEvaluationArtifact, ModelTrainerArtifact
 from concrete.entity.config_entity import ModelPusherConfig
+from concrete.entity.compiled_model import compile_model, check_compiled_model, save_compiled_model, \
+    load_compiled_model
+from concrete.entity.model_registry import ModelRegistry, write_manifest
+from concrete.constant import COMPILED_MODEL_FILE_NAME
+from concrete.util.util import load_object
 import os, sys
 import shutil
 
+logger = get_logger(__name__)
+
 
 class ModelPusher:
 
     def __init__(self, model_pusher_config: ModelPusherConfig,
-                 model_evaluation_artifact: ModelEvaluationArtifact
+                 model_evaluation_artifact: ModelEvaluationArtifact,
+                 model_trainer_artifact: ModelTrainerArtifact = None
                  ):
         """
         Description: Function is used for getting model pusher config and model evaluation path
         param model_pusher_config: export_dir_path: path of model where it is export
         param model_evaluation_artifact: is_model_accepted : True is model accepted or False if not
                                          evaluated_model_path: path of the model
+        param model_trainer_artifact: metrics of the trained model recorded in the model version manifest
         """
         try:
-            logging.info(f"{'>>' * 30}Model Pusher log started.{'<<' * 30} ")
+            logger.info(f"{'>>' * 30}Model Pusher log started.{'<<' * 30} ")
             self.model_pusher_config = model_pusher_config
             self.model_evaluation_artifact = model_evaluation_artifact
+            self.model_trainer_artifact = model_trainer_artifact
+
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
 
+    @staticmethod
+    def export_compiled_model(model_file_path: str, compiled_model_file_path: str) -> bool:
+        """
+        Description: Function is used to compile the scaler and regressor of the model into a lean inference
+                     object saved as memory mappable arrays, it is kept only if the saved copy predicts the same
+                     values as the model
+        return: True if the compiled model is saved, False if the model can not be compiled or its saved copy
+                predicts other values, the model is then served from its pickle
+        """
+        try:
+            model = load_object(file_path=model_file_path)
+            compiled_model = compile_model(model)
+            if compiled_model is None:
+                return False
+            save_compiled_model(compiled_model, dir_path=compiled_model_file_path)
+            try:
+                check_compiled_model(load_compiled_model(compiled_model_file_path), model)
+            except ConcreteException as e:
+                # the compiled model is an optional fast path, the accepted model is still pushed
+                logger.warning("Compiled model is not exported, it differs from the model: %s", e)
+                shutil.rmtree(compiled_model_file_path, ignore_errors=True)
+                return False
+            logger.info(f"Compiled model {compiled_model} is saved: [{compiled_model_file_path}]")
+            return True
         except Exception as e:
             raise ConcreteException(e, sys) from e
 
+    def get_metrics(self) -> dict:
+        if self.model_trainer_artifact is None:
+            return {}
+        return {metric_name: getattr(self.model_trainer_artifact, metric_name)
+                for metric_name in ["train_rmse", "test_rmse", "train_accuracy", "test_accuracy", "model_accuracy"]}
+
     def export_model(self) -> ModelPusherArtifact:
         """
-        Description: Function is used to export the model to new directory
+        Description: Function is used to export the model and its compiled version to new directory and make it
+                     the current version of the model registry, files are written to a hidden staging directory
+                     renamed at the end so the serving side never sees a partial export
         return: Export directory
         """
         try:
             evaluated_model_file_path = self.model_evaluation_artifact.evaluated_model_path
             export_dir = self.model_pusher_config.export_dir_path
+            staging_dir = os.path.join(os.path.dirname(export_dir), f".{os.path.basename(export_dir)}.tmp")
             model_file_name = os.path.basename(evaluated_model_file_path)
             export_model_file_path = os.path.join(export_dir, model_file_name)
-            logging.info(f"Exporting model file: [{export_model_file_path}]")
-            os.makedirs(export_dir, exist_ok=True)
+            logger.info(f"Exporting model file: [{export_model_file_path}]")
+            os.makedirs(staging_dir, exist_ok=True)
 
-            shutil.copy(src=evaluated_model_file_path, dst=export_model_file_path)
+            shutil.copy(src=evaluated_model_file_path, dst=os.path.join(staging_dir, model_file_name))
+            compiled_model_file_path = None
+            if self.model_pusher_config.compile_model and self.export_compiled_model(
+                    model_file_path=evaluated_model_file_path,
+                    compiled_model_file_path=os.path.join(staging_dir, COMPILED_MODEL_FILE_NAME)):
+                compiled_model_file_path = os.path.join(export_dir, COMPILED_MODEL_FILE_NAME)
+            model_version = os.path.basename(export_dir)
+            write_manifest(version_dir=staging_dir, version=model_version,
+                           model_file_name=COMPILED_MODEL_FILE_NAME if compiled_model_file_path else model_file_name,
+                           metrics=self.get_metrics())
+            os.replace(staging_dir, export_dir)
+            is_current_model = ModelRegistry(model_dir=os.path.dirname(export_dir)).promote(model_version)
             # we can call a function to save model to Azure blob storage/ google cloud storage / s3 bucket
-            logging.info(
+            logger.info(
                 f"Trained model: {evaluated_model_file_path} is copied in export dir:[{export_model_file_path}]")
 
             model_pusher_artifact = ModelPusherArtifact(is_model_pusher=True,
-                                                        export_model_file_path=export_model_file_path
+                                                        export_model_file_path=export_model_file_path,
+                                                        compiled_model_file_path=compiled_model_file_path,
+                                                        model_version=model_version,
+                                                        is_current_model=is_current_model
                                                         )
-            logging.info(f"Model pusher artifact: [{model_pusher_artifact}]")
+            logger.info(f"Model pusher artifact: [{model_pusher_artifact}]")
             return model_pusher_artifact
         except Exception as e:
             raise ConcreteException(e, sys) from e
@@ -58,4 +118,4 @@ class ModelPusher:
             raise ConcreteException(e, sys) from e
 
     def __del__(self):
-        logging.info(f"{'>>' * 20}Model Pusher log completed.{'<<' * 20} ")
+        logger.info(f"{'>>' * 20}Model Pusher log completed.{'<<' * 20} ")
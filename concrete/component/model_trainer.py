@@ -1,13 +1,16 @@
 from concrete.exception import ConcreteException
 import sys
-from concrete.logger import logging
+from concrete.logger import get_logger
 from typing import List
 from concrete.entity.artifact_entity import DataTransformationArtifact, ModelTrainerArtifact
 from concrete.entity.config_entity import ModelTrainerConfig
+from concrete.pipline.artifact_writer import ArtifactWriter, write_artifact
 from concrete.util.util import load_numpy_array_data, save_object, load_object
 from concrete.entity.model_factory import MetricInfoArtifact, ModelFactory, GridSearchedBestModel
 from concrete.entity.model_factory import evaluate_regression_model
 
+logger = get_logger(__name__)
+
 
 class ConcreteEstimatorModel:
     def __init__(self, preprocessing_object, trained_model_object):
@@ -38,7 +41,8 @@ class ConcreteEstimatorModel:
 class ModelTrainer:
 
     def __init__(self, model_trainer_config: ModelTrainerConfig,
-                 data_transformation_artifact: DataTransformationArtifact):
+                 data_transformation_artifact: DataTransformationArtifact,
+                 artifact_writer: ArtifactWriter = None):
         """
 
         param model_trainer_config: trained_model_file_path: Path of trained model
@@ -47,14 +51,17 @@ class ModelTrainer:
                                     model_config_file_path: Path to model config
         param data_transformation_artifact: is_transformed: Ture for transform and False for not transform
                                              message: message after data transform completed
-                                             transformed_train_file_path: Path of transformed train file
-                                             transformed_test_file_path: Path of transformed test file
+                                             transformed_train_file_path: Path of transformed train input features
+                                             transformed_test_file_path: Path of transformed test input features
                                              preprocessed_object_file_path: Save preprocessed object for predict data
+        param artifact_writer: background writer of in-memory pipeline mode, trained model is also handed to
+                               model evaluation, None to write the model before returning
         """
         try:
-            logging.info(f"{'>>' * 30}Model trainer log started.{'<<' * 30} ")
+            logger.info(f"{'>>' * 30}Model trainer log started.{'<<' * 30} ")
             self.model_trainer_config = model_trainer_config
             self.data_transformation_artifact = data_transformation_artifact
+            self.artifact_writer = artifact_writer
         except Exception as e:
             raise ConcreteException(e, sys) from e
 
@@ -73,51 +80,62 @@ class ModelTrainer:
                 model_accuracy: accuracy of model
         """
         try:
-            logging.info(f"Loading transformed training dataset")
-            transformed_train_file_path = self.data_transformation_artifact.transformed_train_file_path
-            train_array = load_numpy_array_data(file_path=transformed_train_file_path)
-
-            logging.info(f"Loading transformed testing dataset")
-            transformed_test_file_path = self.data_transformation_artifact.transformed_test_file_path
-            test_array = load_numpy_array_data(file_path=transformed_test_file_path)
-
-            logging.info(f"Splitting training and testing input and target feature")
-            x_train, y_train, x_test, y_test = train_array[:, :-1], train_array[:, -1], test_array[:, :-1], test_array[
-                                                                                                            :, -1]
-
-            logging.info(f"Extracting model config file path")
+            data_transformation_artifact = self.data_transformation_artifact
+            if data_transformation_artifact.train_input_feature is not None:
+                logger.info(f"Using transformed training and testing dataset handed over in memory")
+                x_train, y_train = data_transformation_artifact.train_input_feature, \
+                    data_transformation_artifact.train_target_feature
+                x_test, y_test = data_transformation_artifact.test_input_feature, \
+                    data_transformation_artifact.test_target_feature
+            else:
+                # arrays are memory mapped so that search workers share one page cache copy
+                logger.info(f"Loading transformed training dataset")
+                x_train = load_numpy_array_data(file_path=data_transformation_artifact.transformed_train_file_path,
+                                                mmap_mode="r")
+                y_train = load_numpy_array_data(
+                    file_path=data_transformation_artifact.transformed_train_target_file_path, mmap_mode="r")
+
+                logger.info(f"Loading transformed testing dataset")
+                x_test = load_numpy_array_data(file_path=data_transformation_artifact.transformed_test_file_path,
+                                               mmap_mode="r")
+                y_test = load_numpy_array_data(
+                    file_path=data_transformation_artifact.transformed_test_target_file_path, mmap_mode="r")
+
+            logger.info(f"Extracting model config file path")
             model_config_file_path = self.model_trainer_config.model_config_file_path
 
-            logging.info(f"Initializing model factory class using above model config file: {model_config_file_path}")
+            logger.info(f"Initializing model factory class using above model config file: {model_config_file_path}")
             model_factory = ModelFactory(model_config_path=model_config_file_path)
 
             base_accuracy = self.model_trainer_config.base_accuracy
-            logging.info(f"Expected accuracy: {base_accuracy}")
+            logger.info(f"Expected accuracy: {base_accuracy}")
 
-            logging.info(f"Initiating operation model selection")
+            logger.info(f"Initiating operation model selection")
             best_model = model_factory.get_best_model(X=x_train, y=y_train, base_accuracy=base_accuracy)
 
-            logging.info(f"Best model found on training dataset: {best_model}")
+            logger.info(f"Best model found on training dataset: {best_model}")
 
-            logging.info(f"Extracting trained model list.")
+            logger.info(f"Extracting trained model list.")
             grid_searched_best_model_list: List[GridSearchedBestModel] = model_factory.grid_searched_best_model_list
 
             model_list = [model.best_model for model in grid_searched_best_model_list]
-            logging.info(f"Evaluation all trained model on training and testing dataset both")
+            logger.info(f"Evaluation all trained model on training and testing dataset both")
             metric_info: MetricInfoArtifact = evaluate_regression_model(model_list=model_list, X_train=x_train,
                                                                         y_train=y_train, X_test=x_test, y_test=y_test,
                                                                         base_accuracy=base_accuracy)
 
-            logging.info(f"Best found model on both training and testing dataset.")
+            logger.info(f"Best found model on both training and testing dataset.")
 
-            preprocessing_obj = load_object(file_path=self.data_transformation_artifact.preprocessed_object_file_path)
+            preprocessing_obj = data_transformation_artifact.preprocessing_object
+            if preprocessing_obj is None:
+                preprocessing_obj = load_object(file_path=data_transformation_artifact.preprocessed_object_file_path)
             model_object = metric_info.model_object
 
             trained_model_file_path = self.model_trainer_config.trained_model_file_path
             concrete_model = ConcreteEstimatorModel(preprocessing_object=preprocessing_obj,
                                                     trained_model_object=model_object)
-            logging.info(f"Saving model at path: {trained_model_file_path}")
-            save_object(file_path=trained_model_file_path, obj=concrete_model)
+            logger.info(f"Saving model at path: {trained_model_file_path}")
+            write_artifact(self.artifact_writer, save_object, file_path=trained_model_file_path, obj=concrete_model)
 
             model_trainer_artifact = ModelTrainerArtifact(is_trained=True, message="Model Trained successfully",
                                                           trained_model_file_path=trained_model_file_path,
@@ -129,10 +147,12 @@ class ModelTrainer:
 
                                                           )
 
-            logging.info(f"Model Trainer Artifact: {model_trainer_artifact}")
+            logger.info(f"Model Trainer Artifact: {model_trainer_artifact}")
+            if self.artifact_writer is not None:
+                model_trainer_artifact = model_trainer_artifact._replace(trained_model_object=concrete_model)
             return model_trainer_artifact
         except Exception as e:
             raise ConcreteException(e, sys) from e
 
     def __del__(self):
-        logging.info(f"{'>>' * 30}Model trainer log completed.{'<<' * 30} ")
+        logger.info(f"{'>>' * 30}Model trainer log completed.{'<<' * 30} ")
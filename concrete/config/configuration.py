@@ -1,11 +1,13 @@
 from concrete.entity.config_entity import DataIngestionConfig, TrainingPipelineConfig, DataValidationConfig, \
-    DataTransformationConfig, ModelTrainerConfig, ModelEvaluationConfig, ModelPusherConfig
+    DataTransformationConfig, ModelTrainerConfig, ModelEvaluationConfig, ModelPusherConfig, ServingConfig
 from concrete.util.util import read_yaml_file
-from concrete.logger import logging
+from concrete.logger import get_logger
 from concrete.constant import *
 from concrete.exception import ConcreteException
 import sys
 
+logger = get_logger(__name__)
+
 
 class Configuration:
 
@@ -14,6 +16,7 @@ class Configuration:
                  current_time_stamp: str = CURRENT_TIME_STAMP
                  ) -> None:
         try:
+            self.config_file_path = config_file_path
             self.config_info = read_yaml_file(file_path=config_file_path)
             self.training_pipeline_config = self.get_training_pipeline_config()
             self.time_stamp = current_time_stamp
@@ -50,14 +53,44 @@ class Configuration:
                 data_ingestion_info[DATA_INGESTION_TEST_DIR_KEY]
             )
 
+            # source data, partitions and state are shared by every run for incremental ingestion
+            data_ingestion_shared_dir = os.path.join(artifact_dir, DATA_INGESTION_ARTIFACT_DIR)
+            source_data_dir = os.path.join(data_ingestion_shared_dir,
+                                           data_ingestion_info.get(DATA_INGESTION_SOURCE_DATA_DIR_KEY, "source_data"))
+            partitioned_dir = os.path.join(data_ingestion_shared_dir,
+                                           data_ingestion_info.get(DATA_INGESTION_PARTITIONED_DIR_KEY,
+                                                                   "partitioned_data"))
+            partitioned_train_dir = os.path.join(partitioned_dir, data_ingestion_info[DATA_INGESTION_TRAIN_DIR_KEY])
+            partitioned_test_dir = os.path.join(partitioned_dir, data_ingestion_info[DATA_INGESTION_TEST_DIR_KEY])
+            state_file_path = os.path.join(data_ingestion_shared_dir, DATA_INGESTION_STATE_FILE_NAME)
+
+            local_source_dir = os.path.join(ROOT_DIR,
+                                            data_ingestion_info.get(DATA_INGESTION_LOCAL_SOURCE_DIR_KEY, "data"))
+
+            # ingested data is stored with the dtypes of schema file
+            data_validation_info = self.config_info[DATA_VALIDATION_CONFIG_KEY]
+            schema_file_path = os.path.join(ROOT_DIR,
+                                            data_validation_info[DATA_VALIDATION_SCHEMA_DIR_KEY],
+                                            data_validation_info[DATA_VALIDATION_SCHEMA_FILE_NAME_KEY]
+                                            )
+
             data_ingestion_config = DataIngestionConfig(
                 author_username=username,
                 kaggel_dataset_name=dataset_name,
                 raw_data_dir=raw_data_dir,
                 ingested_train_dir=ingested_train_dir,
-                ingested_test_dir=ingested_test_dir
+                ingested_test_dir=ingested_test_dir,
+                source_type=data_ingestion_info.get(DATA_INGESTION_SOURCE_TYPE_KEY, "kaggle"),
+                local_source_dir=local_source_dir,
+                ingestion_mode=data_ingestion_info.get(DATA_INGESTION_MODE_KEY, "full"),
+                source_data_dir=source_data_dir,
+                partitioned_train_dir=partitioned_train_dir,
+                partitioned_test_dir=partitioned_test_dir,
+                state_file_path=state_file_path,
+                schema_file_path=schema_file_path,
+                export_csv=data_ingestion_info.get(DATA_INGESTION_EXPORT_CSV_KEY, False)
             )
-            logging.info(f"Data Ingestion config: {data_ingestion_config}")
+            logger.info(f"Data Ingestion config: {data_ingestion_config}")
             return data_ingestion_config
         except Exception as e:
             raise ConcreteException(e, sys) from e
@@ -70,8 +103,19 @@ class Configuration:
                                         training_pipeline_config[TRAINING_PIPELINE_ARTIFACT_DIR_KEY]
                                         )
 
-            training_pipeline_config = TrainingPipelineConfig(artifact_dir=artifact_dir)
-            logging.info(f"Training pipeline config: {training_pipeline_config}")
+            stage_cache_dir = None
+            if training_pipeline_config.get(TRAINING_PIPELINE_STAGE_CACHE_KEY, False):
+                stage_cache_dir = os.path.join(artifact_dir, STAGE_CACHE_DIR_NAME)
+
+            training_pipeline_config = TrainingPipelineConfig(
+                artifact_dir=artifact_dir,
+                stage_cache_dir=stage_cache_dir,
+                in_memory=training_pipeline_config.get(TRAINING_PIPELINE_IN_MEMORY_KEY, False),
+                training_queue_dir=os.path.join(artifact_dir, TRAINING_QUEUE_DIR_NAME),
+                worker_idle_timeout=training_pipeline_config.get(TRAINING_PIPELINE_WORKER_IDLE_TIMEOUT_KEY, 300),
+                job_stale_timeout=training_pipeline_config.get(TRAINING_PIPELINE_JOB_STALE_TIMEOUT_KEY, 120)
+            )
+            logger.debug("Training pipeline config: %s", training_pipeline_config)
             return training_pipeline_config
         except Exception as e:
             raise ConcreteException(e, sys) from e
@@ -146,10 +190,11 @@ class Configuration:
             data_transformation_config = DataTransformationConfig(
                 preprocessed_object_file_path=preprocessed_object_file_path,
                 transformed_train_dir=transformed_train_dir,
-                transformed_test_dir=transformed_test_dir
+                transformed_test_dir=transformed_test_dir,
+                dtype=data_transformation_config_info.get(DATA_TRANSFORMATION_DTYPE_KEY, "float64")
             )
 
-            logging.info(f"Data transformation config: {data_transformation_config}")
+            logger.info(f"Data transformation config: {data_transformation_config}")
             return data_transformation_config
         except Exception as e:
             raise ConcreteException(e, sys) from e
@@ -180,7 +225,7 @@ class Configuration:
                 base_accuracy=base_accuracy,
                 model_config_file_path=model_config_file_path
             )
-            logging.info(f"Model trainer config: {model_trainer_config}")
+            logger.info(f"Model trainer config: {model_trainer_config}")
             return model_trainer_config
         except Exception as e:
             raise ConcreteException(e, sys) from e
@@ -196,7 +241,7 @@ class Configuration:
             response = ModelEvaluationConfig(model_evaluation_file_path=model_evaluation_file_path,
                                              time_stamp=self.time_stamp)
 
-            logging.info(f"Model Evaluation Config: {response}.")
+            logger.info(f"Model Evaluation Config: {response}.")
             return response
         except Exception as e:
             raise ConcreteException(e, sys) from e
@@ -208,9 +253,27 @@ class Configuration:
             export_dir_path = os.path.join(ROOT_DIR, model_pusher_config_info[MODEL_PUSHER_MODEL_EXPORT_DIR_KEY],
                                            time_stamp)
 
-            model_pusher_config = ModelPusherConfig(export_dir_path=export_dir_path)
-            logging.info(f"Model pusher config {model_pusher_config}")
+            model_pusher_config = ModelPusherConfig(
+                export_dir_path=export_dir_path,
+                compile_model=model_pusher_config_info.get(MODEL_PUSHER_COMPILE_MODEL_KEY, False))
+            logger.info(f"Model pusher config {model_pusher_config}")
             return model_pusher_config
 
         except Exception as e:
             raise ConcreteException(e, sys) from e
+
+    def get_serving_config(self) -> ServingConfig:
+        try:
+            serving_config_info = self.config_info.get(SERVING_CONFIG_KEY) or {}
+            serving_config = ServingConfig(
+                max_batch_size=serving_config_info.get(SERVING_MAX_BATCH_SIZE_KEY, 64),
+                max_batch_delay=serving_config_info.get(SERVING_MAX_BATCH_DELAY_MS_KEY, 2) / 1000,
+                executor_workers=serving_config_info.get(SERVING_EXECUTOR_WORKERS_KEY, 2),
+                max_pending_requests=serving_config_info.get(SERVING_MAX_PENDING_REQUESTS_KEY, 1024),
+                prediction_cache_size=serving_config_info.get(SERVING_PREDICTION_CACHE_SIZE_KEY, 0),
+                prediction_cache_ttl=serving_config_info.get(SERVING_PREDICTION_CACHE_TTL_KEY, 3600),
+                prediction_cache_decimals=serving_config_info.get(SERVING_PREDICTION_CACHE_DECIMALS_KEY, 3))
+            logger.debug("Serving config: %s", serving_config)
+            return serving_config
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
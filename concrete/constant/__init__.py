@@ -12,11 +12,19 @@ CURRENT_TIME_STAMP = get_current_time_stamp()
 CONFIG_DIR = "config"
 CONFIG_FILE_NAME = "config.yaml"
 CONFIG_FILE_PATH = os.path.join(ROOT_DIR, CONFIG_DIR, CONFIG_FILE_NAME)
+SCHEMA_FILE_NAME = "schema.yaml"
+SCHEMA_FILE_PATH = os.path.join(ROOT_DIR, CONFIG_DIR, SCHEMA_FILE_NAME)
 
 # Training pipeline related variable
 TRAINING_PIPELINE_CONFIG_KEY = "training_pipeline_config"
 TRAINING_PIPELINE_ARTIFACT_DIR_KEY = "artifact_dir"
 TRAINING_PIPELINE_NAME_KEY = "pipeline_name"
+TRAINING_PIPELINE_STAGE_CACHE_KEY = "stage_cache"
+STAGE_CACHE_DIR_NAME = "stage_cache"
+TRAINING_PIPELINE_IN_MEMORY_KEY = "in_memory"
+TRAINING_PIPELINE_WORKER_IDLE_TIMEOUT_KEY = "worker_idle_timeout"
+TRAINING_PIPELINE_JOB_STALE_TIMEOUT_KEY = "job_stale_timeout"
+TRAINING_QUEUE_DIR_NAME = "training_queue"
 
 
 # Data Ingestion related variable
@@ -29,6 +37,15 @@ DATA_INGESTION_RAW_DATA_DIR_KEY = "raw_data_dir"
 DATA_INGESTION_INGESTED_DIR_NAME_KEY = "ingested_dir"
 DATA_INGESTION_TRAIN_DIR_KEY = "ingested_train_dir"
 DATA_INGESTION_TEST_DIR_KEY = "ingested_test_dir"
+DATA_INGESTION_SOURCE_TYPE_KEY = "source_type"
+DATA_INGESTION_LOCAL_SOURCE_DIR_KEY = "local_source_dir"
+DATA_INGESTION_MODE_KEY = "ingestion_mode"
+DATA_INGESTION_SOURCE_DATA_DIR_KEY = "source_data_dir"
+DATA_INGESTION_PARTITIONED_DIR_KEY = "partitioned_dir"
+DATA_INGESTION_STATE_FILE_NAME = "ingestion_state.json"
+DATA_INGESTION_EXPORT_CSV_KEY = "export_csv"
+COLUMNAR_DATA_EXTENSION = ".cols"
+COLUMNAR_METADATA_FILE_NAME = "columns.json"
 
 # Data Validation related variables
 
@@ -47,7 +64,9 @@ DATA_TRANSFORMATION_TRAIN_DIR_NAME_KEY = "transformed_train_dir"
 DATA_TRANSFORMATION_TEST_DIR_NAME_KEY = "transformed_test_dir"
 DATA_TRANSFORMATION_PREPROCESSING_DIR_KEY = "preprocessing_dir"
 DATA_TRANSFORMATION_PREPROCESSED_FILE_NAME_KEY = "preprocessed_object_file_name"
+DATA_TRANSFORMATION_DTYPE_KEY = "dtype"
 TARGET_COLUMNS_KEY = "target_column"
+SCHEMA_COLUMNS_KEY = "columns"
 
 # Model Training related variables
 
@@ -67,10 +86,45 @@ MODEL_EVALUATION_ARTIFACT_DIR = "model_evaluation"
 # Model Pusher config key
 MODEL_PUSHER_CONFIG_KEY = "model_pusher_config"
 MODEL_PUSHER_MODEL_EXPORT_DIR_KEY = "model_export_dir"
+MODEL_PUSHER_COMPILE_MODEL_KEY = "compile_model"
+COMPILED_MODEL_FILE_NAME = "compiled_model"
+MODEL_REGISTRY_CURRENT_FILE_NAME = "CURRENT"
+MODEL_MANIFEST_FILE_NAME = "manifest.json"
+
+# Serving related variables
+SERVING_CONFIG_KEY = "serving_config"
+SERVING_MAX_BATCH_SIZE_KEY = "max_batch_size"
+SERVING_MAX_BATCH_DELAY_MS_KEY = "max_batch_delay_ms"
+SERVING_EXECUTOR_WORKERS_KEY = "executor_workers"
+SERVING_MAX_PENDING_REQUESTS_KEY = "max_pending_requests"
+SERVING_PREDICTION_CACHE_SIZE_KEY = "prediction_cache_size"
+SERVING_PREDICTION_CACHE_TTL_KEY = "prediction_cache_ttl"
+SERVING_PREDICTION_CACHE_DECIMALS_KEY = "prediction_cache_decimals"
+PROMETHEUS_MULTIPROC_DIR_ENV_KEY = "PROMETHEUS_MULTIPROC_DIR"
+METRICS_DIR_NAME = "prometheus_multiproc"
+
+# Logging related variables
+LOGGING_CONFIG_KEY = "logging_config"
+LOGGING_LEVEL_KEY = "level"
+LOGGING_STAGE_LEVELS_KEY = "stage_levels"
+LOGGING_MAX_BYTES_KEY = "max_bytes"
+LOGGING_BACKUP_COUNT_KEY = "backup_count"
 
 BEST_MODEL_KEY = "best_model"
 HISTORY_KEY = "history"
 MODEL_PATH_KEY = "model_path"
 
+# Batch prediction related variables
+SAVED_MODELS_DIR_NAME = "saved_models"
+BATCH_PREDICTION_CHUNK_SIZE = 100000
+
 EXPERIMENT_DIR_NAME = "experiment"
 EXPERIMENT_FILE_NAME = "experiment.csv"
+EXPERIMENT_DB_FILE_NAME = "experiment.db"
+
+EXPERIMENT_STATUS_QUEUED = "queued"
+EXPERIMENT_STATUS_RUNNING = "running"
+EXPERIMENT_STATUS_COMPLETED = "completed"
+EXPERIMENT_STATUS_FAILED = "failed"
+EXPERIMENT_STATUSES = [EXPERIMENT_STATUS_QUEUED, EXPERIMENT_STATUS_RUNNING, EXPERIMENT_STATUS_COMPLETED,
+                       EXPERIMENT_STATUS_FAILED]
@@ -1,7 +1,15 @@
 from collections import namedtuple
 
+# fields holding live objects handed to the next stage in in-memory pipeline mode, they are None when an artifact
+# is read back from disk (stage cache) and are never persisted
+IN_MEMORY_ARTIFACT_FIELDS = ("train_df", "test_df", "train_input_feature", "train_target_feature",
+                             "test_input_feature", "test_target_feature", "preprocessing_object",
+                             "trained_model_object")
+
 DataIngestionArtifact = namedtuple("DataIngestionArtifact",
-                                   ["train_file_path", "test_file_path", "is_ingested", "message"])
+                                   ["train_file_path", "test_file_path", "is_ingested", "message", "train_df",
+                                    "test_df"],
+                                   defaults=[None, None])
 
 DataValidationArtifact = namedtuple("DataValidationArtifact",
                                     ["schema_file_path", "report_file_path", "report_page_file_path", "is_validated",
@@ -9,12 +17,22 @@ DataValidationArtifact = namedtuple("DataValidationArtifact",
 
 DataTransformationArtifact = namedtuple("DataTransformationArtifact",
                                         ["is_transformed", "message", "transformed_train_file_path",
-                                         "transformed_test_file_path", "preprocessed_object_file_path"])
+                                         "transformed_test_file_path", "preprocessed_object_file_path",
+                                         "transformed_train_target_file_path", "transformed_test_target_file_path",
+                                         "train_input_feature", "train_target_feature", "test_input_feature",
+                                         "test_target_feature", "preprocessing_object"],
+                                        defaults=[None, None, None, None, None])
 
 ModelTrainerArtifact = namedtuple("ModelTrainerArtifact", ["is_trained", "message", "trained_model_file_path",
                                                            "train_rmse", "test_rmse", "train_accuracy", "test_accuracy",
-                                                           "model_accuracy"])
+                                                           "model_accuracy", "trained_model_object"],
+                                  defaults=[None])
 
 ModelEvaluationArtifact = namedtuple("ModelEvaluationArtifact", ["is_model_accepted", "evaluated_model_path"])
 
-ModelPusherArtifact = namedtuple("ModelPusherArtifact", ["is_model_pusher", "export_model_file_path"])
+ModelPusherArtifact = namedtuple("ModelPusherArtifact", ["is_model_pusher", "export_model_file_path",
+                                                         "compiled_model_file_path", "model_version",
+                                                         "is_current_model"])
+
+BatchPredictionArtifact = namedtuple("BatchPredictionArtifact", ["is_predicted", "message", "output_file_path",
+                                                                 "row_count", "rows_per_second"])
@@ -0,0 +1,163 @@
+from sklearn.model_selection import ParameterGrid, check_cv, cross_val_score
+from sklearn.base import clone
+from concrete.exception import ConcreteException
+from concrete.logger import get_logger
+import numpy as np
+import math
+import sys
+import time
+
+logger = get_logger(__name__)
+
+STRATEGY_HALVING = "halving"
+STRATEGY_RANDOM = "random"
+STRATEGY_EXHAUSTIVE = "exhaustive"
+STRATEGIES = [STRATEGY_HALVING, STRATEGY_RANDOM, STRATEGY_EXHAUSTIVE]
+
+
+class BudgetedSearchCV:
+    """
+    Parameter search with a bounded cost, selected in model.yaml in place of GridSearchCV:
+
+    grid_search:
+      module: concrete.entity.budgeted_search
+      class: BudgetedSearchCV
+      params:
+        strategy: halving
+        time_budget: 60
+
+    strategy:
+        halving: successive halving, every candidate is scored on a small subsample and only the best
+                 1/factor of them move on to a factor times bigger sample, the last round uses all rows
+        random: candidates are scored on all rows in random order until n_iter or time_budget is reached
+        exhaustive: candidates are scored on all rows in grid order until time_budget is reached
+    time_budget: wall clock cap in seconds for the search of one model family, None for no cap.
+                 Once it is spent no new candidate is scored and the best candidate found so far is refit on
+                 all rows, the cap is only overrun by the candidate being scored and that refit.
+    n_jobs: jobs of the cross validation of one candidate (its folds run in parallel), candidates are scored
+            one after another.
+
+    It exposes best_estimator_, best_params_, best_score_ and cv_results_ like GridSearchCV. best_score_ is the
+    CV score on all rows, unless the budget ran out before the winner was scored on all rows: it is then its
+    score on best_n_resources_ rows.
+    """
+
+    def __init__(self, estimator, param_grid, strategy: str = STRATEGY_HALVING, cv=5, scoring=None,
+                 n_iter: int = None, factor: int = 3, min_resources: int = None, time_budget: float = None,
+                 random_state: int = 42, n_jobs: int = None, verbose: int = 0):
+        self.estimator = estimator
+        self.param_grid = param_grid
+        self.strategy = strategy
+        self.cv = cv
+        self.scoring = scoring
+        self.n_iter = n_iter
+        self.factor = factor
+        self.min_resources = min_resources
+        self.time_budget = time_budget
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+        self.verbose = verbose
+
+    def is_budget_spent(self) -> bool:
+        return self.time_budget is not None and time.perf_counter() - self._start_time >= self.time_budget
+
+    def get_splits(self, y, rows: np.ndarray) -> list:
+        """
+        Description: Function is used to get the cross validation folds of a subsample as row positions of the
+                     whole input, so that only the rows of a fold are copied and never the whole input
+        param rows: sorted row positions of the subsample
+        return: list of (train rows, test rows)
+        """
+        y_rows = y.iloc[rows] if hasattr(y, "iloc") else np.asarray(y)[rows]
+        return [(rows[train], rows[test])
+                for train, test in check_cv(self.cv, y_rows).split(np.empty((len(rows), 0)), y_rows)]
+
+    def score_candidate(self, params: dict, X, y, rows: np.ndarray, iteration: int) -> float:
+        estimator = clone(self.estimator).set_params(**params)
+        n_resources = len(rows)
+        score = float(np.mean(cross_val_score(estimator, X, y, cv=self.get_splits(y, rows), scoring=self.scoring,
+                                              n_jobs=self.n_jobs)))
+        self.cv_results_["params"].append(params)
+        self.cv_results_["mean_test_score"].append(score)
+        self.cv_results_["n_resources"].append(n_resources)
+        self.cv_results_["iter"].append(iteration)
+        if self.verbose:
+            logger.info("[%s] iter: %s resources: %s score: %.5f params: %s", type(self.estimator).__name__,
+                        iteration, n_resources, score, params)
+        return score
+
+    def get_halving_resources(self, n_candidates: int, n_samples: int, n_splits: int) -> list:
+        """
+        Description: Function is used to get the number of rows used in every halving round,
+                     the last round always uses all rows
+        """
+        min_resources = self.min_resources or 20 * n_splits
+        n_rounds = 1 + math.ceil(math.log(max(n_candidates, 1), self.factor))
+        max_rounds = 1 + int(math.log(max(n_samples / min_resources, 1), self.factor))
+        n_rounds = max(1, min(n_rounds, max_rounds))
+        return [n_samples // self.factor ** (n_rounds - 1 - iteration) for iteration in range(n_rounds)]
+
+    def fit(self, X, y):
+        try:
+            self._start_time = time.perf_counter()
+            if self.strategy not in STRATEGIES:
+                raise Exception(f"Search strategy: [{self.strategy}] is not one of {STRATEGIES}")
+            self.cv_results_ = {"params": [], "mean_test_score": [], "n_resources": [], "iter": []}
+
+            # every halving subsample is a random prefix of one shuffled order, it is passed down as sorted row
+            # positions of X so that a (memory mapped) input is read in place instead of being copied every round
+            random_state = np.random.RandomState(self.random_state)
+            n_samples = len(y)
+            permutation = random_state.permutation(n_samples)
+
+            candidates = list(ParameterGrid(self.param_grid))
+            if self.strategy != STRATEGY_EXHAUSTIVE:
+                candidates = [candidates[index] for index in random_state.permutation(len(candidates))]
+            if self.n_iter is not None:
+                candidates = candidates[:self.n_iter]
+
+            if self.strategy == STRATEGY_HALVING:
+                n_splits = check_cv(self.cv).get_n_splits()
+                resources = self.get_halving_resources(len(candidates), n_samples, n_splits)
+            else:
+                resources = [n_samples]
+
+            scores = []
+            for iteration, n_resources in enumerate(resources):
+                rows = np.sort(permutation[:n_resources])
+                scores = []
+                for params in candidates:
+                    if scores and self.is_budget_spent():
+                        break
+                    scores.append(self.score_candidate(params, X, y, rows, iteration))
+                candidates = candidates[:len(scores)]
+                ranking = np.argsort(scores)[::-1]
+                is_last_round = iteration == len(resources) - 1 or self.is_budget_spent()
+                n_survivors = 1 if is_last_round else math.ceil(len(candidates) / self.factor)
+                candidates = [candidates[index] for index in ranking[:n_survivors]]
+                scores = [scores[index] for index in ranking[:n_survivors]]
+                if is_last_round:
+                    break
+
+            self.best_params_ = candidates[0]
+            self.best_score_ = scores[0]
+            self.best_n_resources_ = n_resources
+            if n_resources < n_samples:
+                if self.is_budget_spent():
+                    logger.warning("[%s] time budget spent, best score is on %s of %s rows",
+                                   type(self.estimator).__name__, n_resources, n_samples)
+                else:
+                    # the winner is scored on all rows to keep it comparable with other searches
+                    self.best_score_ = self.score_candidate(self.best_params_, X, y, np.arange(n_samples),
+                                                            len(resources))
+                    self.best_n_resources_ = n_samples
+
+            self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_).fit(X, y)
+            self.n_candidates_scored_ = len(self.cv_results_["params"])
+            self.search_time_ = time.perf_counter() - self._start_time
+            logger.info("[%s] %s search scored %s candidates in %.1fs, best score: %s best params: %s",
+                        type(self.estimator).__name__, self.strategy, self.n_candidates_scored_, self.search_time_,
+                        self.best_score_, self.best_params_)
+            return self
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
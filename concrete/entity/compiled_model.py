@@ -0,0 +1,306 @@
+from concrete.exception import ConcreteException
+from concrete.util.util import load_object
+from concrete.logger import get_logger
+from collections import namedtuple
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+import json
+import os, sys
+
+logger = get_logger(__name__)
+
+SupportedModelTypes = namedtuple("SupportedModelTypes", ["scaler", "linear", "tree", "forest"])
+
+CHECK_SAMPLE_SIZE = 2000
+CHECK_SINGLE_ROW_COUNT = 100
+CHECK_RTOL = 1e-6
+CHECK_ATOL = 1e-6
+
+COMPILED_MODEL_HEADER_FILE_NAME = "model.json"
+# single rows are walked down python lists of the node arrays up to this many nodes, bigger forests use the
+# vectorized path so that no worker holds a private copy of the (memory mapped) node arrays
+MAX_NODE_LIST_SIZE = 100000
+
+
+@lru_cache(maxsize=None)
+def get_supported_model_types() -> SupportedModelTypes:
+    # sklearn is imported when a model is compiled, serving a compiled model does not import it
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.linear_model import LinearRegression, Ridge, Lasso, ElasticNet
+    from sklearn.tree import DecisionTreeRegressor, ExtraTreeRegressor
+    from sklearn.ensemble import RandomForestRegressor, ExtraTreesRegressor
+    return SupportedModelTypes(scaler=StandardScaler,
+                               linear=(LinearRegression, Ridge, Lasso, ElasticNet),
+                               tree=(DecisionTreeRegressor, ExtraTreeRegressor),
+                               forest=(RandomForestRegressor, ExtraTreesRegressor))
+
+
+def get_input_array(X, feature_names: list) -> np.ndarray:
+    """
+    Description: Function is used to get raw input features as a float64 array in training column order
+    param X: dataframe with the training columns or array already in training column order
+    """
+    if isinstance(X, pd.DataFrame):
+        if feature_names is not None and X.columns.tolist() != feature_names:
+            X = X[feature_names]
+        X = X.to_numpy(dtype=np.float64)
+    X = np.asarray(X, dtype=np.float64)
+    return X.reshape(1, -1) if X.ndim == 1 else X
+
+
+class CompiledLinearModel:
+    """
+    Linear model with the standard scaling folded into its coefficients.
+
+    prediction = ((x - mean) / scale) @ coef + intercept = x @ (coef / scale) + (intercept - (mean / scale) @ coef)
+    so a prediction is a single dot product on the raw features.
+    """
+
+    def __init__(self, coef: np.ndarray, intercept: float, feature_names: list, model_name: str):
+        self.coef = coef
+        self.intercept = intercept
+        self.feature_names = feature_names
+        self.model_name = model_name
+
+    def predict(self, X) -> np.ndarray:
+        return get_input_array(X, self.feature_names) @ self.coef + self.intercept
+
+    def __repr__(self):
+        return f"Compiled{self.model_name}()"
+
+    def __str__(self):
+        return f"Compiled{self.model_name}()"
+
+
+class CompiledTreeModel:
+    """
+    Decision tree or forest flattened into node arrays of all trees.
+
+    children[node] holds the left and right child of a node and leaves point to themselves, so every row of
+    every tree is advanced one level per step with a few array gathers and after max_depth steps all of them
+    are on a leaf. A single row is walked down the trees with python lists instead, which is faster than a
+    numpy call per level. Inputs are scaled in float64 and cast to float32 before comparing with thresholds,
+    the same arithmetic as StandardScaler followed by the sklearn tree.
+    """
+
+    def __init__(self, mean: np.ndarray, scale: np.ndarray, root_nodes: np.ndarray, feature: np.ndarray,
+                 threshold: np.ndarray, children: np.ndarray, value: np.ndarray,
+                 max_depth: int, feature_names: list, model_name: str):
+        self.mean = mean
+        self.scale = scale
+        self.root_nodes = root_nodes
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.max_depth = max_depth
+        self.feature_names = feature_names
+        self.model_name = model_name
+        self._node_lists = None
+
+    def __getstate__(self):
+        # node lists are rebuilt on first use instead of being stored next to the arrays
+        return {**self.__dict__, "_node_lists": None}
+
+    def predict_row(self, x: np.ndarray) -> float:
+        if self._node_lists is None:
+            self._node_lists = (self.root_nodes.tolist(), self.feature.tolist(), self.threshold.tolist(),
+                                self.children[:, 0].tolist(), self.children[:, 1].tolist(), self.value.tolist())
+        root_nodes, feature, threshold, left_child, right_child, value = self._node_lists
+        x = x.tolist()
+        total = 0.0
+        for node in root_nodes:
+            while left_child[node] != node:
+                node = right_child[node] if x[feature[node]] > threshold[node] else left_child[node]
+            total += value[node]
+        return total / len(root_nodes)
+
+    def predict(self, X) -> np.ndarray:
+        X = ((get_input_array(X, self.feature_names) - self.mean) / self.scale).astype(np.float32)
+        if X.shape[0] == 1 and len(self.feature) <= MAX_NODE_LIST_SIZE:
+            return np.array([self.predict_row(X[0])])
+        rows = np.arange(X.shape[0])
+        # one row of node indices per tree, a step is plain indexing and a single comparison
+        nodes = np.repeat(self.root_nodes[:, np.newaxis], X.shape[0], axis=1)
+        for _ in range(self.max_depth):
+            is_right = X[rows, self.feature[nodes]] > self.threshold[nodes]
+            nodes = self.children[nodes, is_right.view(np.uint8)]
+        return self.value[nodes].mean(axis=0)
+
+    def __repr__(self):
+        return f"Compiled{self.model_name}()"
+
+    def __str__(self):
+        return f"Compiled{self.model_name}()"
+
+
+COMPILED_MODEL_TYPES = {model_type.__name__: model_type for model_type in [CompiledLinearModel, CompiledTreeModel]}
+
+
+def save_compiled_model(compiled_model, dir_path: str):
+    """
+    Description: Function is used to save a compiled model as one .npy file per array and a json header, the
+                 arrays can then be memory mapped read-only and shared through the page cache by every process
+                 serving the model
+    """
+    try:
+        os.makedirs(dir_path, exist_ok=True)
+        attributes, array_names = {}, []
+        for name, value in vars(compiled_model).items():
+            if name.startswith("_"):
+                continue
+            if isinstance(value, np.ndarray):
+                np.save(os.path.join(dir_path, f"{name}.npy"), np.ascontiguousarray(value))
+                array_names.append(name)
+            else:
+                attributes[name] = value
+        with open(os.path.join(dir_path, COMPILED_MODEL_HEADER_FILE_NAME), "w") as header_file:
+            json.dump({"class": type(compiled_model).__name__, "attributes": attributes, "arrays": array_names},
+                      header_file, indent=4)
+    except Exception as e:
+        raise ConcreteException(e, sys) from e
+
+
+def load_compiled_model(dir_path: str, mmap_mode: str = "r"):
+    """
+    Description: Function is used to load a compiled model saved by save_compiled_model
+    param mmap_mode: numpy memory map mode of the arrays, None to read them into memory
+    """
+    try:
+        with open(os.path.join(dir_path, COMPILED_MODEL_HEADER_FILE_NAME)) as header_file:
+            header = json.load(header_file)
+        arrays = {}
+        for name in header["arrays"]:
+            array = np.load(os.path.join(dir_path, f"{name}.npy"), mmap_mode=mmap_mode)
+            # plain ndarray view of the mapping, indexing np.memmap is slower
+            arrays[name] = array.view(np.ndarray) if isinstance(array, np.memmap) else array
+        return COMPILED_MODEL_TYPES[header["class"]](**header["attributes"], **arrays)
+    except Exception as e:
+        raise ConcreteException(e, sys) from e
+
+
+def load_model(model_path: str):
+    """
+    Description: Function is used to load a served model, compiled models are directories of memory mapped
+                 arrays, other models are pickled files
+    """
+    try:
+        if os.path.isdir(model_path):
+            return load_compiled_model(model_path)
+        return load_object(file_path=model_path)
+    except Exception as e:
+        raise ConcreteException(e, sys) from e
+
+
+def get_scaling(preprocessing_object, n_features: int):
+    """
+    Description: Function is used to get mean and scale of a fitted StandardScaler
+    return: (mean, scale) float64 arrays
+    """
+    mean = preprocessing_object.mean_ if preprocessing_object.mean_ is not None else np.zeros(n_features)
+    scale = preprocessing_object.scale_ if preprocessing_object.scale_ is not None else np.ones(n_features)
+    return np.asarray(mean, dtype=np.float64), np.asarray(scale, dtype=np.float64)
+
+
+def compile_linear_model(model, mean: np.ndarray, scale: np.ndarray, feature_names: list) -> CompiledLinearModel:
+    coef = np.asarray(model.coef_, dtype=np.float64).ravel()
+    folded_coef = coef / scale
+    folded_intercept = float(np.ravel(model.intercept_)[0]) - float((mean / scale) @ coef)
+    return CompiledLinearModel(coef=folded_coef, intercept=folded_intercept, feature_names=feature_names,
+                               model_name=type(model).__name__)
+
+
+def compile_tree_model(model, mean: np.ndarray, scale: np.ndarray, feature_names: list) -> CompiledTreeModel:
+    estimators = model.estimators_ if isinstance(model, get_supported_model_types().forest) else [model]
+    root_nodes, features, thresholds, left_children, right_children, values = [], [], [], [], [], []
+    node_count, max_depth = 0, 0
+    for estimator in estimators:
+        tree = estimator.tree_
+        node_ids = np.arange(tree.node_count)
+        is_leaf = tree.children_left == -1
+        root_nodes.append(node_count)
+        # leaves compare feature 0 and stay on themselves whatever the result
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(tree.threshold)
+        left_children.append(np.where(is_leaf, node_ids, tree.children_left) + node_count)
+        right_children.append(np.where(is_leaf, node_ids, tree.children_right) + node_count)
+        values.append(tree.value[:, 0, 0])
+        node_count += tree.node_count
+        max_depth = max(max_depth, tree.max_depth)
+    children = np.stack([np.concatenate(left_children), np.concatenate(right_children)], axis=1).astype(np.intp)
+    return CompiledTreeModel(mean=mean, scale=scale,
+                             root_nodes=np.asarray(root_nodes, dtype=np.intp),
+                             feature=np.concatenate(features).astype(np.intp),
+                             threshold=np.concatenate(thresholds).astype(np.float64),
+                             children=children,
+                             value=np.concatenate(values).astype(np.float64),
+                             max_depth=max_depth, feature_names=feature_names, model_name=type(model).__name__)
+
+
+def compile_model(model):
+    """
+    Description: Function is used to compile a ConcreteEstimatorModel (fitted StandardScaler and regressor)
+                 into a lean inference object
+    param model: object with preprocessing_object and trained_model_object
+    return: CompiledLinearModel or CompiledTreeModel, None if the scaler or regressor is not supported
+    """
+    try:
+        supported_model_types = get_supported_model_types()
+        preprocessing_object = getattr(model, "preprocessing_object", None)
+        trained_model_object = getattr(model, "trained_model_object", None)
+        if type(preprocessing_object) is not supported_model_types.scaler:
+            logger.info(f"Model is not compiled, unsupported preprocessing: {type(preprocessing_object).__name__}")
+            return None
+        feature_names = list(preprocessing_object.feature_names_in_) \
+            if hasattr(preprocessing_object, "feature_names_in_") else None
+        mean, scale = get_scaling(preprocessing_object, n_features=preprocessing_object.n_features_in_)
+        if isinstance(trained_model_object, supported_model_types.linear):
+            return compile_linear_model(trained_model_object, mean=mean, scale=scale, feature_names=feature_names)
+        if isinstance(trained_model_object, supported_model_types.tree + supported_model_types.forest):
+            return compile_tree_model(trained_model_object, mean=mean, scale=scale, feature_names=feature_names)
+        logger.info(f"Model is not compiled, unsupported model: {type(trained_model_object).__name__}")
+        return None
+    except Exception as e:
+        raise ConcreteException(e, sys) from e
+
+
+def get_check_sample(model, sample_size: int = CHECK_SAMPLE_SIZE, random_state: int = 42) -> pd.DataFrame:
+    """
+    Description: Function is used to draw raw inputs around the training distribution known by the scaler
+    """
+    preprocessing_object = model.preprocessing_object
+    n_features = preprocessing_object.n_features_in_
+    mean, scale = get_scaling(preprocessing_object, n_features=n_features)
+    random_generator = np.random.default_rng(random_state)
+    sample = mean + scale * random_generator.standard_normal((sample_size, n_features)) * 1.5
+    feature_names = list(preprocessing_object.feature_names_in_) \
+        if hasattr(preprocessing_object, "feature_names_in_") else list(range(n_features))
+    return pd.DataFrame(sample, columns=feature_names)
+
+
+def check_compiled_model(compiled_model, model, X=None, rtol: float = CHECK_RTOL, atol: float = CHECK_ATOL) -> float:
+    """
+    Description: Function is used to check that the compiled model predicts what the original model predicts,
+                 as a batch and row by row
+    param X: raw inputs to compare on, a sample around the training distribution if None
+    return: max absolute difference, ConcreteException is raised if it is above tolerance
+    """
+    try:
+        X = get_check_sample(model) if X is None else X
+        expected = np.asarray(model.predict(X), dtype=np.float64).ravel()
+        rows = X.iloc if isinstance(X, pd.DataFrame) else X
+        single_row_count = min(len(expected), CHECK_SINGLE_ROW_COUNT)
+        checks = [(compiled_model.predict(X), expected),
+                  (np.concatenate([compiled_model.predict(rows[index:index + 1])
+                                   for index in range(single_row_count)]), expected[:single_row_count])]
+        max_difference = max((float(np.max(np.abs(predicted - expected_part))) if len(predicted) else 0.0
+                              for predicted, expected_part in checks))
+        if not all(np.allclose(predicted, expected_part, rtol=rtol, atol=atol)
+                   for predicted, expected_part in checks):
+            raise Exception(f"Compiled model {compiled_model} differs from {model}: max difference {max_difference}")
+        logger.info(f"Compiled model {compiled_model} matches {model} on {len(expected)} rows, "
+                     f"max difference {max_difference}")
+        return max_difference
+    except Exception as e:
+        raise ConcreteException(e, sys) from e
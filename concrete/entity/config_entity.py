@@ -2,20 +2,29 @@ from collections import namedtuple
 
 DataIngestionConfig = namedtuple("DataIngestionConfig",
                                  ["author_username", "raw_data_dir", "ingested_train_dir",
-                                  "kaggel_dataset_name", "ingested_test_dir"])
+                                  "kaggel_dataset_name", "ingested_test_dir", "source_type", "local_source_dir",
+                                  "ingestion_mode", "source_data_dir", "partitioned_train_dir",
+                                  "partitioned_test_dir", "state_file_path", "schema_file_path", "export_csv"])
 
-TrainingPipelineConfig = namedtuple("TrainingPipelineConfig", ["artifact_dir"])
+TrainingPipelineConfig = namedtuple("TrainingPipelineConfig", ["artifact_dir", "stage_cache_dir", "in_memory",
+                                                               "training_queue_dir", "worker_idle_timeout",
+                                                               "job_stale_timeout"])
 
 DataValidationConfig = namedtuple("DataValidationConfig",
                                   ["schema_file_path", "report_file_path", "report_page_file_path"])
 
 DataTransformationConfig = namedtuple("DataTransformationConfig", ["transformed_train_dir",
                                                                    "transformed_test_dir",
-                                                                   "preprocessed_object_file_path"])
+                                                                   "preprocessed_object_file_path",
+                                                                   "dtype"])
 
 ModelTrainerConfig = namedtuple("ModelTrainerConfig", ["trained_model_file_path", "base_accuracy",
                                                        "model_config_file_path"])
 
 ModelEvaluationConfig = namedtuple("ModelEvaluationConfig", ["model_evaluation_file_path", "time_stamp"])
 
-ModelPusherConfig = namedtuple("ModelPusherConfig", ["export_dir_path"])
+ModelPusherConfig = namedtuple("ModelPusherConfig", ["export_dir_path", "compile_model"])
+
+ServingConfig = namedtuple("ServingConfig", ["max_batch_size", "max_batch_delay", "executor_workers",
+                                             "max_pending_requests", "prediction_cache_size",
+                                             "prediction_cache_ttl", "prediction_cache_decimals"])
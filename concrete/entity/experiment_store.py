@@ -0,0 +1,257 @@
+from concrete.constant import EXPERIMENT_STATUS_QUEUED, EXPERIMENT_STATUS_RUNNING, EXPERIMENT_STATUS_COMPLETED, \
+    EXPERIMENT_STATUS_FAILED
+from concrete.exception import ConcreteException
+from concrete.logger import get_logger
+from contextlib import closing
+from datetime import datetime
+import pandas as pd
+import sqlite3
+import os, sys
+
+logger = get_logger(__name__)
+
+# column name and sqlite type of experiment table, experiment_id is the primary key
+EXPERIMENT_COLUMNS = [("experiment_id", "TEXT PRIMARY KEY"),
+                      ("initialization_timestamp", "TEXT"),
+                      ("artifact_time_stamp", "TEXT"),
+                      ("running_status", "INTEGER"),
+                      ("start_time", "TEXT"),
+                      ("stop_time", "TEXT"),
+                      ("execution_time", "TEXT"),
+                      ("message", "TEXT"),
+                      ("experiment_file_path", "TEXT"),
+                      ("accuracy", "REAL"),
+                      ("is_model_accepted", "INTEGER"),
+                      ("status", "TEXT"),
+                      ("created_time_stamp", "TEXT"),
+                      ("updated_time_stamp", "TEXT")]
+EXPERIMENT_COLUMN_NAMES = [column_name for column_name, _ in EXPERIMENT_COLUMNS]
+BOOLEAN_COLUMN_NAMES = ["running_status", "is_model_accepted"]
+# column name and sqlite type of experiment_profile table, one row per profiled step of an experiment
+PROFILE_COLUMNS = [("experiment_id", "TEXT"),
+                   ("step_id", "INTEGER"),
+                   ("parent_step_id", "INTEGER"),
+                   ("name", "TEXT"),
+                   ("depth", "INTEGER"),
+                   ("process_id", "INTEGER"),
+                   ("start_time", "REAL"),
+                   ("wall_time", "REAL"),
+                   ("cpu_time", "REAL"),
+                   ("peak_rss", "INTEGER"),
+                   ("read_bytes", "INTEGER"),
+                   ("write_bytes", "INTEGER")]
+PROFILE_COLUMN_NAMES = [column_name for column_name, _ in PROFILE_COLUMNS]
+CSV_IMPORTED_KEY = "csv_imported"
+
+
+def get_sqlite_value(value):
+    """
+    Description: Function is used to convert a python, numpy or pandas value to a value sqlite can store
+    """
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float, str)):
+        return value
+    return str(value)
+
+
+class ExperimentStore:
+    """
+    Embedded sqlite store of experiment records.
+
+    There is one row per experiment, every lifecycle change of an experiment (queued, running, completed,
+    failed) updates its row. Rows are indexed on start time, status and creation time so that a page of the
+    history is read with an index scan and its cost does not grow with the number of experiments.
+    A connection is opened per call so the store can be used from any thread or process.
+    """
+
+    def __init__(self, db_file_path: str):
+        try:
+            self.db_file_path = db_file_path
+            os.makedirs(os.path.dirname(db_file_path), exist_ok=True)
+            with closing(self.get_connection()) as connection, connection:
+                connection.execute("PRAGMA journal_mode=WAL")
+                columns = ", ".join(f"{column_name} {column_type}"
+                                    for column_name, column_type in EXPERIMENT_COLUMNS)
+                connection.execute(f"CREATE TABLE IF NOT EXISTS experiment ({columns})")
+                connection.execute("CREATE INDEX IF NOT EXISTS experiment_start_time ON experiment (start_time)")
+                connection.execute("CREATE INDEX IF NOT EXISTS experiment_status ON experiment "
+                                   "(status, created_time_stamp)")
+                connection.execute("CREATE INDEX IF NOT EXISTS experiment_created_time_stamp ON experiment "
+                                   "(created_time_stamp)")
+                connection.execute("CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT)")
+                profile_columns = ", ".join(f"{column_name} {column_type}"
+                                            for column_name, column_type in PROFILE_COLUMNS)
+                connection.execute(f"CREATE TABLE IF NOT EXISTS experiment_profile ({profile_columns}, "
+                                   f"PRIMARY KEY (experiment_id, step_id))")
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def get_connection(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_file_path, timeout=30)
+
+    @staticmethod
+    def get_upsert_query(is_update: bool = True) -> str:
+        column_names = ", ".join(EXPERIMENT_COLUMN_NAMES)
+        placeholders = ", ".join("?" * len(EXPERIMENT_COLUMN_NAMES))
+        if not is_update:
+            return f"INSERT INTO experiment ({column_names}) VALUES ({placeholders}) " \
+                   f"ON CONFLICT(experiment_id) DO NOTHING"
+        # created time stamp of an experiment is kept from its first record
+        updates = ", ".join(f"{column_name}=excluded.{column_name}" for column_name in EXPERIMENT_COLUMN_NAMES
+                            if column_name not in ["experiment_id", "created_time_stamp"])
+        return f"INSERT INTO experiment ({column_names}) VALUES ({placeholders}) " \
+               f"ON CONFLICT(experiment_id) DO UPDATE SET {updates}"
+
+    def save_experiment(self, experiment: dict, is_update: bool = True):
+        """
+        Description: Function is used to insert or update the record of an experiment
+        param experiment: experiment fields, missing columns are stored as null
+        param is_update: False to keep an existing record of the experiment unchanged
+        """
+        try:
+            now = str(datetime.now())
+            experiment = {"created_time_stamp": now, **experiment, "updated_time_stamp": now}
+            row = [get_sqlite_value(experiment.get(column_name)) for column_name in EXPERIMENT_COLUMN_NAMES]
+            with closing(self.get_connection()) as connection, connection:
+                connection.execute(self.get_upsert_query(is_update=is_update), row)
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    @staticmethod
+    def get_filter(status: str = None, is_model_accepted: bool = None):
+        conditions, parameters = [], []
+        if status is not None:
+            conditions.append("status = ?")
+            parameters.append(status)
+        if is_model_accepted is not None:
+            conditions.append("is_model_accepted = ?")
+            parameters.append(int(is_model_accepted))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return where, parameters
+
+    def get_experiments(self, limit: int = 5, offset: int = 0, status: str = None,
+                        is_model_accepted: bool = None) -> pd.DataFrame:
+        """
+        Description: Function is used to get a page of experiments, newest first
+        param status: queued, running, completed or failed, None for all
+        param is_model_accepted: True or False to filter on evaluation outcome, None for all
+        return: dataframe with one row per experiment
+        """
+        try:
+            where, parameters = self.get_filter(status=status, is_model_accepted=is_model_accepted)
+            query = f"SELECT * FROM experiment {where} ORDER BY created_time_stamp DESC LIMIT ? OFFSET ?"
+            with closing(self.get_connection()) as connection:
+                experiment_df = pd.read_sql_query(query, connection, params=parameters + [int(limit), int(offset)])
+            for column_name in BOOLEAN_COLUMN_NAMES:
+                experiment_df[column_name] = experiment_df[column_name].map({1: True, 0: False})
+            return experiment_df
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def get_experiment(self, experiment_id: str):
+        """
+        Description: Function is used to get the record of an experiment
+        return: dict of experiment fields or None if not found
+        """
+        try:
+            with closing(self.get_connection()) as connection:
+                connection.row_factory = sqlite3.Row
+                row = connection.execute("SELECT * FROM experiment WHERE experiment_id = ?",
+                                         [experiment_id]).fetchone()
+            return None if row is None else dict(row)
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def get_experiment_count(self, status: str = None, is_model_accepted: bool = None) -> int:
+        try:
+            where, parameters = self.get_filter(status=status, is_model_accepted=is_model_accepted)
+            with closing(self.get_connection()) as connection:
+                return connection.execute(f"SELECT COUNT(*) FROM experiment {where}", parameters).fetchone()[0]
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def save_profile(self, experiment_id: str, steps: list):
+        """
+        Description: Function is used to replace the profiled steps of an experiment
+        param steps: ProfileStep of the pipeline run
+        """
+        try:
+            rows = [[experiment_id] + [get_sqlite_value(getattr(step, column_name))
+                                       for column_name in PROFILE_COLUMN_NAMES[1:]] for step in steps]
+            with closing(self.get_connection()) as connection, connection:
+                connection.execute("DELETE FROM experiment_profile WHERE experiment_id = ?", [experiment_id])
+                connection.executemany(f"INSERT INTO experiment_profile ({', '.join(PROFILE_COLUMN_NAMES)}) "
+                                       f"VALUES ({', '.join('?' * len(PROFILE_COLUMN_NAMES))})", rows)
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def get_profile(self, experiment_id: str) -> list:
+        """
+        Description: Function is used to get the profiled steps of an experiment
+        return: list of dict of step fields ordered by step id, empty if the experiment was not profiled
+        """
+        try:
+            with closing(self.get_connection()) as connection:
+                connection.row_factory = sqlite3.Row
+                rows = connection.execute("SELECT * FROM experiment_profile WHERE experiment_id = ? "
+                                          "ORDER BY step_id", [experiment_id]).fetchall()
+            return [dict(row) for row in rows]
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    @staticmethod
+    def get_legacy_status(experiment: dict) -> str:
+        """
+        Description: Function is used to derive the status of a csv record written before status was recorded
+        """
+        if str(experiment.get("running_status")) == "True":
+            return EXPERIMENT_STATUS_RUNNING
+        if str(experiment.get("message")).startswith("Pipeline has failed"):
+            return EXPERIMENT_STATUS_FAILED
+        if not pd.isna(experiment.get("stop_time")):
+            return EXPERIMENT_STATUS_COMPLETED
+        return EXPERIMENT_STATUS_QUEUED
+
+    def import_csv_file(self, csv_file_path: str) -> int:
+        """
+        Description: Function is used to import once the experiment.csv written by earlier versions, the csv has
+                     one row per lifecycle change so the last row of an experiment is kept
+        return: number of imported experiments
+        """
+        try:
+            if not os.path.exists(csv_file_path):
+                return 0
+            with closing(self.get_connection()) as connection:
+                is_imported = connection.execute("SELECT value FROM store_meta WHERE key = ?",
+                                                 [CSV_IMPORTED_KEY]).fetchone()
+            if is_imported is not None:
+                return 0
+
+            experiment_df = pd.read_csv(csv_file_path)
+            created_time_stamps = experiment_df.groupby("experiment_id")["created_time_stamp"].first()
+            experiment_df = experiment_df.drop_duplicates(subset=["experiment_id"], keep="last")
+            rows = []
+            for experiment in experiment_df.to_dict(orient="records"):
+                experiment["created_time_stamp"] = created_time_stamps[experiment["experiment_id"]]
+                experiment["updated_time_stamp"] = experiment.get("created_time_stamp")
+                if pd.isna(experiment.get("status", None)):
+                    experiment["status"] = self.get_legacy_status(experiment)
+                for column_name in BOOLEAN_COLUMN_NAMES:
+                    value = experiment.get(column_name)
+                    experiment[column_name] = None if pd.isna(value) else str(value) == "True"
+                rows.append([get_sqlite_value(experiment.get(column_name))
+                             for column_name in EXPERIMENT_COLUMN_NAMES])
+
+            with closing(self.get_connection()) as connection, connection:
+                connection.executemany(self.get_upsert_query(), rows)
+                connection.execute("INSERT INTO store_meta (key, value) VALUES (?, ?)",
+                                   [CSV_IMPORTED_KEY, csv_file_path])
+            logger.info(f"Imported {len(rows)} experiments from [{csv_file_path}] into [{self.db_file_path}]")
+            return len(rows)
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
@@ -0,0 +1,128 @@
+from concrete.exception import ConcreteException
+from concrete.logger import get_logger
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import sys
+
+logger = get_logger(__name__)
+
+
+class PredictionQueueFull(Exception):
+    """
+    Raised when a row can not be queued because max_pending_requests rows are waiting, the server is busy.
+    """
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single row predictions of an asyncio server into vectorized predict calls.
+
+    Rows are put on a bounded queue and a dispatcher task takes them in batches: after the first row it waits
+    max_batch_delay seconds for more rows (unless a full batch is already queued) and hands up to
+    max_batch_size rows to one predict call on a thread pool. At most executor_workers batches run at a time,
+    while they run new rows keep queueing so batches grow with the load. The event loop only moves rows and
+    results, scoring and model reloads never block it.
+    """
+
+    def __init__(self, predict_function, max_batch_size: int = 64, max_batch_delay: float = 0.002,
+                 executor_workers: int = 2, max_pending_requests: int = 1024):
+        """
+        param predict_function: callable scoring a list of rows, returns one prediction per row
+        param max_pending_requests: rows waiting for a batch after which new requests are rejected
+        """
+        try:
+            self.predict_function = predict_function
+            self.max_batch_size = max_batch_size
+            self.max_batch_delay = max_batch_delay
+            self.executor_workers = executor_workers
+            self.max_pending_requests = max_pending_requests
+            self.executor = ThreadPoolExecutor(max_workers=executor_workers, thread_name_prefix="prediction")
+            self.queue: asyncio.Queue = None
+            self.executor_slots: asyncio.Semaphore = None
+            self.dispatcher_task: asyncio.Task = None
+            self.batch_count = 0
+            self.row_count = 0
+            self.rejected_count = 0
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    async def start(self):
+        # queue and semaphore belong to the running loop
+        self.queue = asyncio.Queue(maxsize=self.max_pending_requests)
+        self.executor_slots = asyncio.Semaphore(self.executor_workers)
+        self.dispatcher_task = asyncio.get_running_loop().create_task(self.dispatch())
+
+    async def close(self):
+        if self.dispatcher_task is not None:
+            self.dispatcher_task.cancel()
+            try:
+                await self.dispatcher_task
+            except asyncio.CancelledError:
+                pass
+        self.executor.shutdown(wait=True)
+
+    async def predict(self, row: list):
+        """
+        Description: Function is used to score one row as part of the next batch
+        return: prediction of the row, PredictionQueueFull is raised if the queue is full
+        """
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((row, future))
+        except asyncio.QueueFull:
+            self.rejected_count += 1
+            raise PredictionQueueFull(f"Prediction queue is full: {self.max_pending_requests} pending requests")
+        try:
+            return await future
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    async def run_in_executor(self, function, *args):
+        """
+        Description: Function is used to run other scoring work (e.g. a batch request) on the same bounded
+                     thread pool as the micro batches
+        """
+        async with self.executor_slots:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def dispatch(self):
+        while True:
+            await self.executor_slots.acquire()
+            try:
+                batch = [await self.queue.get()]
+                if self.queue.qsize() < self.max_batch_size - 1:
+                    await asyncio.sleep(self.max_batch_delay)
+                while len(batch) < self.max_batch_size and not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+            except BaseException:
+                self.executor_slots.release()
+                raise
+            asyncio.get_running_loop().create_task(self.run_batch(batch))
+
+    async def run_batch(self, batch: list):
+        try:
+            rows = [row for row, _ in batch]
+            predictions = await asyncio.get_running_loop().run_in_executor(self.executor, self.predict_function,
+                                                                           rows)
+            self.batch_count += 1
+            self.row_count += len(rows)
+            for (_, future), prediction in zip(batch, predictions):
+                # future is cancelled when the client went away
+                if not future.done():
+                    future.set_result(prediction)
+        except Exception as e:
+            logger.exception(e)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self.executor_slots.release()
+
+    def get_stats(self) -> dict:
+        return {
+            "batches": self.batch_count,
+            "rows": self.row_count,
+            "mean_batch_size": self.row_count / self.batch_count if self.batch_count else None,
+            "pending": 0 if self.queue is None else self.queue.qsize(),
+            "rejected": self.rejected_count,
+        }
@@ -0,0 +1,162 @@
+from concrete.exception import ConcreteException
+from concrete.entity.compiled_model import load_model
+from concrete.entity.serving_metrics import observe_model_load
+from concrete.logger import get_logger
+from collections import namedtuple
+from threading import Lock
+import os, sys
+import time
+
+logger = get_logger(__name__)
+
+CachedModel = namedtuple("CachedModel", ["model_path", "model", "loaded_at"])
+
+
+class ModelCache:
+    """
+    Process wide cache of the deserialized serving model.
+
+    The loaded model is kept in memory and the model directory is checked at most once every
+    check_interval seconds with a single os.stat call. When a new model version is pushed it is fully
+    loaded first and only then swapped in with one reference assignment, so a request always sees
+    either the old or the new model and never a half loaded one.
+    """
+    _instances = {}
+    _instances_lock = Lock()
+
+    def __init__(self, model_dir: str, check_interval: float = 1.0):
+        try:
+            self.model_dir = model_dir
+            self.check_interval = check_interval
+            self._cached_model: CachedModel = None
+            self._model_dir_mtime = None
+            self._last_check_time = 0.0
+            self._load_lock = Lock()
+            # counters have their own lock, hits are counted without waiting for a model being loaded
+            self._stats_lock = Lock()
+            self.hits = 0
+            self.misses = 0
+            self.reloads = 0
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    @classmethod
+    def get_instance(cls, model_dir: str, check_interval: float = 1.0) -> "ModelCache":
+        """
+        Description: Function is used to get the cache shared by every predictor of the process
+        param model_dir: directory where models are exported by model pusher
+        return: ModelCache of the model directory
+        """
+        try:
+            model_dir = os.path.abspath(model_dir)
+            model_cache = cls._instances.get(model_dir)
+            if model_cache is None:
+                with cls._instances_lock:
+                    model_cache = cls._instances.setdefault(model_dir, cls(model_dir=model_dir,
+                                                                           check_interval=check_interval))
+            return model_cache
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def is_check_due(self) -> bool:
+        now = time.monotonic()
+        if now - self._last_check_time < self.check_interval:
+            return False
+        self._last_check_time = now
+        return os.stat(self.model_dir).st_mtime_ns != self._model_dir_mtime
+
+    def get_current_model_path(self):
+        """
+        Description: Function is used to get the path of the loaded model without loading anything
+        return: model path or None if no model is loaded or the model directory changed since the last check
+        """
+        cached_model = self._cached_model
+        if cached_model is None:
+            return None
+        if time.monotonic() - self._last_check_time >= self.check_interval and \
+                os.stat(self.model_dir).st_mtime_ns != self._model_dir_mtime:
+            return None
+        return cached_model.model_path
+
+    def add_count(self, counter_name: str):
+        with self._stats_lock:
+            setattr(self, counter_name, getattr(self, counter_name) + 1)
+
+    def get_model_version(self, model_path: str) -> str:
+        # version dir of the model in the model directory
+        return os.path.relpath(model_path, self.model_dir).split(os.sep)[0]
+
+    def get_model(self, model_path_resolver):
+        """
+        Description: Function is used to get the latest model, loading it only when a new version is found
+        param model_path_resolver: callable returning the path of the latest model
+        return: deserialized model object
+        """
+        try:
+            return self.get_cached_model(model_path_resolver=model_path_resolver).model
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def get_cached_model(self, model_path_resolver) -> CachedModel:
+        """
+        Description: Function is used to get the latest model with its path, see get_model
+        """
+        try:
+            cached_model = self._cached_model
+            if cached_model is not None and not self.is_check_due():
+                self.add_count("hits")
+                return cached_model
+
+            with self._load_lock:
+                cached_model = self._cached_model
+                model_dir_mtime = os.stat(self.model_dir).st_mtime_ns
+                if cached_model is not None and model_dir_mtime == self._model_dir_mtime:
+                    self.add_count("hits")
+                    return cached_model
+                try:
+                    model_path = model_path_resolver()
+                    if cached_model is not None and model_path == cached_model.model_path:
+                        self._model_dir_mtime = model_dir_mtime
+                        self.add_count("hits")
+                        return cached_model
+                    logger.info(f"Loading model: [{model_path}]")
+                    load_start_time = time.perf_counter()
+                    model = load_model(model_path=model_path)
+                    load_duration = time.perf_counter() - load_start_time
+                except Exception as e:
+                    if cached_model is None:
+                        raise e
+                    # new model is still being pushed, keep serving the current one and retry on next check
+                    logger.info(f"Keeping model: [{cached_model.model_path}], new model is not ready: {e}")
+                    self.add_count("hits")
+                    return cached_model
+
+                self._cached_model = CachedModel(model_path=model_path, model=model, loaded_at=time.time())
+                self._model_dir_mtime = model_dir_mtime
+                observe_model_load(duration=load_duration, model_version=self.get_model_version(model_path),
+                                   previous_model_version=None if cached_model is None else
+                                   self.get_model_version(cached_model.model_path))
+                if cached_model is None:
+                    self.add_count("misses")
+                else:
+                    self.add_count("reloads")
+                    logger.info(f"Swapped model: [{cached_model.model_path}] -> [{model_path}]")
+                return self._cached_model
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def get_stats(self) -> dict:
+        """
+        Description: Function is used to get the cache counters
+        return: hits, misses, reloads and the currently loaded model path
+        """
+        cached_model = self._cached_model
+        with self._stats_lock:
+            hits, misses, reloads = self.hits, self.misses, self.reloads
+        return {
+            "hits": hits,
+            "misses": misses,
+            "reloads": reloads,
+            "model_path": None if cached_model is None else cached_model.model_path,
+            "loaded_at": None if cached_model is None else cached_model.loaded_at,
+        }
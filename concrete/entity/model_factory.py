@@ -1,13 +1,19 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from sklearn.metrics import r2_score, mean_squared_error
+from sklearn.model_selection import ParameterGrid
 from concrete.exception import ConcreteException
-from concrete.logger import logging
+from concrete.util.profiler import Profiler, profile_step
+from concrete.logger import get_logger
 from collections import namedtuple
+from joblib import cpu_count
 from typing import List
 import numpy as np
 import importlib
+import mmap
 import os, sys
 import yaml
 
+logger = get_logger(__name__)
 
 GRID_SEARCH_KEY = 'grid_search'
 MODULE_KEY = 'module'
@@ -15,6 +21,14 @@ CLASS_KEY = 'class'
 PARAM_KEY = 'params'
 MODEL_SELECTION_KEY = 'model_selection'
 SEARCH_PARAM_GRID_KEY = "search_param_grid"
+EXECUTION_KEY = "execution"
+EXECUTION_MODE_KEY = "mode"
+N_JOBS_KEY = "n_jobs"
+
+EXECUTION_MODE_SERIAL = "serial"
+EXECUTION_MODE_THREADS = "threads"
+EXECUTION_MODE_PROCESSES = "processes"
+EXECUTION_MODES = [EXECUTION_MODE_SERIAL, EXECUTION_MODE_THREADS, EXECUTION_MODE_PROCESSES]
 
 InitializedModelDetail = namedtuple("InitializedModelDetail",
                                     ["model_serial_number", "model", "param_grid_search", "model_name"])
@@ -32,6 +46,8 @@ BestModel = namedtuple("BestModel", ["model_serial_number",
                                      "best_parameters",
                                      "best_score", ])
 
+SharedArray = namedtuple("SharedArray", ["file_path", "dtype", "shape", "offset", "order"])
+
 MetricInfoArtifact = namedtuple("MetricInfoArtifact",
                                 ["model_name", "model_object", "train_rmse", "test_rmse", "train_accuracy",
                                  "test_accuracy", "model_accuracy", "index_number"])
@@ -62,11 +78,12 @@ def evaluate_regression_model(model_list: list, X_train: np.ndarray, y_train: np
         metric_info_artifact = None
         for model in model_list:
             model_name = str(model)  # getting model name based on model object
-            logging.info(f"{'>>' * 30}Started evaluating model: [{type(model).__name__}] {'<<' * 30}")
+            logger.debug("Started evaluating model: [%s]", type(model).__name__)
 
             # Getting prediction for training and testing dataset
-            y_train_pred = model.predict(X_train)
-            y_test_pred = model.predict(X_test)
+            with profile_step(f"evaluate {type(model).__name__}"):
+                y_train_pred = model.predict(X_train)
+                y_test_pred = model.predict(X_test)
 
             # Calculating r squared score on training and testing dataset
             train_acc = r2_score(y_train, y_train_pred)
@@ -80,15 +97,10 @@ def evaluate_regression_model(model_list: list, X_train: np.ndarray, y_train: np
             model_accuracy = (2 * (train_acc * test_acc)) / (train_acc + test_acc)
             diff_test_train_acc = abs(test_acc - train_acc)
 
-            # logging all important metric
-            logging.info(f"{'>>' * 30} Score {'<<' * 30}")
-            logging.info(f"Train Score\t\t Test Score\t\t Average Score")
-            logging.info(f"{train_acc}\t\t {test_acc}\t\t{model_accuracy}")
-
-            logging.info(f"{'>>' * 30} Loss {'<<' * 30}")
-            logging.info(f"Diff test train accuracy: [{diff_test_train_acc}].")
-            logging.info(f"Train root mean squared error: [{train_rmse}].")
-            logging.info(f"Test root mean squared error: [{test_rmse}].")
+            # logging all important metric, formatted only if the record is written
+            logger.info("Model: [%s] train score: [%s] test score: [%s] average score: [%s] "
+                        "diff test train accuracy: [%s] train rmse: [%s] test rmse: [%s]", type(model).__name__,
+                        train_acc, test_acc, model_accuracy, diff_test_train_acc, train_rmse, test_rmse)
 
             # if model accuracy is greater than base accuracy and train and test score is within certain threshold
             # we will accept that model as accepted model
@@ -103,10 +115,10 @@ def evaluate_regression_model(model_list: list, X_train: np.ndarray, y_train: np
                                                           model_accuracy=model_accuracy,
                                                           index_number=index_number)
 
-                logging.info(f"Acceptable model found {metric_info_artifact}. ")
+                logger.info("Acceptable model found %s. ", metric_info_artifact)
             index_number += 1
         if metric_info_artifact is None:
-            logging.info(f"No model found with higher accuracy than base accuracy")
+            logger.info("No model found with higher accuracy than base accuracy")
         return metric_info_artifact
     except Exception as e:
         raise ConcreteException(e, sys) from e
@@ -124,6 +136,10 @@ def get_sample_model_config_yaml_file(export_dir: str):
                 }
 
             },
+            EXECUTION_KEY: {
+                EXECUTION_MODE_KEY: EXECUTION_MODE_SERIAL,
+                N_JOBS_KEY: -1
+            },
             MODEL_SELECTION_KEY: {
                 "module_0": {
                     MODULE_KEY: "module_of_model",
@@ -146,6 +162,67 @@ def get_sample_model_config_yaml_file(export_dir: str):
         raise ConcreteException(e, sys)
 
 
+def get_worker_allocation(candidate_counts: List[int], n_jobs: int) -> List[int]:
+    """
+    Description: Function is used to split the global worker budget between parallel searches,
+                 every search gets one worker and the remaining workers are shared in proportion
+                 to the number of candidates of each search
+    param candidate_counts: number of parameter candidates of each search
+    param n_jobs: global worker budget
+    return: number of workers given to each search
+    """
+    spare_workers = n_jobs - len(candidate_counts)
+    if spare_workers <= 0:
+        return [1] * len(candidate_counts)
+    total_candidates = sum(candidate_counts)
+    return [1 + (spare_workers * candidate_count) // total_candidates for candidate_count in candidate_counts]
+
+
+def get_shared_array(array):
+    """
+    Description: Function is used to replace an array memory mapped from a whole .npy file by a reference to
+                 the file, so it is reopened by a worker process instead of being pickled byte by byte
+    return: SharedArray for a memory mapped file otherwise the array itself
+    """
+    if isinstance(array, np.memmap) and isinstance(array.base, mmap.mmap) and array.filename is not None:
+        return SharedArray(file_path=array.filename, dtype=array.dtype.str, shape=array.shape, offset=array.offset,
+                           order="F" if array.flags.f_contiguous and not array.flags.c_contiguous else "C")
+    return array
+
+
+def load_shared_array(array):
+    """
+    Description: Function is used to reopen a SharedArray read only in the worker process
+    """
+    if isinstance(array, SharedArray):
+        return np.memmap(array.file_path, dtype=np.dtype(array.dtype), mode="r", shape=tuple(array.shape),
+                         offset=array.offset, order=array.order)
+    return array
+
+
+def execute_grid_search_operation_in_process(model_factory, initialized_model, input_feature, output_feature,
+                                             n_jobs, is_profiled: bool = False):
+    """
+    Description: Function is used as the entry point of a search running in a worker process, exceptions are
+                 re-raised as plain Exception since ConcreteException can not be unpickled in the parent process
+    param is_profiled: True to record the steps of the search with a profiler of the worker process
+    return: GridSearchedBestModel, with the recorded steps (GridSearchedBestModel, [ProfileStep]) if is_profiled
+    """
+    profiler = Profiler().start() if is_profiled else None
+    try:
+        grid_searched_best_model = model_factory.execute_grid_search_operation(
+            initialized_model=initialized_model,
+            input_feature=load_shared_array(input_feature),
+            output_feature=load_shared_array(output_feature),
+            n_jobs=n_jobs)
+    except Exception as e:
+        raise Exception(str(e))
+    finally:
+        if profiler is not None:
+            profiler.stop()
+    return grid_searched_best_model if profiler is None else (grid_searched_best_model, profiler.get_steps())
+
+
 class ModelFactory:
     def __init__(self, model_config_path: str = None, ):
         try:
@@ -157,6 +234,13 @@ class ModelFactory:
 
             self.models_initialization_config: dict = dict(self.config[MODEL_SELECTION_KEY])
 
+            execution_config: dict = dict(self.config.get(EXECUTION_KEY) or {})
+            self.execution_mode: str = execution_config.get(EXECUTION_MODE_KEY, EXECUTION_MODE_SERIAL)
+            if self.execution_mode not in EXECUTION_MODES:
+                raise Exception(f"Execution mode: [{self.execution_mode}] is not one of {EXECUTION_MODES}")
+            n_jobs = int(execution_config.get(N_JOBS_KEY, 1))
+            self.n_jobs: int = cpu_count() if n_jobs < 1 else n_jobs
+
             self.initialized_model_list = None
             self.grid_searched_best_model_list = None
 
@@ -168,9 +252,9 @@ class ModelFactory:
         try:
             if not isinstance(property_data, dict):
                 raise Exception("property_data parameter required to dictionary")
-            print(property_data)
             for key, value in property_data.items():
-                logging.info(f"Executing:$ {str(instance_ref)}.{key}={value}")
+                # repr of an estimator is costly, it is only built when debug records are written
+                logger.debug("Executing:$ %s.%s=%s", instance_ref, key, value)
                 setattr(instance_ref, key, value)
             return instance_ref
         except Exception as e:
@@ -197,7 +281,7 @@ class ModelFactory:
             raise ConcreteException(e, sys) from e
 
     def execute_grid_search_operation(self, initialized_model: InitializedModelDetail, input_feature,
-                                      output_feature) -> GridSearchedBestModel:
+                                      output_feature, n_jobs: int = None) -> GridSearchedBestModel:
         """
         execute_grid_search_operation(): function will perform parameter search operation and
         it will return you the best optimistic  model with the best parameter:
@@ -205,6 +289,7 @@ class ModelFactory:
         param_grid: dictionary of parameter to perform search operation
         input_feature: your all input features
         output_feature: Target/Dependent features
+        n_jobs: number of workers evaluating the CV candidates, search params are used if None
         ================================================================================
         return: Function will return GridSearchOperation object
         """
@@ -218,12 +303,14 @@ class ModelFactory:
                                                 param_grid=initialized_model.param_grid_search)
             grid_search_cv = ModelFactory.update_property_of_class(grid_search_cv,
                                                                    self.grid_search_property_data)
+            if n_jobs is not None:
+                grid_search_cv.n_jobs = n_jobs
 
-            message: str = f'{">>" * 30} f"Training {type(initialized_model.model).__name__} Started." {"<<" * 30}'
-            logging.info(message)
+            logger.info("Training %s started.", type(initialized_model.model).__name__)
 
-            grid_search_cv.fit(input_feature, output_feature)
-            message = f'{">>" * 30} f"Training {type(initialized_model.model).__name__}" completed {"<<" * 30}'
+            with profile_step(f"fit {type(initialized_model.model).__name__}"):
+                grid_search_cv.fit(input_feature, output_feature)
+            logger.info("Training %s completed.", type(initialized_model.model).__name__)
             grid_searched_best_model = GridSearchedBestModel(model_serial_number=initialized_model.model_serial_number,
                                                              model=initialized_model.model,
                                                              best_model=grid_search_cv.best_estimator_,
@@ -295,15 +382,57 @@ class ModelFactory:
                                                               input_feature,
                                                               output_feature) -> List[GridSearchedBestModel]:
 
+        """
+        Searches of the models run one after another in serial mode. In threads and processes mode
+        all searches run at the same time and the worker budget is split between their CV candidates.
+        Results are always kept in config order so the selected best model does not depend on the mode.
+        """
         try:
-            self.grid_searched_best_model_list = []
-            for initialized_model_list in initialized_model_list:
-                grid_searched_best_model = self.initiate_best_parameter_search_for_initialized_model(
-                    initialized_model=initialized_model_list,
-                    input_feature=input_feature,
-                    output_feature=output_feature
-                )
-                self.grid_searched_best_model_list.append(grid_searched_best_model)
+            if self.execution_mode == EXECUTION_MODE_SERIAL or len(initialized_model_list) <= 1:
+                n_jobs = None if self.execution_mode == EXECUTION_MODE_SERIAL else self.n_jobs
+                self.grid_searched_best_model_list = []
+                for initialized_model in initialized_model_list:
+                    grid_searched_best_model = self.execute_grid_search_operation(
+                        initialized_model=initialized_model,
+                        input_feature=input_feature,
+                        output_feature=output_feature,
+                        n_jobs=n_jobs
+                    )
+                    self.grid_searched_best_model_list.append(grid_searched_best_model)
+                return self.grid_searched_best_model_list
+
+            candidate_counts = [len(ParameterGrid(initialized_model.param_grid_search))
+                                for initialized_model in initialized_model_list]
+            worker_allocation = get_worker_allocation(candidate_counts=candidate_counts, n_jobs=self.n_jobs)
+            logger.info("Running %s searches with [%s], workers per search: %s", len(initialized_model_list),
+                        self.execution_mode, worker_allocation)
+
+            if self.execution_mode == EXECUTION_MODE_THREADS:
+                with ThreadPoolExecutor(max_workers=min(len(initialized_model_list), self.n_jobs)) as executor:
+                    futures = [executor.submit(self.execute_grid_search_operation,
+                                               initialized_model=initialized_model,
+                                               input_feature=input_feature,
+                                               output_feature=output_feature,
+                                               n_jobs=n_jobs)
+                               for initialized_model, n_jobs in zip(initialized_model_list, worker_allocation)]
+                    self.grid_searched_best_model_list = [future.result() for future in futures]
+            else:
+                # memory mapped inputs are passed by file reference so every process shares the page cache copy
+                shared_input_feature = get_shared_array(input_feature)
+                shared_output_feature = get_shared_array(output_feature)
+                profiler = Profiler.active
+                with ProcessPoolExecutor(max_workers=min(len(initialized_model_list), self.n_jobs)) as executor:
+                    futures = [executor.submit(execute_grid_search_operation_in_process, self,
+                                               initialized_model, shared_input_feature, shared_output_feature,
+                                               n_jobs, profiler is not None)
+                               for initialized_model, n_jobs in zip(initialized_model_list, worker_allocation)]
+                    self.grid_searched_best_model_list = [future.result() for future in futures]
+                if profiler is not None:
+                    # steps recorded in the worker processes are returned with their search result
+                    for grid_searched_best_model, steps in self.grid_searched_best_model_list:
+                        profiler.merge_steps(steps)
+                    self.grid_searched_best_model_list = [grid_searched_best_model for grid_searched_best_model, _
+                                                          in self.grid_searched_best_model_list]
             return self.grid_searched_best_model_list
         except Exception as e:
             raise ConcreteException(e, sys) from e
@@ -329,22 +458,22 @@ class ModelFactory:
             best_model = None
             for grid_searched_best_model in grid_searched_best_model_list:
                 if base_accuracy < grid_searched_best_model.best_score:
-                    logging.info(f"Acceptable model found:{grid_searched_best_model}")
+                    logger.info("Acceptable model found:%s", grid_searched_best_model)
                     base_accuracy = grid_searched_best_model.best_score
 
                     best_model = grid_searched_best_model
             if not best_model:
                 raise Exception(f"None of Model has base accuracy: {base_accuracy}")
-            logging.info(f"Best model: {best_model}")
+            logger.info("Best model: %s", best_model)
             return best_model
         except Exception as e:
             raise ConcreteException(e, sys) from e
 
     def get_best_model(self, X, y, base_accuracy=0.6) -> BestModel:
         try:
-            logging.info("Started Initializing model from config file")
+            logger.info("Started Initializing model from config file")
             initialized_model_list = self.get_initialized_model_list()
-            logging.info(f"Initialized model: {initialized_model_list}")
+            logger.info("Initialized model: %s", initialized_model_list)
             grid_searched_best_model_list = self.initiate_best_parameter_search_for_initialized_models(
                 initialized_model_list=initialized_model_list,
                 input_feature=X,
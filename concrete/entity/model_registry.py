@@ -0,0 +1,231 @@
+from concrete.exception import ConcreteException
+from concrete.constant import ROOT_DIR, SAVED_MODELS_DIR_NAME, COMPILED_MODEL_FILE_NAME, \
+    MODEL_REGISTRY_CURRENT_FILE_NAME, MODEL_MANIFEST_FILE_NAME
+from concrete.util.util import get_file_hash
+from concrete.logger import get_logger, configure_logging
+from collections import namedtuple
+from datetime import datetime
+import argparse
+import json
+import os, sys
+
+logger = get_logger(__name__)
+
+CurrentModel = namedtuple("CurrentModel", ["version", "model_path", "is_pinned"])
+
+
+def write_json_file(file_path: str, content: dict):
+    # written next to the target and renamed so readers see either the old or the new file
+    temp_file_path = f"{file_path}.{os.getpid()}.tmp"
+    with open(temp_file_path, "w") as json_file:
+        json.dump(content, json_file, indent=4, default=str)
+    os.replace(temp_file_path, file_path)
+
+
+def write_manifest(version_dir: str, version: str, model_file_name: str, metrics: dict = None) -> dict:
+    """
+    Description: Function is used to describe an exported model version in its manifest.json
+    param model_file_name: file of the version dir served for predictions
+    param metrics: training metrics of the model
+    return: manifest
+    """
+    try:
+        files = {}
+        for dir_path, _, file_names in os.walk(version_dir):
+            for file_name in file_names:
+                file_path = os.path.join(dir_path, file_name)
+                relative_path = os.path.relpath(file_path, version_dir).replace(os.sep, "/")
+                if relative_path != MODEL_MANIFEST_FILE_NAME:
+                    files[relative_path] = get_file_hash(file_path)
+        manifest = {
+            "version": version,
+            "created_time": str(datetime.now()),
+            "model_file_name": model_file_name,
+            "files": dict(sorted(files.items())),
+            "metrics": metrics or {},
+        }
+        write_json_file(os.path.join(version_dir, MODEL_MANIFEST_FILE_NAME), manifest)
+        return manifest
+    except Exception as e:
+        raise ConcreteException(e, sys) from e
+
+
+class ModelRegistry:
+    """
+    Registry of the model versions exported to saved_models.
+
+    Every version dir holds a manifest.json (version, served file, file hashes and metrics) and the CURRENT
+    file of the model dir points at the served version. CURRENT is replaced atomically, so resolving the
+    served model is one small read and promoting, pinning or rolling back a version only rewrites the pointer,
+    no model file is copied. A pinned version stays current when new versions are pushed until it is unpinned.
+    Model dirs exported before the registry existed have no CURRENT file, the latest version dir is served.
+    """
+
+    def __init__(self, model_dir: str):
+        try:
+            self.model_dir = model_dir
+            self.current_file_path = os.path.join(model_dir, MODEL_REGISTRY_CURRENT_FILE_NAME)
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def get_versions(self) -> list:
+        """
+        Description: Function is used to get the exported versions, oldest first, stray files and staging dirs
+                     are ignored
+        """
+        try:
+            if not os.path.isdir(self.model_dir):
+                return []
+            return sorted((entry.name for entry in os.scandir(self.model_dir)
+                           if entry.is_dir() and entry.name.isdigit()), key=int)
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def get_manifest(self, version: str):
+        """
+        Description: Function is used to read the manifest of a version
+        return: manifest or None for versions exported before the registry existed
+        """
+        try:
+            manifest_file_path = os.path.join(self.model_dir, version, MODEL_MANIFEST_FILE_NAME)
+            if not os.path.exists(manifest_file_path):
+                return None
+            with open(manifest_file_path) as manifest_file:
+                return json.load(manifest_file)
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def get_model_file_name(self, version: str) -> str:
+        manifest = self.get_manifest(version)
+        if manifest is not None:
+            return manifest["model_file_name"]
+        file_names = sorted(file_name for file_name in os.listdir(os.path.join(self.model_dir, version))
+                            if file_name != MODEL_MANIFEST_FILE_NAME)
+        return COMPILED_MODEL_FILE_NAME if COMPILED_MODEL_FILE_NAME in file_names else file_names[0]
+
+    def get_current(self) -> CurrentModel:
+        """
+        Description: Function is used to resolve the served model version with one read of the CURRENT file
+        """
+        try:
+            try:
+                with open(self.current_file_path) as current_file:
+                    current = json.load(current_file)
+                return CurrentModel(version=current["version"],
+                                    model_path=os.path.join(self.model_dir, current["version"],
+                                                            current["model_file_name"]),
+                                    is_pinned=current["is_pinned"])
+            except FileNotFoundError:
+                pass
+            versions = self.get_versions()
+            if not versions:
+                raise Exception(f"No model version found in [{self.model_dir}]")
+            version = versions[-1]
+            return CurrentModel(version=version,
+                                model_path=os.path.join(self.model_dir, version, self.get_model_file_name(version)),
+                                is_pinned=False)
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def get_current_model_path(self) -> str:
+        return self.get_current().model_path
+
+    def verify_version(self, version: str):
+        """
+        Description: Function is used to check that the files of a version match the hashes of its manifest
+        """
+        try:
+            manifest = self.get_manifest(version)
+            if manifest is None:
+                return
+            for file_name, file_hash in manifest["files"].items():
+                if get_file_hash(os.path.join(self.model_dir, version, *file_name.split("/"))) != file_hash:
+                    raise Exception(f"File [{file_name}] of model version [{version}] does not match its manifest")
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def set_current(self, version: str, is_pinned: bool = False) -> CurrentModel:
+        """
+        Description: Function is used to point CURRENT at a version
+        """
+        try:
+            if version not in self.get_versions():
+                raise Exception(f"Model version [{version}] not found in [{self.model_dir}]")
+            self.verify_version(version)
+            model_file_name = self.get_model_file_name(version)
+            write_json_file(self.current_file_path, {"version": version, "model_file_name": model_file_name,
+                                                     "is_pinned": is_pinned, "updated_time": str(datetime.now())})
+            logger.info(f"Current model version: [{version}], pinned: [{is_pinned}]")
+            return CurrentModel(version=version, model_path=os.path.join(self.model_dir, version, model_file_name),
+                                is_pinned=is_pinned)
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def promote(self, version: str) -> bool:
+        """
+        Description: Function is used to serve a newly pushed version unless another version is pinned
+        return: True if the version is current
+        """
+        try:
+            if os.path.exists(self.current_file_path) and self.get_current().is_pinned:
+                logger.info(f"Model version [{version}] is registered but not served, "
+                             f"version [{self.get_current().version}] is pinned")
+                return False
+            self.set_current(version)
+            return True
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def pin(self, version: str) -> CurrentModel:
+        return self.set_current(version, is_pinned=True)
+
+    def unpin(self) -> CurrentModel:
+        """
+        Description: Function is used to go back to serving the latest version
+        """
+        try:
+            return self.set_current(self.get_versions()[-1])
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def rollback(self) -> CurrentModel:
+        """
+        Description: Function is used to pin the version pushed before the current one
+        """
+        try:
+            versions = self.get_versions()
+            current_index = versions.index(self.get_current().version)
+            if current_index == 0:
+                raise Exception(f"No model version older than [{versions[0]}] to roll back to")
+            return self.pin(versions[current_index - 1])
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List, pin and roll back exported model versions.")
+    parser.add_argument("command", choices=["list", "pin", "unpin", "rollback"])
+    parser.add_argument("version", nargs="?", help="version to pin")
+    parser.add_argument("--model-dir", default=os.path.join(ROOT_DIR, SAVED_MODELS_DIR_NAME))
+    args = parser.parse_args()
+    configure_logging()
+
+    model_registry = ModelRegistry(model_dir=args.model_dir)
+    if args.command == "pin":
+        if args.version is None:
+            parser.error("pin needs a version")
+        model_registry.pin(args.version)
+    elif args.command == "unpin":
+        model_registry.unpin()
+    elif args.command == "rollback":
+        model_registry.rollback()
+
+    current = model_registry.get_current()
+    for version in model_registry.get_versions():
+        manifest = model_registry.get_manifest(version) or {}
+        marker = ("* pinned" if current.is_pinned else "*") if version == current.version else ""
+        print(f"{version:<16} {marker:<9} {manifest.get('model_file_name', ''):<20} {manifest.get('metrics', {})}")
+
+
+if __name__ == "__main__":
+    main()
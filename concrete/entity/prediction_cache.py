@@ -0,0 +1,116 @@
+from concrete.exception import ConcreteException
+from concrete.entity.serving_metrics import observe_prediction_cache_lookup
+from collections import OrderedDict, namedtuple
+from threading import Lock
+import os, sys
+import time
+
+CachedPrediction = namedtuple("CachedPrediction", ["value", "expires_at"])
+
+
+class PredictionCache:
+    """
+    Process wide LRU/TTL cache of single row predictions.
+
+    The key is the input row normalized to a tuple of floats rounded to `decimals`, the cache holds the
+    predictions of one model version and is cleared as soon as a prediction of another version is requested
+    or stored, so a new model in saved_models invalidates it. Entries expire after ttl seconds and the least
+    recently used entry is evicted above max_size entries.
+    """
+    _instances = {}
+    _instances_lock = Lock()
+
+    def __init__(self, max_size: int = 10000, ttl: float = 3600, decimals: int = 3):
+        try:
+            self.max_size = max_size
+            self.ttl = ttl
+            self.decimals = decimals
+            self.model_version = None
+            self._predictions = OrderedDict()
+            self._lock = Lock()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.invalidations = 0
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    @classmethod
+    def get_instance(cls, model_dir: str, max_size: int = 10000, ttl: float = 3600,
+                     decimals: int = 3) -> "PredictionCache":
+        """
+        Description: Function is used to get the cache shared by every predictor of the model directory
+        """
+        try:
+            model_dir = os.path.abspath(model_dir)
+            prediction_cache = cls._instances.get(model_dir)
+            if prediction_cache is None:
+                with cls._instances_lock:
+                    prediction_cache = cls._instances.setdefault(model_dir, cls(max_size=max_size, ttl=ttl,
+                                                                                decimals=decimals))
+            return prediction_cache
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def get_key(self, values: list) -> tuple:
+        """
+        Description: Function is used to normalize an input row, 28 and 28.0004 give the same key with 3 decimals
+        """
+        return tuple(round(float(value), self.decimals) for value in values)
+
+    def _set_model_version(self, model_version: str):
+        # called holding the lock
+        if model_version != self.model_version:
+            if self._predictions:
+                self.invalidations += 1
+            self._predictions.clear()
+            self.model_version = model_version
+
+    def get(self, model_version: str, key: tuple):
+        """
+        Description: Function is used to get the cached prediction of the key for the model version
+        param model_version: None when the current model version is not known, counted as a miss
+        return: prediction or None if not cached
+        """
+        with self._lock:
+            if model_version is None:
+                self.misses += 1
+                observe_prediction_cache_lookup(is_hit=False)
+                return None
+            self._set_model_version(model_version)
+            cached_prediction = self._predictions.get(key)
+            if cached_prediction is None or cached_prediction.expires_at < time.monotonic():
+                if cached_prediction is not None:
+                    del self._predictions[key]
+                self.misses += 1
+                observe_prediction_cache_lookup(is_hit=False)
+                return None
+            self._predictions.move_to_end(key)
+            self.hits += 1
+            observe_prediction_cache_lookup(is_hit=True)
+            return cached_prediction.value
+
+    def put(self, model_version: str, key: tuple, value: float):
+        with self._lock:
+            self._set_model_version(model_version)
+            self._predictions[key] = CachedPrediction(value=value, expires_at=time.monotonic() + self.ttl)
+            self._predictions.move_to_end(key)
+            while len(self._predictions) > self.max_size:
+                self._predictions.popitem(last=False)
+                self.evictions += 1
+
+    def get_stats(self) -> dict:
+        """
+        Description: Function is used to get the cache counters
+        return: hits, misses, hit rate, evictions, invalidations and size
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "size": len(self._predictions),
+            "model_version": self.model_version,
+        }
@@ -2,12 +2,49 @@ import os
 import sys
 
 from concrete.exception import ConcreteException
-from concrete.util.util import load_object
+from concrete.entity.model_cache import ModelCache, CachedModel
+from concrete.entity.model_registry import ModelRegistry
+from concrete.entity.prediction_cache import PredictionCache
+from concrete.entity.config_entity import ServingConfig
+from concrete.constant import SCHEMA_COLUMNS_KEY, TARGET_COLUMNS_KEY
+from concrete.util.util import read_yaml_file
+from collections import namedtuple
+from typing import List, Tuple
 
+import numpy as np
 import pandas as pd
 
+WATER_CEMENT_RATIO_KEY = "water_cement_ratio"
+MAX_SWEEP_ROWS = 1000000
+
+SweepResult = namedtuple("SweepResult", ["axes", "surface"])
+
+
+def get_sweep_values(sweep_range) -> np.ndarray:
+    """
+    Description: Function is used to expand the range of a swept input
+    param sweep_range: list of values, {"start", "stop", "step"} with stop included or {"start", "stop", "num"}
+    """
+    try:
+        if isinstance(sweep_range, dict):
+            if "start" not in sweep_range or "stop" not in sweep_range:
+                raise ValueError(f"Sweep range needs start and stop: {sweep_range}")
+            start, stop = float(sweep_range["start"]), float(sweep_range["stop"])
+            if "num" in sweep_range:
+                return np.linspace(start, stop, int(sweep_range["num"]))
+            step = float(sweep_range.get("step", 1))
+            if step <= 0:
+                raise ValueError(f"Sweep step must be positive: {step}")
+            return start + step * np.arange(int(np.floor((stop - start) / step + 1e-9)) + 1)
+        return np.asarray(sweep_range, dtype=np.float64).ravel()
+    except Exception as e:
+        raise ConcreteException(e, sys) from e
+
 
 class ConcreteData:
+    # input columns in the order of the training data
+    input_columns = ['cement', 'blast_furnace_slag', 'fly_ash', 'water', 'superplasticizer', 'coarse_aggregate',
+                     'fine_aggregate', 'age']
 
     def __init__(self,
                  cement: float,
@@ -46,30 +83,255 @@ class ConcreteData:
         except Exception as e:
             raise ConcreteException(e, sys) from e
 
+    def get_concrete_input_values(self) -> list:
+        """
+        Description: Function is used to get the input values in the order of input_columns, rows of several
+                     requests can be stacked into one batch without building a dataframe per request
+        """
+        return [getattr(self, column) for column in self.input_columns]
+
+    @classmethod
+    def from_dict(cls, data) -> "ConcreteData":
+        """
+        Description: Function is used to build the input from a form or json object, age is an integer
+        """
+        try:
+            return cls(**{column: int(data[column]) if column == 'age' else float(data[column])
+                          for column in cls.input_columns})
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+
+class ConcreteBatchData:
+
+    def __init__(self, schema_file_path: str):
+        """
+        Description: Function is used to read the input columns of the batch from schema file
+        param schema_file_path: path of schema file, the target column is not expected in the batch
+        """
+        try:
+            schema = read_yaml_file(file_path=schema_file_path)
+            target_column_name = schema[TARGET_COLUMNS_KEY]
+            self.input_schema: dict = {column: dtype for column, dtype in schema[SCHEMA_COLUMNS_KEY].items()
+                                       if column != target_column_name}
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    @staticmethod
+    def get_data_frame_from_json(payload) -> pd.DataFrame:
+        """
+        Description: Function is used to convert json payload into dataframe
+        param payload: list of row objects or {"instances": [row objects]}
+        """
+        try:
+            if isinstance(payload, dict):
+                payload = payload.get("instances")
+            if not isinstance(payload, list):
+                raise Exception("Json payload must be a list of rows or an object with an 'instances' list")
+            return pd.DataFrame.from_records(payload)
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    @staticmethod
+    def get_data_frame_from_csv(csv_file) -> pd.DataFrame:
+        """
+        Description: Function is used to convert csv file (path or file like object) into dataframe
+        """
+        try:
+            return pd.read_csv(csv_file)
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def validate_input_data_frame(self, dataframe: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]:
+        """
+        Description: Function is used to validate all rows of the batch against schema file in one pass
+                     per column instead of one pass per row
+        return: dataframe with columns ordered and typed as per schema file
+                list of error messages, empty if batch is valid
+        """
+        try:
+            errors = []
+            columns = list(self.input_schema.keys())
+            dataframe.columns = dataframe.columns.astype(str).str.strip()
+
+            missing_columns = [column for column in columns if column not in dataframe.columns]
+            unknown_columns = [column for column in dataframe.columns if column not in self.input_schema]
+            if missing_columns:
+                errors.append(f"Missing columns: {missing_columns}")
+            if unknown_columns:
+                errors.append(f"Columns not in schema: {unknown_columns}")
+            if len(dataframe) == 0:
+                errors.append("Batch does not contain any row")
+            if errors:
+                return dataframe, errors
+
+            input_df = pd.DataFrame({column: pd.to_numeric(dataframe[column], errors="coerce")
+                                     for column in columns})
+            for column, dtype in self.input_schema.items():
+                invalid_rows = np.flatnonzero(input_df[column].isna().to_numpy())
+                if np.issubdtype(np.dtype(dtype), np.integer):
+                    values = input_df[column].to_numpy()
+                    invalid_rows = np.union1d(invalid_rows, np.flatnonzero(values != np.round(values)))
+                if len(invalid_rows) > 0:
+                    errors.append(f"Column: [{column}] expects {dtype}, invalid values at rows "
+                                  f"{invalid_rows[:10].tolist()}{' ...' if len(invalid_rows) > 10 else ''}")
+            if errors:
+                return input_df, errors
+
+            return input_df.astype(self.input_schema), errors
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
 
 class ConcretePredictor:
 
-    def __init__(self, model_dir: str):
+    def __init__(self, model_dir: str, serving_config: ServingConfig = None):
+        """
+        param serving_config: prediction cache settings, single row predictions are not cached if None
+        """
         try:
             self.model_dir = model_dir
+            self.model_registry = ModelRegistry(model_dir=model_dir)
+            self.model_cache = ModelCache.get_instance(model_dir=model_dir)
+            self.prediction_cache = None
+            if serving_config is not None and serving_config.prediction_cache_size > 0:
+                self.prediction_cache = PredictionCache.get_instance(
+                    model_dir=model_dir,
+                    max_size=serving_config.prediction_cache_size,
+                    ttl=serving_config.prediction_cache_ttl,
+                    decimals=serving_config.prediction_cache_decimals)
         except Exception as e:
             raise ConcreteException(e, sys) from e
 
     def get_latest_model_path(self):
+        """
+        Description: Function is used to get the model of the current version of the model registry
+        """
         try:
-            folder_name = list(map(int, os.listdir(self.model_dir)))
-            latest_model_dir = os.path.join(self.model_dir, f"{max(folder_name)}")
-            file_name = os.listdir(latest_model_dir)[0]
-            latest_model_path = os.path.join(latest_model_dir, file_name)
-            return latest_model_path
+            return self.model_registry.get_current_model_path()
         except Exception as e:
             raise ConcreteException(e, sys) from e
 
-    def predict(self, X):
+    def get_model(self):
+        """
+        Description: Function is used to get the latest model from the process wide model cache
+        return: compiled model or ConcreteEstimatorModel object
+        """
         try:
-            model_path = self.get_latest_model_path()
-            model = load_object(file_path=model_path)
+            return self.model_cache.get_model(model_path_resolver=self.get_latest_model_path)
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def get_cached_model(self) -> CachedModel:
+        """
+        Description: Function is used to resolve the latest model with its path, the model can be passed to the
+                     predict functions so that resolving and scoring are timed apart
+        """
+        try:
+            return self.model_cache.get_cached_model(model_path_resolver=self.get_latest_model_path)
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def predict(self, X, cached_model: CachedModel = None):
+        try:
+            model = self.get_model() if cached_model is None else cached_model.model
             median_house_value = model.predict(X)
             return median_house_value
         except Exception as e:
             raise ConcreteException(e, sys) from e
+
+    def predict_rows(self, rows: list, cached_model: CachedModel = None) -> np.ndarray:
+        """
+        Description: Function is used to score rows of input values ordered as ConcreteData.input_columns, with
+                     the prediction cache rows are scored as normalized by the cache and their predictions stored
+        param cached_model: model resolved by get_cached_model, resolved here if None
+        return: one prediction per row
+        """
+        try:
+            cached_model = cached_model or self.get_cached_model()
+            if self.prediction_cache is None:
+                return cached_model.model.predict(pd.DataFrame(rows, columns=ConcreteData.input_columns))
+            keys = [self.prediction_cache.get_key(row) for row in rows]
+            predictions = cached_model.model.predict(pd.DataFrame(keys, columns=ConcreteData.input_columns))
+            for key, prediction in zip(keys, predictions):
+                self.prediction_cache.put(cached_model.model_path, key, float(prediction))
+            return predictions
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def get_cached_prediction(self, row: list, model_version: str = None):
+        """
+        Description: Function is used to look up a row in the prediction cache without building a dataframe
+                     or loading a model
+        param model_version: path of the resolved model, the loaded model of the model cache if None
+        return: prediction or None if not cached or a new model may have been pushed
+        """
+        try:
+            if self.prediction_cache is None:
+                return None
+            return self.prediction_cache.get(model_version or self.model_cache.get_current_model_path(),
+                                             self.prediction_cache.get_key(row))
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def predict_row(self, row: list, cached_model: CachedModel = None) -> float:
+        try:
+            prediction = self.get_cached_prediction(row, model_version=None if cached_model is None
+                                                    else cached_model.model_path)
+            if prediction is None:
+                prediction = float(self.predict_rows([row], cached_model=cached_model)[0])
+            return prediction
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def predict_sweep(self, base: dict, sweep: dict, max_rows: int = MAX_SWEEP_ROWS) -> SweepResult:
+        """
+        Description: Function is used to score a base mix over the grid of swept inputs with a single model call,
+                     e.g. strength against age and water/cement ratio
+        param base: input values of the mix, swept inputs may be left out
+        param sweep: input column or water_cement_ratio -> range (see get_sweep_values), water_cement_ratio
+                     sets water to ratio * cement
+        return: SweepResult of the axes {name: values} and the surface of predictions with one dimension per axis,
+                ConcreteException caused by ValueError if the sweep is invalid
+        """
+        try:
+            unknown_inputs = [name for name in sweep
+                              if name not in ConcreteData.input_columns and name != WATER_CEMENT_RATIO_KEY]
+            if unknown_inputs:
+                raise ValueError(f"Inputs can not be swept: {unknown_inputs}, expected columns of "
+                                f"{ConcreteData.input_columns} or {WATER_CEMENT_RATIO_KEY}")
+            if WATER_CEMENT_RATIO_KEY in sweep and 'water' in sweep:
+                raise ValueError(f"Sweep either water or {WATER_CEMENT_RATIO_KEY}")
+            if not sweep:
+                raise ValueError("Sweep at least one input")
+            fixed_columns = [column for column in ConcreteData.input_columns if column not in sweep and
+                             not (column == 'water' and WATER_CEMENT_RATIO_KEY in sweep)]
+            missing_columns = [column for column in fixed_columns if column not in base]
+            if missing_columns:
+                raise ValueError(f"Base mix is missing inputs: {missing_columns}")
+
+            axes = {name: get_sweep_values(sweep_range) for name, sweep_range in sweep.items()}
+            shape = tuple(len(values) for values in axes.values())
+            row_count = int(np.prod(shape))
+            if row_count == 0 or row_count > max_rows:
+                raise ValueError(f"Sweep grid has {row_count} rows, expected 1 to {max_rows}")
+
+            # one row per grid point, columns of the fixed inputs are broadcast from the base mix
+            grid = np.meshgrid(*axes.values(), indexing="ij")
+            inputs = {column: np.full(row_count, float(base[column])) for column in fixed_columns}
+            inputs.update({name: values.ravel() for name, values in zip(axes, grid)})
+            if WATER_CEMENT_RATIO_KEY in inputs:
+                inputs['water'] = inputs.pop(WATER_CEMENT_RATIO_KEY) * inputs['cement']
+            input_df = pd.DataFrame({column: inputs[column] for column in ConcreteData.input_columns})
+
+            model = self.get_model()
+            surface = np.asarray(model.predict(input_df), dtype=np.float64).reshape(shape)
+            return SweepResult(axes=axes, surface=surface)
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def get_cache_stats(self) -> dict:
+        return self.model_cache.get_stats()
+
+    def get_prediction_cache_stats(self) -> dict:
+        return None if self.prediction_cache is None else self.prediction_cache.get_stats()
@@ -0,0 +1,196 @@
+from concrete.exception import ConcreteException
+from concrete.entity.experiment_store import ExperimentStore
+from concrete.constant import EXPERIMENT_STATUSES, EXPERIMENT_STATUS_RUNNING, EXPERIMENT_STATUS_COMPLETED, \
+    PROMETHEUS_MULTIPROC_DIR_ENV_KEY
+from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, REGISTRY, generate_latest, \
+    CONTENT_TYPE_LATEST
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client import multiprocess
+from contextlib import contextmanager
+from datetime import datetime
+import pandas as pd
+import os, sys
+import time
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+PHASE_PARSE = "parse"
+PHASE_VALIDATION = "validation"
+PHASE_MODEL_RESOLVE = "model_resolve"
+PHASE_PREDICT = "predict"
+
+# a cached single row prediction takes well under a millisecond, a large batch or a cold model seconds
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+MODEL_LOAD_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# with several gunicorn workers every process writes its samples to memory mapped files of the
+# PROMETHEUS_MULTIPROC_DIR directory (set by gunicorn.conf.py) and /metrics aggregates the files of all
+# workers, without it samples are kept in the memory of the process
+REQUESTS = Counter("concrete_http_requests_total", "Prediction requests by endpoint and status code",
+                   ["endpoint", "status"])
+REQUEST_DURATION = Histogram("concrete_http_request_duration_seconds", "Latency of prediction requests",
+                             ["endpoint"], buckets=LATENCY_BUCKETS)
+REQUEST_PHASE_DURATION = Histogram("concrete_http_request_phase_duration_seconds",
+                                   "Latency of the parse, validation, model_resolve and predict phases of "
+                                   "prediction requests", ["endpoint", "phase"], buckets=LATENCY_BUCKETS)
+REQUESTS_IN_PROGRESS = Gauge("concrete_http_requests_in_progress", "Prediction requests being served",
+                             ["endpoint"], multiprocess_mode="livesum")
+MODEL_LOAD_DURATION = Histogram("concrete_model_load_duration_seconds", "Time to load a served model version",
+                                buckets=MODEL_LOAD_BUCKETS)
+MODEL_VERSION = Gauge("concrete_model_version_info", "1 for the model version served by the workers",
+                      ["model_version"], multiprocess_mode="livemax")
+PREDICTION_CACHE_LOOKUPS = Counter("concrete_prediction_cache_lookups_total",
+                                   "Single row prediction cache lookups by result", ["result"])
+
+# label children are resolved once, a lookup of the dict is lock free on the request path
+_children = {}
+
+
+def get_child(metric, *label_values):
+    child = _children.get((metric, label_values))
+    if child is None:
+        child = _children.setdefault((metric, label_values), metric.labels(*label_values))
+    return child
+
+
+class RequestTimer:
+    """
+    Times the phases of a request, each mark records the time since the previous mark (or the start).
+    """
+    __slots__ = ["endpoint", "status", "start_time", "last_time"]
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.status = 200
+        self.start_time = self.last_time = time.perf_counter()
+
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        get_child(REQUEST_PHASE_DURATION, self.endpoint, phase).observe(now - self.last_time)
+        self.last_time = now
+
+
+@contextmanager
+def track_request(endpoint: str):
+    """
+    Description: Function is used to count, time and track in flight a prediction request
+                 `with track_request("predict") as request_timer:`, set request_timer.status for responses other
+                 than 200, a raised exception is counted as 500
+    """
+    in_progress = get_child(REQUESTS_IN_PROGRESS, endpoint)
+    in_progress.inc()
+    request_timer = RequestTimer(endpoint)
+    try:
+        yield request_timer
+    except BaseException:
+        request_timer.status = 500
+        raise
+    finally:
+        in_progress.dec()
+        get_child(REQUEST_DURATION, endpoint).observe(time.perf_counter() - request_timer.start_time)
+        get_child(REQUESTS, endpoint, str(request_timer.status)).inc()
+
+
+def observe_model_load(duration: float, model_version: str, previous_model_version: str = None):
+    """
+    Description: Function is used to record the load of a model version by the model cache
+    """
+    MODEL_LOAD_DURATION.observe(duration)
+    if previous_model_version is not None and previous_model_version != model_version:
+        get_child(MODEL_VERSION, previous_model_version).set(0)
+    get_child(MODEL_VERSION, model_version).set(1)
+
+
+def observe_prediction_cache_lookup(is_hit: bool):
+    get_child(PREDICTION_CACHE_LOOKUPS, "hit" if is_hit else "miss").inc()
+
+
+def get_elapsed_seconds(value) -> float:
+    # execution time is stored as the text of a timedelta, e.g. 0:01:02.500000
+    if value is None or pd.isna(value):
+        return None
+    return pd.to_timedelta(value).total_seconds()
+
+
+class ExperimentCollector:
+    """
+    Training gauges read from the experiment store at scrape time. Training runs in the training worker
+    process, so the experiment record and not Pipeline.experiment of the web process is the current state.
+    """
+
+    def __init__(self, experiment_db_file_path: str):
+        self.experiment_db_file_path = experiment_db_file_path
+        self.experiment_store = None
+
+    def get_experiment_store(self):
+        # the store is not created by a scrape, only read once training has written it
+        if self.experiment_store is None and os.path.exists(self.experiment_db_file_path):
+            self.experiment_store = ExperimentStore(db_file_path=self.experiment_db_file_path)
+        return self.experiment_store
+
+    def collect(self):
+        experiment_store = self.get_experiment_store()
+        if experiment_store is None:
+            return
+        experiment_counts = {status: experiment_store.get_experiment_count(status=status)
+                             for status in EXPERIMENT_STATUSES}
+        experiments = GaugeMetricFamily("concrete_experiments", "Experiments by status", labels=["status"])
+        for status, experiment_count in experiment_counts.items():
+            experiments.add_metric([status], experiment_count)
+        yield experiments
+        yield GaugeMetricFamily("concrete_training_running", "1 while a training pipeline is running",
+                                value=int(experiment_counts[EXPERIMENT_STATUS_RUNNING] > 0))
+
+        experiment_df = experiment_store.get_experiments(limit=1, status=EXPERIMENT_STATUS_COMPLETED)
+        if len(experiment_df) == 0:
+            return
+        experiment = experiment_df.iloc[0]
+        if not pd.isna(experiment["accuracy"]):
+            yield GaugeMetricFamily("concrete_training_last_accuracy",
+                                    "Accuracy of the model trained by the last completed experiment",
+                                    value=float(experiment["accuracy"]))
+        if not pd.isna(experiment["is_model_accepted"]):
+            yield GaugeMetricFamily("concrete_training_last_model_accepted",
+                                    "1 if the model of the last completed experiment was accepted",
+                                    value=int(bool(experiment["is_model_accepted"])))
+        execution_time = get_elapsed_seconds(experiment["execution_time"])
+        if execution_time is not None:
+            yield GaugeMetricFamily("concrete_training_last_duration_seconds",
+                                    "Execution time of the last completed experiment", value=execution_time)
+        if not pd.isna(experiment["stop_time"]):
+            yield GaugeMetricFamily("concrete_training_last_completed_timestamp_seconds",
+                                    "Stop time of the last completed experiment",
+                                    value=datetime.fromisoformat(str(experiment["stop_time"])).timestamp())
+
+
+def is_multiprocess_mode() -> bool:
+    return bool(os.environ.get(PROMETHEUS_MULTIPROC_DIR_ENV_KEY))
+
+
+def get_metrics(experiment_collector: ExperimentCollector = None) -> bytes:
+    """
+    Description: Function is used to render the metrics of every worker in the prometheus text format
+    param experiment_collector: training gauges to add, None for serving metrics only
+    """
+    try:
+        if is_multiprocess_mode():
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        metrics = generate_latest(registry)
+        if experiment_collector is not None:
+            metrics += generate_latest(experiment_collector)
+        return metrics
+    except Exception as e:
+        raise ConcreteException(e, sys) from e
+
+
+def mark_process_dead(process_id: int):
+    """
+    Description: Function is used to drop the live gauges of an exited worker process, counters and histograms
+                 of the worker are kept
+    """
+    if is_multiprocess_mode():
+        multiprocess.mark_process_dead(process_id)
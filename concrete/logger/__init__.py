@@ -1,9 +1,17 @@
 import logging
-import os
-import pandas as pd
-from concrete.constant import get_current_time_stamp
+import logging.handlers
+import atexit
+import json
+import queue
+import os, sys
+import yaml
+from concrete.constant import get_current_time_stamp, CONFIG_FILE_PATH, LOGGING_CONFIG_KEY, LOGGING_LEVEL_KEY, \
+    LOGGING_STAGE_LEVELS_KEY, LOGGING_MAX_BYTES_KEY, LOGGING_BACKUP_COUNT_KEY
 
 LOG_DIR = "logs"
+DEFAULT_LOG_LEVEL = "INFO"
+DEFAULT_LOG_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_LOG_BACKUP_COUNT = 5
 
 
 def get_log_file_name():
@@ -12,27 +20,145 @@ def get_log_file_name():
 
 LOG_FILE_NAME = get_log_file_name()
 
-os.makedirs(LOG_DIR, exist_ok=True)
-
 LOG_FILE_PATH = os.path.join(LOG_DIR, LOG_FILE_NAME)
 
-logging.basicConfig(filename=LOG_FILE_PATH,
-                    filemode="w",
-                    format='[%(asctime)s]^;%(levelname)s^;%(lineno)d^;%(filename)s^;%(funcName)s()^;%(message)s',
-                    level=logging.INFO
-                    )
 
+def read_logging_config() -> dict:
+    # read here and not through Configuration, concrete.config logs with this module
+    try:
+        with open(CONFIG_FILE_PATH) as config_file:
+            return dict((yaml.safe_load(config_file) or {}).get(LOGGING_CONFIG_KEY) or {})
+    except OSError:
+        return {}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats a record as one json line, multi line messages and tracebacks stay on the line of their record.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        log_record = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "file": record.filename,
+            "line": record.lineno,
+            "function": record.funcName,
+            "process": record.process,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            log_record["exception"] = record.exc_text
+        if record.stack_info:
+            log_record["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(log_record, default=str)
+
+
+class DelayedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    Size rotated file handler creating the log dir and file with the first record, a process that logs nothing
+    leaves no empty log file behind.
+    """
+
+    def __init__(self, filename: str, max_bytes: int, backup_count: int):
+        super().__init__(filename, mode="a", maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8",
+                         delay=True)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+class LogQueueHandler(logging.handlers.QueueHandler):
+    """
+    Puts records on the queue of the logging thread. Only the message is rendered in the calling thread (its
+    arguments may change afterwards), the json line, the traceback and the file write are left to the
+    logging thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+
+class LogWriter:
+    """
+    Background logging thread of the process: a QueueListener writing the queued records of every logger to
+    the size rotated json lines log file.
+    """
+
+    def __init__(self, file_path: str, max_bytes: int, backup_count: int):
+        self.file_path = file_path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.queue_handler = LogQueueHandler(queue.SimpleQueue())
+        self.listener = None
+
+    def start(self):
+        file_handler = DelayedRotatingFileHandler(self.file_path, max_bytes=self.max_bytes,
+                                                  backup_count=self.backup_count)
+        file_handler.setFormatter(JsonFormatter())
+        self.listener = logging.handlers.QueueListener(self.queue_handler.queue, file_handler)
+        self.listener.start()
+
+    def stop(self):
+        # writes the queued records, called at exit
+        if self.listener is not None:
+            listener, self.listener = self.listener, None
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+
+    def restart_in_child(self):
+        # the logging thread does not survive a fork (gunicorn workers, process pools), the child gets its own
+        # queue, thread and log file so that processes never rotate a shared file
+        self.queue_handler.queue = queue.SimpleQueue()
+        root, extension = os.path.splitext(LOG_FILE_PATH)
+        self.file_path = f"{root}_{os.getpid()}{extension}"
+        self.start()
+        if "multiprocessing" in sys.modules:
+            # pool workers leave with os._exit, which skips atexit
+            from multiprocessing.util import Finalize
+            Finalize(self, self.stop, exitpriority=0)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Description: Function is used to get the logger of a module or stage, e.g. get_logger(__name__), its level
+                 can be set in logging_config.stage_levels of config.yaml
+    """
+    return logging.getLogger(name)
 
-def get_log_dataframe(file_path):
-    data = []
-    with open(file_path) as log_file:
-        for line in log_file.readlines():
-            data.append(line.split("^;"))
 
-    log_df = pd.DataFrame(data)
-    columns = ["Time stamp", "Log Level", "line number", "file name", "function name", "message"]
-    log_df.columns = columns
+log_writer: LogWriter = None
 
-    log_df["log_message"] = log_df['Time stamp'].astype(str) + ":$" + log_df["message"]
 
-    return log_df[["log_message"]]
+def configure_logging() -> LogWriter:
+    """
+    Description: Function is used to send the records of every logger to the json lines log file through the
+                 logging thread, called once by the entry points (app, training worker, command line tools).
+                 Importing the package only creates loggers, records of a process that never configures logging
+                 go to the default stderr handler of the logging module
+    return: log writer of the process, the same one on later calls
+    """
+    global log_writer
+    if log_writer is not None:
+        return log_writer
+    logging_config = read_logging_config()
+    log_writer = LogWriter(file_path=LOG_FILE_PATH,
+                           max_bytes=int(logging_config.get(LOGGING_MAX_BYTES_KEY, DEFAULT_LOG_MAX_BYTES)),
+                           backup_count=int(logging_config.get(LOGGING_BACKUP_COUNT_KEY, DEFAULT_LOG_BACKUP_COUNT)))
+    log_writer.start()
+    logging.basicConfig(handlers=[log_writer.queue_handler],
+                        level=str(logging_config.get(LOGGING_LEVEL_KEY, DEFAULT_LOG_LEVEL)).upper())
+    for logger_name, level in (logging_config.get(LOGGING_STAGE_LEVELS_KEY) or {}).items():
+        get_logger(logger_name).setLevel(str(level).upper())
+    atexit.register(log_writer.stop)
+    os.register_at_fork(after_in_child=log_writer.restart_in_child)
+    return log_writer
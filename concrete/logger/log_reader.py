@@ -0,0 +1,220 @@
+from concrete.exception import ConcreteException
+from collections import OrderedDict, namedtuple
+from array import array
+from threading import Lock
+import logging
+import json
+import os, sys
+
+LOG_FIELD_SEPARATOR = "^;"
+LOG_FIELD_COUNT = 6
+MAX_INDEXED_FILES = 32
+LOG_LEVEL_NUMBERS = {"DEBUG": logging.DEBUG, "INFO": logging.INFO, "WARNING": logging.WARNING,
+                     "ERROR": logging.ERROR, "CRITICAL": logging.CRITICAL}
+
+LogRecord = namedtuple("LogRecord", ["record_id", "time_stamp", "level", "logger_name", "line_number", "file_name",
+                                     "function_name", "message"])
+LogPage = namedtuple("LogPage", ["records", "page", "per_page", "page_count", "record_count"])
+
+
+def get_function_name(function_field: str) -> str:
+    return function_field[:-2] if function_field.endswith("()") else function_field
+
+
+def parse_record_start(line: bytes):
+    """
+    Description: Function is used to recognize the first line of a log record, json lines are written by
+                 concrete.logger, "^;" separated lines by its earlier versions
+    return: (level, logger name, function name) or None for continuation lines of multi line messages
+            (e.g. tracebacks) of "^;" separated logs
+    """
+    if line.startswith(b"{"):
+        try:
+            fields = json.loads(line)
+        except ValueError:
+            return None
+        return fields.get("level", ""), fields.get("logger", ""), fields.get("function", "")
+    if not line.startswith(b"["):
+        return None
+    fields = line.split(LOG_FIELD_SEPARATOR.encode(), LOG_FIELD_COUNT - 1)
+    if len(fields) < LOG_FIELD_COUNT:
+        return None
+    return fields[1].decode(errors="replace"), "root", get_function_name(fields[4].decode(errors="replace"))
+
+
+def parse_record(record_id: int, text: str) -> LogRecord:
+    if text.startswith("{"):
+        fields = json.loads(text)
+        message = fields.get("message", "")
+        if fields.get("exception"):
+            message = f"{message}\n{fields['exception']}"
+        return LogRecord(record_id=record_id, time_stamp=fields.get("time", ""), level=fields.get("level", ""),
+                         logger_name=fields.get("logger", ""), line_number=str(fields.get("line", "")),
+                         file_name=fields.get("file", ""), function_name=fields.get("function", ""),
+                         message=message)
+    fields = text.split(LOG_FIELD_SEPARATOR, LOG_FIELD_COUNT - 1)
+    return LogRecord(record_id=record_id, time_stamp=fields[0].strip("[]"), level=fields[1], logger_name="root",
+                     line_number=fields[2], file_name=fields[3], function_name=get_function_name(fields[4]),
+                     message=fields[5].rstrip("\n"))
+
+
+class LogIndex:
+    """
+    Byte offset index of the records of a log file.
+
+    The file is scanned once and the index is extended with the lines appended since the last scan, a line
+    is only indexed once it is complete. Per record the index keeps its start offset, level number, logger
+    and function name, so pages, tails and level/logger/function filters are answered from the index and
+    only the records shown are read from the file with seeks. Json lines hold their whole record, in "^;"
+    separated logs lines that do not start a record (multi line messages, tracebacks) belong to the record
+    before them. A truncated or replaced file is indexed again.
+    """
+    _instances = OrderedDict()
+    _instances_lock = Lock()
+
+    def __init__(self, file_path: str):
+        try:
+            self.file_path = file_path
+            self._lock = Lock()
+            self._reset(file_id=None)
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    @classmethod
+    def get_instance(cls, file_path: str) -> "LogIndex":
+        """
+        Description: Function is used to get the index of a log file shared by every request, indexes of the
+                     least recently viewed files are dropped above MAX_INDEXED_FILES files
+        """
+        try:
+            file_path = os.path.abspath(file_path)
+            with cls._instances_lock:
+                log_index = cls._instances.get(file_path)
+                if log_index is None:
+                    log_index = cls._instances[file_path] = cls(file_path)
+                    while len(cls._instances) > MAX_INDEXED_FILES:
+                        cls._instances.popitem(last=False)
+                cls._instances.move_to_end(file_path)
+            return log_index
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def _reset(self, file_id):
+        self.file_id = file_id
+        self.indexed_size = 0
+        self.offsets = array("q")
+        self.level_numbers = array("B")
+        self.logger_ids = array("I")
+        self.logger_names = []
+        self._logger_ids = {}
+        self.function_ids = array("I")
+        self.function_names = []
+        self._function_ids = {}
+
+    @staticmethod
+    def _get_name_id(names: list, name_ids: dict, name: str) -> int:
+        name_id = name_ids.get(name)
+        if name_id is None:
+            name_id = name_ids[name] = len(names)
+            names.append(name)
+        return name_id
+
+    def refresh(self) -> int:
+        """
+        Description: Function is used to index the records appended to the file since the last call
+        return: number of records of the file
+        """
+        try:
+            with self._lock:
+                stat = os.stat(self.file_path)
+                file_id = (stat.st_dev, stat.st_ino)
+                if file_id != self.file_id or stat.st_size < self.indexed_size:
+                    self._reset(file_id=file_id)
+                if stat.st_size == self.indexed_size:
+                    return len(self.offsets)
+                offset = self.indexed_size
+                with open(self.file_path, "rb") as log_file:
+                    log_file.seek(offset)
+                    for line in log_file:
+                        if not line.endswith(b"\n"):
+                            # line is still being written
+                            break
+                        record_start = parse_record_start(line)
+                        if record_start is not None:
+                            level, logger_name, function_name = record_start
+                            self.offsets.append(offset)
+                            self.level_numbers.append(LOG_LEVEL_NUMBERS.get(level, 0))
+                            self.logger_ids.append(self._get_name_id(self.logger_names, self._logger_ids,
+                                                                     logger_name))
+                            self.function_ids.append(self._get_name_id(self.function_names, self._function_ids,
+                                                                       function_name))
+                        offset += len(line)
+                self.indexed_size = offset
+                return len(self.offsets)
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def get_record_ids(self, level: str = None, logger_name: str = None, function_name: str = None):
+        """
+        Description: Function is used to filter the records on the index
+        param level: minimum level name, e.g. WARNING keeps warnings, errors and critical records
+        param logger_name: logger of a module or stage, concrete.component keeps the records of its children
+        param function_name: name of the function that logged the record
+        return: range or list of record ids in file order
+        """
+        record_ids = range(len(self.offsets))
+        if logger_name is not None:
+            logger_ids = {logger_id for logger_id, name in enumerate(self.logger_names)
+                          if name == logger_name or name.startswith(f"{logger_name}.")}
+            record_ids = [record_id for record_id in record_ids if self.logger_ids[record_id] in logger_ids]
+        if function_name is not None:
+            function_id = self._function_ids.get(function_name)
+            if function_id is None:
+                return []
+            record_ids = [record_id for record_id in record_ids if self.function_ids[record_id] == function_id]
+        if level is not None:
+            level_number = LOG_LEVEL_NUMBERS.get(level.upper(), 0)
+            record_ids = [record_id for record_id in record_ids if self.level_numbers[record_id] >= level_number]
+        return record_ids
+
+    def read_records(self, record_ids):
+        """
+        Description: Function is used to read records of the index from the file, one seek per record
+        return: generator of LogRecord
+        """
+        with self._lock:
+            spans = [(record_id, self.offsets[record_id],
+                      self.offsets[record_id + 1] if record_id + 1 < len(self.offsets) else self.indexed_size)
+                     for record_id in record_ids]
+        return self._read_spans(spans)
+
+    def _read_spans(self, spans: list):
+        with open(self.file_path, "rb") as log_file:
+            for record_id, start, end in spans:
+                log_file.seek(start)
+                yield parse_record(record_id, log_file.read(end - start).decode(errors="replace"))
+
+    def get_page(self, page: int = None, per_page: int = 200, level: str = None, logger_name: str = None,
+                 function_name: str = None) -> LogPage:
+        """
+        Description: Function is used to get one page of the (filtered) records
+        param page: 1 based page number, None for the last page (tail of the file)
+        return: LogPage with a generator of the records of the page
+        """
+        try:
+            self.refresh()
+            record_ids = self.get_record_ids(level=level, logger_name=logger_name, function_name=function_name)
+            record_count = len(record_ids)
+            page_count = max((record_count + per_page - 1) // per_page, 1)
+            page = page_count if page is None else min(max(page, 1), page_count)
+            page_record_ids = record_ids[(page - 1) * per_page:page * per_page]
+            return LogPage(records=self.read_records(page_record_ids), page=page, per_page=per_page,
+                           page_count=page_count, record_count=record_count)
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def get_logger_names(self) -> list:
+        return sorted(self.logger_names)
+
+    def get_function_names(self) -> list:
+        return sorted(self.function_names)
@@ -0,0 +1,75 @@
+from concrete.exception import ConcreteException
+from concrete.logger import get_logger
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import time
+
+logger = get_logger(__name__)
+
+
+class ArtifactWriter:
+    """
+    Background writer of pipeline artifacts used in in-memory pipeline mode.
+
+    Stages hand their outputs to the next stage as live objects and submit the file writes here, so the
+    on-disk artifact layout stays the same while the pipeline does not wait for it. Writes run one at a time
+    in submission order on a single thread, a stage cache entry submitted after the files of its stage is
+    therefore never visible before them. Once a write fails the remaining ones are skipped and flush() raises
+    the failure.
+    """
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="artifact_writer")
+        self.futures = []
+        self.is_failed = False
+
+    def run(self, function, *args, **kwargs):
+        if self.is_failed:
+            return None
+        try:
+            return function(*args, **kwargs)
+        except Exception:
+            self.is_failed = True
+            raise
+
+    def submit(self, function, *args, **kwargs):
+        """
+        Description: Function is used to run a write function in background
+        param function: function writing an artifact, its arguments must not be modified afterwards
+        """
+        try:
+            self.futures.append(self.executor.submit(self.run, function, *args, **kwargs))
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def flush(self):
+        """
+        Description: Function is used to wait until every submitted write is on disk
+        """
+        try:
+            start_time = time.perf_counter()
+            futures, self.futures = self.futures, []
+            for future in futures:
+                future.result()
+            logger.info(f"Flushed {len(futures)} artifact writes, waited {time.perf_counter() - start_time:.3f}s")
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def close(self):
+        """
+        Description: Function is used to flush pending writes and stop the writer thread
+        """
+        try:
+            self.flush()
+        finally:
+            self.executor.shutdown(wait=True)
+
+
+def write_artifact(artifact_writer: ArtifactWriter, function, *args, **kwargs):
+    """
+    Description: Function is used to write an artifact in background when an artifact writer is given
+                 otherwise the write is done right away
+    """
+    if artifact_writer is None:
+        return function(*args, **kwargs)
+    artifact_writer.submit(function, *args, **kwargs)
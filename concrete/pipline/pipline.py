@@ -1,6 +1,10 @@
 from concrete.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact, DataTransformationArtifact, \
     ModelTrainerArtifact, ModelEvaluationArtifact, ModelPusherArtifact
-from concrete.constant import EXPERIMENT_DIR_NAME, EXPERIMENT_FILE_NAME
+from concrete.constant import EXPERIMENT_DIR_NAME, EXPERIMENT_FILE_NAME, DATA_INGESTION_CONFIG_KEY, \
+    DATA_VALIDATION_CONFIG_KEY, DATA_TRANSFORMATION_CONFIG_KEY, MODEL_TRAINER_CONFIG_KEY, \
+    DATA_INGESTION_ARTIFACT_DIR, DATA_VALIDATION_ARTIFACT_DIR_NAME, DATA_TRANSFORMATION_ARTIFACT_DIR, \
+    MODEL_TRAINER_ARTIFACT_DIR, MODEL_EVALUATION_ARTIFACT_DIR, EXPERIMENT_DB_FILE_NAME, EXPERIMENT_STATUS_QUEUED, EXPERIMENT_STATUS_RUNNING, \
+    EXPERIMENT_STATUS_COMPLETED, EXPERIMENT_STATUS_FAILED
 from concrete.component.data_transformation import DataTransformation
 from concrete.component.model_evaluation import ModelEvaluation
 from concrete.component.data_validation import DataValidation
@@ -8,8 +12,16 @@ from concrete.component.data_ingestion import DataIngestion
 from concrete.component.model_trainer import ModelTrainer
 from concrete.component.model_pusher import ModelPusher
 from concrete.config.configuration import Configuration
+from concrete.pipline.stage_cache import StageCache, get_code_version
+from concrete.pipline.artifact_writer import ArtifactWriter
+from concrete.util.profiler import Profiler, profile_step, get_profile_breakdown
+from concrete.entity.experiment_store import ExperimentStore
+from concrete.pipline.training_queue import TrainingJobQueue
+from concrete.entity import model_factory, budgeted_search
+from concrete.util import util
+from concrete.util.util import get_file_hash
 from concrete.exception import ConcreteException
-from concrete.logger import logging
+from concrete.logger import get_logger
 from collections import namedtuple
 from datetime import datetime
 from threading import Thread
@@ -17,42 +29,118 @@ import pandas as pd
 import os, sys
 import uuid
 
+logger = get_logger(__name__)
+
+MODEL_PUSHER_STAGE_NAME = "model_pusher"
+
 Experiment = namedtuple("Experiment", ["experiment_id", "initialization_timestamp", "artifact_time_stamp",
                                        "running_status", "start_time", "stop_time", "execution_time", "message",
-                                       "experiment_file_path", "accuracy", "is_model_accepted"])
+                                       "experiment_file_path", "accuracy", "is_model_accepted", "status"])
 
 
 class Pipeline(Thread):
-    experiment: Experiment = Experiment(*([None] * 11))
+    experiment: Experiment = Experiment(*([None] * 12))
     experiment_file_path = None
+    experiment_store: ExperimentStore = None
 
     def __init__(self, config: Configuration) -> None:
         try:
             os.makedirs(config.training_pipeline_config.artifact_dir, exist_ok=True)
-            Pipeline.experiment_file_path = os.path.join(config.training_pipeline_config.artifact_dir,
-                                                         EXPERIMENT_DIR_NAME, EXPERIMENT_FILE_NAME)
+            Pipeline.init_experiment_store(artifact_dir=config.training_pipeline_config.artifact_dir)
             super().__init__(daemon=False, name="pipeline")
             self.config = config
+            self.stage_cache = None
+            if config.training_pipeline_config.stage_cache_dir is not None:
+                self.stage_cache = StageCache(cache_dir=config.training_pipeline_config.stage_cache_dir)
+            self.stage_keys = {}
+            self.artifact_writer = None
+            self.profiler = None
+            self.training_job_queue = TrainingJobQueue(
+                queue_dir=config.training_pipeline_config.training_queue_dir,
+                stale_timeout=config.training_pipeline_config.job_stale_timeout)
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    @classmethod
+    def init_experiment_store(cls, artifact_dir: str) -> ExperimentStore:
+        """
+        Description: Function is used to open the experiment store of the artifact dir once per process
+        """
+        try:
+            experiment_dir = os.path.join(artifact_dir, EXPERIMENT_DIR_NAME)
+            experiment_file_path = os.path.join(experiment_dir, EXPERIMENT_DB_FILE_NAME)
+            if cls.experiment_file_path != experiment_file_path:
+                cls.experiment_file_path = experiment_file_path
+                cls.experiment_store = ExperimentStore(db_file_path=experiment_file_path)
+                cls.experiment_store.import_csv_file(os.path.join(experiment_dir, EXPERIMENT_FILE_NAME))
+            return cls.experiment_store
         except Exception as e:
             raise ConcreteException(e, sys) from e
 
+    def run_stage(self, stage_name: str, get_stage_inputs, code_objects: list, artifact_type, run_stage_function):
+        """
+        Description: Function is used to run a stage or reuse its artifact from stage cache when the
+                     content addressed key of its inputs is unchanged
+        param get_stage_inputs: callable returning the json serializable inputs of the stage
+        param code_objects: modules or classes whose source code is part of the stage key
+        param run_stage_function: callable running the stage and returning its artifact
+        """
+        try:
+            if self.stage_cache is None:
+                return run_stage_function()
+            stage_key = StageCache.get_stage_key(stage_name, get_stage_inputs() + [get_code_version(code_objects)])
+            self.stage_keys[stage_name] = stage_key
+            artifact = self.stage_cache.get_artifact(stage_name, stage_key, artifact_type)
+            if artifact is not None:
+                logger.info(f"Inputs of stage [{stage_name}] are unchanged [{stage_key}], reusing: {artifact}")
+                return artifact
+            artifact = run_stage_function()
+            if self.artifact_writer is not None:
+                # queued behind the files of the stage so the cache never points to files not written yet
+                self.artifact_writer.submit(self.stage_cache.save_artifact, stage_name, stage_key, artifact)
+            else:
+                self.stage_cache.save_artifact(stage_name, stage_key, artifact)
+            return artifact
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    @profile_step(DATA_INGESTION_ARTIFACT_DIR)
     def start_data_ingestion(self) -> DataIngestionArtifact:
         try:
-            data_ingestion = DataIngestion(data_ingestion_config=self.config.get_data_ingestion_config())
-            return data_ingestion.initiate_data_ingestion()
+            data_ingestion = DataIngestion(data_ingestion_config=self.config.get_data_ingestion_config(),
+                                           artifact_writer=self.artifact_writer)
+            return self.run_stage(
+                stage_name=DATA_INGESTION_ARTIFACT_DIR,
+                get_stage_inputs=lambda: [self.config.config_info[DATA_INGESTION_CONFIG_KEY],
+                                          data_ingestion.get_source_fingerprint()],
+                code_objects=[DataIngestion],
+                artifact_type=DataIngestionArtifact,
+                run_stage_function=data_ingestion.initiate_data_ingestion
+            )
         except Exception as e:
             raise ConcreteException(e, sys) from e
 
+    @profile_step(DATA_VALIDATION_ARTIFACT_DIR_NAME)
     def start_data_validation(self, data_ingestion_artifact: DataIngestionArtifact) \
             -> DataValidationArtifact:
         try:
-            data_validation = DataValidation(data_validation_config=self.config.get_data_validation_config(),
+            data_validation_config = self.config.get_data_validation_config()
+            data_validation = DataValidation(data_validation_config=data_validation_config,
                                              data_ingestion_artifact=data_ingestion_artifact
                                              )
-            return data_validation.initiate_data_validation()
+            return self.run_stage(
+                stage_name=DATA_VALIDATION_ARTIFACT_DIR_NAME,
+                get_stage_inputs=lambda: [self.config.config_info[DATA_VALIDATION_CONFIG_KEY],
+                                          get_file_hash(data_validation_config.schema_file_path),
+                                          self.stage_keys.get(DATA_INGESTION_ARTIFACT_DIR)],
+                code_objects=[DataValidation, util],
+                artifact_type=DataValidationArtifact,
+                run_stage_function=data_validation.initiate_data_validation
+            )
         except Exception as e:
             raise ConcreteException(e, sys) from e
 
+    @profile_step(DATA_TRANSFORMATION_ARTIFACT_DIR)
     def start_data_transformation(self,
                                   data_ingestion_artifact: DataIngestionArtifact,
                                   data_validation_artifact: DataValidationArtifact
@@ -61,21 +149,42 @@ class Pipeline(Thread):
             data_transformation = DataTransformation(
                 data_transformation_config=self.config.get_data_transformation_config(),
                 data_ingestion_artifact=data_ingestion_artifact,
-                data_validation_artifact=data_validation_artifact
+                data_validation_artifact=data_validation_artifact,
+                artifact_writer=self.artifact_writer
+            )
+            return self.run_stage(
+                stage_name=DATA_TRANSFORMATION_ARTIFACT_DIR,
+                get_stage_inputs=lambda: [self.config.config_info[DATA_TRANSFORMATION_CONFIG_KEY],
+                                          get_file_hash(data_validation_artifact.schema_file_path),
+                                          self.stage_keys.get(DATA_INGESTION_ARTIFACT_DIR)],
+                code_objects=[DataTransformation, util],
+                artifact_type=DataTransformationArtifact,
+                run_stage_function=data_transformation.initiate_data_transformation
             )
-            return data_transformation.initiate_data_transformation()
         except Exception as e:
             raise ConcreteException(e, sys)
 
+    @profile_step(MODEL_TRAINER_ARTIFACT_DIR)
     def start_model_trainer(self, data_transformation_artifact: DataTransformationArtifact) -> ModelTrainerArtifact:
         try:
-            model_trainer = ModelTrainer(model_trainer_config=self.config.get_model_trainer_config(),
-                                         data_transformation_artifact=data_transformation_artifact
+            model_trainer_config = self.config.get_model_trainer_config()
+            model_trainer = ModelTrainer(model_trainer_config=model_trainer_config,
+                                         data_transformation_artifact=data_transformation_artifact,
+                                         artifact_writer=self.artifact_writer
                                          )
-            return model_trainer.initiate_model_trainer()
+            return self.run_stage(
+                stage_name=MODEL_TRAINER_ARTIFACT_DIR,
+                get_stage_inputs=lambda: [self.config.config_info[MODEL_TRAINER_CONFIG_KEY],
+                                          get_file_hash(model_trainer_config.model_config_file_path),
+                                          self.stage_keys.get(DATA_TRANSFORMATION_ARTIFACT_DIR)],
+                code_objects=[ModelTrainer, model_factory, budgeted_search, util],
+                artifact_type=ModelTrainerArtifact,
+                run_stage_function=model_trainer.initiate_model_trainer
+            )
         except Exception as e:
             raise ConcreteException(e, sys) from e
 
+    @profile_step(MODEL_EVALUATION_ARTIFACT_DIR)
     def start_model_evaluation(self, data_ingestion_artifact: DataIngestionArtifact,
                                data_validation_artifact: DataValidationArtifact,
                                model_trainer_artifact: ModelTrainerArtifact) -> ModelEvaluationArtifact:
@@ -89,25 +198,83 @@ class Pipeline(Thread):
         except Exception as e:
             raise ConcreteException(e, sys) from e
 
-    def start_model_pusher(self, model_eval_artifact: ModelEvaluationArtifact) -> ModelPusherArtifact:
+    @profile_step(MODEL_PUSHER_STAGE_NAME)
+    def start_model_pusher(self, model_eval_artifact: ModelEvaluationArtifact,
+                           model_trainer_artifact: ModelTrainerArtifact = None) -> ModelPusherArtifact:
         try:
+            if self.artifact_writer is not None:
+                # pusher copies the trained model file
+                self.artifact_writer.flush()
             model_pusher = ModelPusher(
                 model_pusher_config=self.config.get_model_pusher_config(),
-                model_evaluation_artifact=model_eval_artifact
+                model_evaluation_artifact=model_eval_artifact,
+                model_trainer_artifact=model_trainer_artifact
             )
             return model_pusher.initiate_model_pusher()
         except Exception as e:
             raise ConcreteException(e, sys) from e
 
-    def run_pipeline(self):
+    def save_queued_experiment(self, experiment_id: str = None) -> Experiment:
+        """
+        Description: Function is used to record an experiment queued for a training worker process, the record
+                     is left unchanged if the worker has already started the experiment
+        return: queued experiment, a new experiment id is used if None
+        """
+        try:
+            Pipeline.experiment = Experiment(experiment_id=experiment_id or str(uuid.uuid4()),
+                                             initialization_timestamp=self.config.time_stamp,
+                                             artifact_time_stamp=None,
+                                             running_status=False,
+                                             start_time=None,
+                                             stop_time=None,
+                                             execution_time=None,
+                                             experiment_file_path=Pipeline.experiment_file_path,
+                                             is_model_accepted=None,
+                                             message="Pipeline has been queued.",
+                                             accuracy=None,
+                                             status=EXPERIMENT_STATUS_QUEUED
+                                             )
+            self.save_experiment(is_update=False)
+            return Pipeline.experiment
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    @classmethod
+    def save_failed_experiment(cls, experiment_id: str, message: str):
+        """
+        Description: Function is used to record that the pipeline of an experiment has failed
+        """
+        try:
+            experiment = cls.experiment_store.get_experiment(experiment_id)
+            if experiment is None:
+                return
+            stop_time = datetime.now()
+            start_time = experiment["start_time"]
+            experiment.update(running_status=False,
+                              stop_time=stop_time,
+                              execution_time=stop_time - datetime.fromisoformat(start_time) if start_time else None,
+                              message=message,
+                              status=EXPERIMENT_STATUS_FAILED)
+            cls.experiment_store.save_experiment(experiment)
+            if cls.experiment.experiment_id == experiment_id:
+                cls.experiment = cls.experiment._replace(running_status=False, stop_time=stop_time,
+                                                         message=message, status=EXPERIMENT_STATUS_FAILED)
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def run_pipeline(self, experiment_id: str = None):
+        """
+        param experiment_id: id of an experiment whose training job has been claimed from the training job queue,
+                             None to run a new experiment when no training job is pending or running
+        """
         try:
-            if Pipeline.experiment.running_status:
-                logging.info("Pipeline is already running")
+            if experiment_id is None and self.training_job_queue.is_busy():
+                logger.info("Pipeline is already running")
                 return Pipeline.experiment
             # data ingestion
-            logging.info("Pipeline starting.")
+            logger.info("Pipeline starting.")
 
-            experiment_id = str(uuid.uuid4())
+            experiment_id = experiment_id or str(uuid.uuid4())
 
             Pipeline.experiment = Experiment(experiment_id=experiment_id,
                                              initialization_timestamp=self.config.time_stamp,
@@ -120,11 +287,19 @@ class Pipeline(Thread):
                                              is_model_accepted=None,
                                              message="Pipeline has been started.",
                                              accuracy=None,
+                                             status=EXPERIMENT_STATUS_RUNNING
                                              )
-            logging.info(f"Pipeline experiment: {Pipeline.experiment}")
+            logger.info(f"Pipeline experiment: {Pipeline.experiment}")
 
             self.save_experiment()
 
+            self.profiler = Profiler().start()
+            self.profiler.start_step("pipeline")
+
+            if self.config.training_pipeline_config.in_memory:
+                logger.info("Running pipeline in memory, artifacts are written in background")
+                self.artifact_writer = ArtifactWriter()
+
             data_ingestion_artifact = self.start_data_ingestion()
             data_validation_artifact = self.start_data_validation(data_ingestion_artifact=data_ingestion_artifact)
             data_transformation_artifact = self.start_data_transformation(
@@ -138,11 +313,15 @@ class Pipeline(Thread):
                                                                     model_trainer_artifact=model_trainer_artifact)
 
             if model_evaluation_artifact.is_model_accepted:
-                model_pusher_artifact = self.start_model_pusher(model_eval_artifact=model_evaluation_artifact)
-                logging.info(f'Model pusher artifact: {model_pusher_artifact}')
+                model_pusher_artifact = self.start_model_pusher(model_eval_artifact=model_evaluation_artifact,
+                                                                model_trainer_artifact=model_trainer_artifact)
+                logger.info(f'Model pusher artifact: {model_pusher_artifact}')
             else:
-                logging.info("Trained model rejected.")
-            logging.info("Pipeline completed.")
+                logger.info("Trained model rejected.")
+            if self.artifact_writer is not None:
+                self.artifact_writer.close()
+                self.artifact_writer = None
+            logger.info("Pipeline completed.")
 
             stop_time = datetime.now()
             Pipeline.experiment = Experiment(experiment_id=Pipeline.experiment.experiment_id,
@@ -155,11 +334,26 @@ class Pipeline(Thread):
                                              message="Pipeline has been completed.",
                                              experiment_file_path=Pipeline.experiment_file_path,
                                              is_model_accepted=model_evaluation_artifact.is_model_accepted,
-                                             accuracy=model_trainer_artifact.model_accuracy
+                                             accuracy=model_trainer_artifact.model_accuracy,
+                                             status=EXPERIMENT_STATUS_COMPLETED
                                              )
-            logging.info(f"Pipeline experiment: {Pipeline.experiment}")
+            logger.info(f"Pipeline experiment: {Pipeline.experiment}")
+            self.save_profile()
             self.save_experiment()
         except Exception as e:
+            if self.artifact_writer is not None:
+                # pending writes of completed stages are still flushed, the stage error is the one raised
+                try:
+                    self.artifact_writer.close()
+                except Exception as writer_error:
+                    logger.info(f"Artifact writer failed: {writer_error}")
+                self.artifact_writer = None
+            if self.profiler is not None:
+                # steps run before the failure are kept with the experiment
+                try:
+                    self.save_profile()
+                except Exception as profile_error:
+                    logger.info(f"Pipeline profile could not be saved: {profile_error}")
             raise ConcreteException(e, sys) from e
 
     def run(self):
@@ -168,37 +362,65 @@ class Pipeline(Thread):
         except Exception as e:
             raise e
 
-    def save_experiment(self):
+    def save_experiment(self, is_update: bool = True):
         try:
             if Pipeline.experiment.experiment_id is not None:
-                experiment = Pipeline.experiment
-                experiment_dict = experiment._asdict()
-                experiment_dict: dict = {key: [value] for key, value in experiment_dict.items()}
-
-                experiment_dict.update({
-                    "created_time_stamp": [datetime.now()],
-                    "experiment_file_path": [os.path.basename(Pipeline.experiment.experiment_file_path)]})
+                experiment_dict = Pipeline.experiment._asdict()
+                experiment_dict["experiment_file_path"] = os.path.basename(Pipeline.experiment.experiment_file_path)
+                Pipeline.experiment_store.save_experiment(experiment_dict, is_update=is_update)
+            else:
+                logger.info("First start experiment")
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
 
-                experiment_report = pd.DataFrame(experiment_dict)
+    def save_profile(self):
+        """
+        Description: Function is used to stop the profiler of the run and save its steps with the experiment
+        """
+        try:
+            if self.profiler is None:
+                return
+            profiler, self.profiler = self.profiler, None
+            Pipeline.experiment_store.save_profile(experiment_id=Pipeline.experiment.experiment_id,
+                                                   steps=profiler.stop())
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
 
-                os.makedirs(os.path.dirname(Pipeline.experiment_file_path), exist_ok=True)
-                if os.path.exists(Pipeline.experiment_file_path):
-                    experiment_report.to_csv(Pipeline.experiment_file_path, index=False, header=False, mode="a")
-                else:
-                    experiment_report.to_csv(Pipeline.experiment_file_path, mode="w", index=False, header=True)
-            else:
-                print("First start experiment")
+    @classmethod
+    def get_experiment_profile(cls, experiment_id: str) -> list:
+        """
+        Description: Function is used to get the timing and resource breakdown of the steps of an experiment
+        return: steps in tree order, see get_profile_breakdown
+        """
+        try:
+            if Pipeline.experiment_store is None or experiment_id is None:
+                return []
+            return get_profile_breakdown(Pipeline.experiment_store.get_profile(experiment_id))
         except Exception as e:
             raise ConcreteException(e, sys) from e
 
     @classmethod
-    def get_experiments_status(cls, limit: int = 5) -> pd.DataFrame:
+    def get_experiments_status(cls, limit: int = 5, offset: int = 0, status: str = None,
+                               is_model_accepted: bool = None) -> pd.DataFrame:
+        """
+        Description: Function is used to get a page of experiment history, newest first
+        param status: queued, running, completed or failed, None for all
+        """
         try:
-            if os.path.exists(Pipeline.experiment_file_path):
-                df = pd.read_csv(Pipeline.experiment_file_path)
-                limit = -1 * int(limit)
-                return df[limit:].drop(columns=["experiment_file_path", "initialization_timestamp"], axis=1)
-            else:
+            if Pipeline.experiment_store is None:
                 return pd.DataFrame()
+            df = Pipeline.experiment_store.get_experiments(limit=limit, offset=offset, status=status,
+                                                           is_model_accepted=is_model_accepted)
+            return df.drop(columns=["experiment_file_path", "initialization_timestamp", "updated_time_stamp"])
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    @classmethod
+    def get_experiment_count(cls, status: str = None, is_model_accepted: bool = None) -> int:
+        try:
+            if Pipeline.experiment_store is None:
+                return 0
+            return Pipeline.experiment_store.get_experiment_count(status=status,
+                                                                  is_model_accepted=is_model_accepted)
         except Exception as e:
             raise ConcreteException(e, sys) from e
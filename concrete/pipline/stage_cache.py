@@ -0,0 +1,98 @@
+from concrete.entity.artifact_entity import IN_MEMORY_ARTIFACT_FIELDS
+from concrete.exception import ConcreteException
+from concrete.util.util import get_file_hash
+from concrete.logger import get_logger
+import hashlib
+import inspect
+import json
+import os, sys
+
+logger = get_logger(__name__)
+
+
+def get_code_version(code_objects: list) -> list:
+    """
+    Description: Function is used to get the version of the code run by a stage
+    param code_objects: modules, classes or functions used by the stage
+    return: sha256 of the source file of every code object
+    """
+    try:
+        source_files = sorted({inspect.getsourcefile(code_object) for code_object in code_objects})
+        return [[os.path.basename(source_file), get_file_hash(source_file)] for source_file in source_files]
+    except Exception as e:
+        raise ConcreteException(e, sys) from e
+
+
+class StageCache:
+    """
+    Content addressed cache of pipeline stage artifacts.
+
+    A stage key is the sha256 of everything the output of the stage depends on: its config sections,
+    the content of schema/model files it reads, the source code it runs and the keys of the upstream
+    stages it consumes. Upstream keys are themselves derived from the content that produced the upstream
+    artifact (down to the data source fingerprint of ingestion), so an unchanged key means unchanged input
+    content and the artifact of the earlier run is reused instead of being recomputed.
+    """
+
+    def __init__(self, cache_dir: str):
+        try:
+            self.cache_dir = cache_dir
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    @staticmethod
+    def get_stage_key(stage_name: str, stage_inputs: list) -> str:
+        """
+        Description: Function is used to compute the key of a stage from its inputs
+        param stage_inputs: json serializable values, None when an input could not be fingerprinted
+        return: sha256 hex digest or None if any input is unknown
+        """
+        try:
+            if any(stage_input is None for stage_input in stage_inputs):
+                return None
+            content = json.dumps([stage_name, stage_inputs], sort_keys=True, default=str)
+            return hashlib.sha256(content.encode("utf-8")).hexdigest()
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def get_artifact_file_path(self, stage_name: str, stage_key: str) -> str:
+        return os.path.join(self.cache_dir, stage_name, f"{stage_key}.json")
+
+    def get_artifact(self, stage_name: str, stage_key: str, artifact_type):
+        """
+        Description: Function is used to get the artifact stored for the stage key
+        return: artifact named tuple or None if not cached or any file it points to was removed
+        """
+        try:
+            if stage_key is None:
+                return None
+            artifact_file_path = self.get_artifact_file_path(stage_name, stage_key)
+            if not os.path.exists(artifact_file_path):
+                return None
+            with open(artifact_file_path) as artifact_file:
+                artifact = artifact_type(**json.load(artifact_file))
+            for value in artifact:
+                if isinstance(value, str) and os.path.isabs(value) and not os.path.exists(value):
+                    logger.info(f"Cached artifact of stage [{stage_name}] refers to missing file: [{value}]")
+                    return None
+            return artifact
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def save_artifact(self, stage_name: str, stage_key: str, artifact):
+        """
+        Description: Function is used to store the artifact of the stage under the stage key,
+                     live in-memory objects are left out
+        """
+        try:
+            if stage_key is None:
+                return
+            artifact_file_path = self.get_artifact_file_path(stage_name, stage_key)
+            os.makedirs(os.path.dirname(artifact_file_path), exist_ok=True)
+            temp_file_path = f"{artifact_file_path}.{os.getpid()}.tmp"
+            with open(temp_file_path, "w") as artifact_file:
+                json.dump({key: value for key, value in artifact._asdict().items()
+                           if key not in IN_MEMORY_ARTIFACT_FIELDS}, artifact_file, indent=4, default=str)
+            os.replace(temp_file_path, artifact_file_path)
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
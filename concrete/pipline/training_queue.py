@@ -0,0 +1,255 @@
+from concrete.exception import ConcreteException
+from concrete.logger import get_logger
+from collections import namedtuple
+from contextlib import closing
+import sqlite3
+import socket
+import os, sys
+import time
+import uuid
+
+logger = get_logger(__name__)
+
+JOB_STATUS_PENDING = "pending"
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_DONE = "done"
+JOB_STATUS_FAILED = "failed"
+
+TRAINING_QUEUE_DB_FILE_NAME = "training_queue.db"
+WORKERS_DIR_NAME = "workers"
+STALE_JOB_TIMEOUT = 120
+STALE_JOB_MESSAGE = "Training worker stopped responding."
+
+TrainingJob = namedtuple("TrainingJob", ["job_id", "experiment_id", "status", "enqueued_time", "claimed_time",
+                                         "heartbeat_time", "finished_time", "worker_host", "worker_pid", "message"])
+
+
+class TrainingJobQueue:
+    """
+    Training jobs shared by all web and training worker processes in a sqlite table.
+
+    Every state change runs in a BEGIN IMMEDIATE transaction which takes the database write lock, so checks
+    and updates are atomic across processes:
+        enqueue: a job is only added when no job is pending or running, otherwise the existing job is returned
+        claim: a pending job is only started when no other job is running, at most one training at a time
+               writes to the artifact tree whatever the number of web or worker processes
+    A running job is refreshed by heartbeat() of its worker. It is stale when its heartbeat is older than
+    stale_timeout or its worker process on this host is gone, stale jobs are marked failed so that they do not
+    block the queue after a crash or restart.
+    """
+
+    def __init__(self, queue_dir: str, stale_timeout: float = STALE_JOB_TIMEOUT):
+        try:
+            self.queue_dir = queue_dir
+            self.workers_dir = os.path.join(queue_dir, WORKERS_DIR_NAME)
+            os.makedirs(self.workers_dir, exist_ok=True)
+            self.db_file_path = os.path.join(queue_dir, TRAINING_QUEUE_DB_FILE_NAME)
+            self.stale_timeout = stale_timeout
+            self.host_name = socket.gethostname()
+            with closing(self.get_connection()) as connection, connection:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("CREATE TABLE IF NOT EXISTS training_job ("
+                                   "job_id INTEGER PRIMARY KEY AUTOINCREMENT, experiment_id TEXT UNIQUE, "
+                                   "status TEXT, enqueued_time REAL, claimed_time REAL, heartbeat_time REAL, "
+                                   "finished_time REAL, worker_host TEXT, worker_pid INTEGER, message TEXT)")
+                connection.execute("CREATE INDEX IF NOT EXISTS training_job_status ON training_job "
+                                   "(status, job_id)")
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def get_connection(self) -> sqlite3.Connection:
+        # autocommit mode, transactions are opened explicitly with BEGIN IMMEDIATE
+        connection = sqlite3.connect(self.db_file_path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def run_transaction(self, function):
+        """
+        Description: Function is used to run function(connection) holding the database write lock
+        """
+        with closing(self.get_connection()) as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                result = function(connection)
+                connection.execute("COMMIT")
+                return result
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def get_jobs(connection: sqlite3.Connection, status: str) -> list:
+        rows = connection.execute("SELECT * FROM training_job WHERE status = ? ORDER BY job_id", [status])
+        return [TrainingJob(**dict(row)) for row in rows]
+
+    def is_stale(self, training_job: TrainingJob, now: float) -> bool:
+        """
+        Description: Function is used to check if the worker of a running job stopped without finishing it
+        """
+        if now - (training_job.heartbeat_time or training_job.claimed_time) > self.stale_timeout:
+            return True
+        if training_job.worker_host == self.host_name:
+            try:
+                os.kill(training_job.worker_pid, 0)
+            except ProcessLookupError:
+                return True
+            except PermissionError:
+                pass
+        return False
+
+    def get_running_jobs(self, connection: sqlite3.Connection) -> list:
+        """
+        Description: Function is used to get running jobs whose worker is alive
+        """
+        now = time.time()
+        return [training_job for training_job in self.get_jobs(connection, JOB_STATUS_RUNNING)
+                if not self.is_stale(training_job, now)]
+
+    def recover_stale_jobs(self) -> list:
+        """
+        Description: Function is used to mark running jobs of dead workers as failed
+        return: jobs marked failed
+        """
+        try:
+            def fail_stale_jobs(connection):
+                now = time.time()
+                stale_jobs = [training_job for training_job in self.get_jobs(connection, JOB_STATUS_RUNNING)
+                              if self.is_stale(training_job, now)]
+                for training_job in stale_jobs:
+                    logger.info(f"Training job is stale, marking it failed: {training_job}")
+                    connection.execute("UPDATE training_job SET status = ?, finished_time = ?, message = ? "
+                                       "WHERE job_id = ?",
+                                       [JOB_STATUS_FAILED, now, STALE_JOB_MESSAGE, training_job.job_id])
+                return stale_jobs
+
+            return self.run_transaction(fail_stale_jobs)
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def enqueue(self, experiment_id: str = None):
+        """
+        Description: Function is used to add a training job unless one is already pending or running
+        return: (training job, True if it was added or False if it is the already pending or running job)
+        """
+        try:
+            def enqueue_job(connection):
+                active_jobs = self.get_running_jobs(connection) + self.get_jobs(connection, JOB_STATUS_PENDING)
+                if active_jobs:
+                    return active_jobs[0], False
+                cursor = connection.execute("INSERT INTO training_job (experiment_id, status, enqueued_time) "
+                                            "VALUES (?, ?, ?)",
+                                            [experiment_id or str(uuid.uuid4()), JOB_STATUS_PENDING, time.time()])
+                row = connection.execute("SELECT * FROM training_job WHERE job_id = ?", [cursor.lastrowid])
+                return TrainingJob(**dict(row.fetchone())), True
+
+            training_job, is_enqueued = self.run_transaction(enqueue_job)
+            logger.info(f"Training job {'queued' if is_enqueued else 'already active'}: {training_job}")
+            return training_job, is_enqueued
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def claim(self):
+        """
+        Description: Function is used to start the oldest pending job when no job is running
+        return: claimed training job or None
+        """
+        try:
+            def claim_job(connection):
+                if self.get_running_jobs(connection):
+                    return None
+                pending_jobs = self.get_jobs(connection, JOB_STATUS_PENDING)
+                if not pending_jobs:
+                    return None
+                now = time.time()
+                training_job = pending_jobs[0]._replace(status=JOB_STATUS_RUNNING, claimed_time=now,
+                                                        heartbeat_time=now, worker_host=self.host_name,
+                                                        worker_pid=os.getpid())
+                connection.execute("UPDATE training_job SET status = ?, claimed_time = ?, heartbeat_time = ?, "
+                                   "worker_host = ?, worker_pid = ? WHERE job_id = ?",
+                                   [training_job.status, now, now, training_job.worker_host,
+                                    training_job.worker_pid, training_job.job_id])
+                return training_job
+
+            return self.run_transaction(claim_job)
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def heartbeat(self, training_job: TrainingJob) -> bool:
+        """
+        Description: Function is used to tell that the worker of a running job is alive
+        return: False if the job is no longer owned by this worker
+        """
+        try:
+            with closing(self.get_connection()) as connection:
+                cursor = connection.execute("UPDATE training_job SET heartbeat_time = ? WHERE job_id = ? AND "
+                                            "status = ? AND worker_pid = ?",
+                                            [time.time(), training_job.job_id, JOB_STATUS_RUNNING,
+                                             training_job.worker_pid])
+                return cursor.rowcount == 1
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def complete(self, training_job: TrainingJob, is_failed: bool = False, message: str = None):
+        try:
+            with closing(self.get_connection()) as connection:
+                connection.execute("UPDATE training_job SET status = ?, finished_time = ?, message = ? "
+                                   "WHERE job_id = ?",
+                                   [JOB_STATUS_FAILED if is_failed else JOB_STATUS_DONE, time.time(), message,
+                                    training_job.job_id])
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def get_active_jobs(self) -> list:
+        """
+        Description: Function is used to get running and pending jobs, stale running jobs are left out
+        """
+        try:
+            with closing(self.get_connection()) as connection:
+                return self.get_running_jobs(connection) + self.get_jobs(connection, JOB_STATUS_PENDING)
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def is_busy(self) -> bool:
+        """
+        Description: Function is used to check if a training job is pending or running
+        """
+        return len(self.get_active_jobs()) > 0
+
+    def get_job(self, experiment_id: str):
+        try:
+            with closing(self.get_connection()) as connection:
+                row = connection.execute("SELECT * FROM training_job WHERE experiment_id = ?",
+                                         [experiment_id]).fetchone()
+            return None if row is None else TrainingJob(**dict(row))
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def get_last_job(self):
+        try:
+            with closing(self.get_connection()) as connection:
+                row = connection.execute("SELECT * FROM training_job ORDER BY job_id DESC LIMIT 1").fetchone()
+            return None if row is None else TrainingJob(**dict(row))
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def get_alive_worker_pids(self) -> list:
+        """
+        Description: Function is used to get the pids of running worker processes, files of dead workers are removed
+        """
+        try:
+            alive_worker_pids = []
+            for pid_file_name in os.listdir(self.workers_dir):
+                pid = int(pid_file_name.split(".")[0])
+                try:
+                    os.kill(pid, 0)
+                    alive_worker_pids.append(pid)
+                except ProcessLookupError:
+                    try:
+                        os.remove(os.path.join(self.workers_dir, pid_file_name))
+                    except FileNotFoundError:
+                        pass
+                except PermissionError:
+                    alive_worker_pids.append(pid)
+            return alive_worker_pids
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
@@ -0,0 +1,162 @@
+from concrete.pipline.pipline import Pipeline
+from concrete.config.configuration import Configuration
+from concrete.pipline.training_queue import TrainingJobQueue, TrainingJob, STALE_JOB_MESSAGE
+from concrete.constant import ROOT_DIR, get_current_time_stamp
+from concrete.exception import ConcreteException
+from concrete.logger import get_logger, configure_logging
+from threading import Thread, Event
+import subprocess
+import argparse
+import os, sys
+import time
+
+logger = get_logger(__name__)
+
+POLL_INTERVAL = 1.0
+HEARTBEAT_INTERVAL = 10.0
+
+# worker processes started by this process, polled so that exited workers do not stay zombies
+worker_processes = []
+
+
+def record_stale_jobs(training_job_queue: TrainingJobQueue) -> list:
+    """
+    Description: Function is used to mark jobs of dead workers failed in the job queue and in experiment records
+    return: stale jobs
+    """
+    try:
+        stale_jobs = training_job_queue.recover_stale_jobs()
+        for training_job in stale_jobs:
+            Pipeline.save_failed_experiment(experiment_id=training_job.experiment_id, message=STALE_JOB_MESSAGE)
+        return stale_jobs
+    except Exception as e:
+        raise ConcreteException(e, sys) from e
+
+
+class TrainingWorker:
+
+    def __init__(self, config: Configuration, idle_timeout: float = None):
+        """
+        Description: Function is used to get the training queue of the worker
+        param config: pipeline configuration, a new time stamp is used for every job
+        param idle_timeout: seconds without jobs after which the worker exits, None or 0 to wait forever
+        """
+        try:
+            self.config = config
+            training_pipeline_config = config.training_pipeline_config
+            self.training_job_queue = TrainingJobQueue(queue_dir=training_pipeline_config.training_queue_dir,
+                                                       stale_timeout=training_pipeline_config.job_stale_timeout)
+            Pipeline.init_experiment_store(artifact_dir=training_pipeline_config.artifact_dir)
+            self.idle_timeout = training_pipeline_config.worker_idle_timeout if idle_timeout is None \
+                else idle_timeout
+            self.pid_file_path = os.path.join(self.training_job_queue.workers_dir, f"{os.getpid()}.pid")
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def send_heartbeats(self, training_job: TrainingJob, is_finished: Event):
+        while not is_finished.wait(HEARTBEAT_INTERVAL):
+            try:
+                if not self.training_job_queue.heartbeat(training_job):
+                    logger.info(f"Training job is no longer owned by worker [{os.getpid()}]: {training_job}")
+            except Exception as e:
+                logger.exception(e)
+
+    def run_job(self, training_job: TrainingJob):
+        """
+        Description: Function is used to run the pipeline of a claimed job while sending heartbeats, a failed
+                     pipeline is recorded in experiment records and does not stop the worker
+        """
+        is_finished = Event()
+        heartbeat_thread = Thread(target=self.send_heartbeats, args=(training_job, is_finished), daemon=True,
+                                  name="training_job_heartbeat")
+        heartbeat_thread.start()
+        is_failed, message = False, None
+        try:
+            logger.info(f"Training worker [{os.getpid()}] running job: {training_job}")
+            pipeline = Pipeline(config=Configuration(config_file_path=self.config.config_file_path,
+                                                     current_time_stamp=get_current_time_stamp()))
+            pipeline.run_pipeline(experiment_id=training_job.experiment_id)
+        except Exception as e:
+            logger.exception(e)
+            # innermost error of the ConcreteException chain is the one worth showing in experiment history
+            root_error = e
+            while (root_error.__cause__ or root_error.__context__) is not None:
+                root_error = root_error.__cause__ or root_error.__context__
+            is_failed, message = True, f"Pipeline has failed: {root_error}"
+            Pipeline.save_failed_experiment(experiment_id=training_job.experiment_id, message=message)
+        finally:
+            is_finished.set()
+            heartbeat_thread.join()
+            self.training_job_queue.complete(training_job, is_failed=is_failed, message=message)
+
+    def run(self):
+        """
+        Description: Function is used to run queued jobs one after another until the queue stays empty for
+                     idle_timeout seconds
+        """
+        try:
+            with open(self.pid_file_path, "w") as pid_file:
+                pid_file.write(str(os.getpid()))
+            logger.info(f"Training worker [{os.getpid()}] started.")
+            idle_since = time.monotonic()
+            while True:
+                record_stale_jobs(self.training_job_queue)
+                training_job = self.training_job_queue.claim()
+                if training_job is not None:
+                    self.run_job(training_job)
+                    idle_since = time.monotonic()
+                    continue
+                if self.idle_timeout and time.monotonic() - idle_since >= self.idle_timeout:
+                    break
+                time.sleep(POLL_INTERVAL)
+            logger.info(f"Training worker [{os.getpid()}] stopped after {self.idle_timeout}s without jobs.")
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+        finally:
+            if os.path.exists(self.pid_file_path):
+                os.remove(self.pid_file_path)
+
+
+def start_training_worker(training_job_queue: TrainingJobQueue, config_file_path: str = None):
+    """
+    Description: Function is used to start a training worker process when none is alive, the worker runs outside
+                 the web process so training does not compete with prediction requests for the GIL
+    return: pid of the started worker or None if a worker is already alive
+    """
+    try:
+        for worker_process in worker_processes[:]:
+            if worker_process.poll() is not None:
+                worker_processes.remove(worker_process)
+        if training_job_queue.get_alive_worker_pids():
+            return None
+        command = [sys.executable, "-m", "concrete.pipline.training_worker"]
+        if config_file_path is not None:
+            command.extend(["--config-file-path", config_file_path])
+        worker_process = subprocess.Popen(command, cwd=ROOT_DIR, stdin=subprocess.DEVNULL,
+                                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                          start_new_session=True)
+        worker_processes.append(worker_process)
+        # pid file is written here as well so that concurrent requests do not start a second worker
+        with open(os.path.join(training_job_queue.workers_dir, f"{worker_process.pid}.pid"), "w") as pid_file:
+            pid_file.write(str(worker_process.pid))
+        logger.info(f"Training worker process started: [{worker_process.pid}]")
+        return worker_process.pid
+    except Exception as e:
+        raise ConcreteException(e, sys) from e
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued training pipelines outside the web process.")
+    parser.add_argument("--config-file-path", default=None)
+    parser.add_argument("--idle-timeout", type=float, default=None,
+                        help="seconds without jobs after which the worker exits, 0 to wait forever")
+    args = parser.parse_args()
+    configure_logging()
+
+    config = Configuration() if args.config_file_path is None else \
+        Configuration(config_file_path=args.config_file_path)
+    TrainingWorker(config=config, idle_timeout=args.idle_timeout).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+from concrete.exception import ConcreteException
+from collections import namedtuple
+from contextlib import contextmanager
+from threading import Lock, local, get_ident
+import os, sys
+import time
+
+try:
+    import resource
+except ImportError:
+    # not available on windows, cpu time of child processes and peak rss are not recorded there
+    resource = None
+
+PROC_STATUS_FILE_PATH = "/proc/self/status"
+PROC_IO_FILE_PATH = "/proc/self/io"
+PROC_CLEAR_REFS_FILE_PATH = "/proc/self/clear_refs"
+# writing 5 to clear_refs resets the peak rss (VmHWM) of the process
+RESET_PEAK_RSS = "5"
+
+ProfileStep = namedtuple("ProfileStep", ["step_id", "parent_step_id", "name", "depth", "process_id", "start_time",
+                                         "wall_time", "cpu_time", "peak_rss", "read_bytes", "write_bytes"])
+
+
+def get_cpu_time() -> float:
+    # cpu time of all threads of the process and of its child processes that have been waited for
+    cpu_time = time.process_time()
+    if resource is not None:
+        children_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu_time += children_usage.ru_utime + children_usage.ru_stime
+    return cpu_time
+
+
+def get_io_bytes():
+    """
+    Description: Function is used to get the bytes read and written by the process through system calls,
+                 page cache hits included and memory mapped reads excluded
+    return: (read bytes, written bytes) or (None, None) if /proc/self/io is not available
+    """
+    try:
+        with open(PROC_IO_FILE_PATH) as io_file:
+            io_counters = dict(line.split(":") for line in io_file)
+        return int(io_counters["rchar"]), int(io_counters["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+def get_peak_rss():
+    """
+    Description: Function is used to get the peak resident memory of the process in bytes
+    """
+    try:
+        with open(PROC_STATUS_FILE_PATH) as status_file:
+            for line in status_file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def reset_peak_rss() -> bool:
+    try:
+        with open(PROC_CLEAR_REFS_FILE_PATH, "w") as clear_refs_file:
+            clear_refs_file.write(RESET_PEAK_RSS)
+        return True
+    except OSError:
+        return False
+
+
+class ProfileFrame:
+    """
+    Open step of a profiler with the resource counters read when it started.
+    """
+
+    def __init__(self, step_id: int, parent, name: str):
+        self.step_id = step_id
+        self.parent = parent
+        self.name = name
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.child_peak_rss = 0
+        self.start_time = time.time()
+        self.start_counter = time.perf_counter()
+        self.start_cpu_time = get_cpu_time()
+        self.start_read_bytes, self.start_write_bytes = get_io_bytes()
+
+
+class Profiler:
+    """
+    Records wall time, cpu time, peak rss and bytes read/written of the steps of a pipeline run.
+
+    Steps are nested with profile_step, as a context manager or a decorator, and are only recorded while a
+    profiler is active in the process, otherwise profile_step does nothing. Each thread nests its own steps,
+    steps of other threads (thread pools, background writers) are attached to the innermost open step of the
+    thread that started the profiler. The peak rss is reset when a step of that thread starts, so it is the
+    peak of the step; steps of other threads report the peak of the process. Cpu time and bytes are
+    counted for the whole process, cpu time of child processes is included once they have exited. Steps
+    recorded in worker processes are merged with merge_steps.
+    """
+    active: "Profiler" = None
+
+    def __init__(self):
+        try:
+            self.steps = []
+            self._step_count = 0
+            self._lock = Lock()
+            self._local = local()
+            self._owner_thread_id = None
+            self._owner_stack = []
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+    def _get_stack(self) -> list:
+        if get_ident() == self._owner_thread_id:
+            return self._owner_stack
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def _next_step_id(self) -> int:
+        with self._lock:
+            self._step_count += 1
+            return self._step_count
+
+    def start(self):
+        """
+        Description: Function is used to make the profiler the active one of the process, the calling thread
+                     owns it
+        """
+        self._owner_thread_id = get_ident()
+        Profiler.active = self
+        return self
+
+    def stop(self) -> list:
+        """
+        Description: Function is used to end the steps still open (e.g. after an error) and deactivate the profiler
+        return: recorded steps
+        """
+        while self._owner_stack:
+            self.end_step(self._owner_stack[-1])
+        if Profiler.active is self:
+            Profiler.active = None
+        return self.get_steps()
+
+    def start_step(self, name: str) -> ProfileFrame:
+        stack = self._get_stack()
+        parent = stack[-1] if stack else (self._owner_stack[-1] if self._owner_stack else None)
+        if get_ident() == self._owner_thread_id:
+            reset_peak_rss()
+        frame = ProfileFrame(step_id=self._next_step_id(), parent=parent, name=name)
+        stack.append(frame)
+        return frame
+
+    def end_step(self, frame: ProfileFrame) -> ProfileStep:
+        stack = self._get_stack()
+        if frame in stack:
+            stack.remove(frame)
+        read_bytes, write_bytes = get_io_bytes()
+        peak_rss = get_peak_rss()
+        if peak_rss is not None:
+            peak_rss = max(peak_rss, frame.child_peak_rss)
+            if frame.parent is not None:
+                # a nested step reset the peak of its parent
+                frame.parent.child_peak_rss = max(frame.parent.child_peak_rss, peak_rss)
+        profile_step = ProfileStep(step_id=frame.step_id,
+                                   parent_step_id=None if frame.parent is None else frame.parent.step_id,
+                                   name=frame.name,
+                                   depth=frame.depth,
+                                   process_id=os.getpid(),
+                                   start_time=frame.start_time,
+                                   wall_time=time.perf_counter() - frame.start_counter,
+                                   cpu_time=get_cpu_time() - frame.start_cpu_time,
+                                   peak_rss=peak_rss,
+                                   read_bytes=None if read_bytes is None else read_bytes - frame.start_read_bytes,
+                                   write_bytes=None if write_bytes is None else write_bytes - frame.start_write_bytes)
+        with self._lock:
+            self.steps.append(profile_step)
+        return profile_step
+
+    def get_steps(self) -> list:
+        with self._lock:
+            return sorted(self.steps, key=lambda step: step.step_id)
+
+    def merge_steps(self, steps: list):
+        """
+        Description: Function is used to add the steps recorded by a profiler of a worker process, its top
+                     level steps are attached to the current step of the calling thread
+        """
+        try:
+            stack = self._get_stack()
+            parent = stack[-1] if stack else (self._owner_stack[-1] if self._owner_stack else None)
+            step_ids = {step.step_id: self._next_step_id() for step in sorted(steps, key=lambda step: step.step_id)}
+            for step in steps:
+                if step.parent_step_id in step_ids:
+                    parent_step_id = step_ids[step.parent_step_id]
+                else:
+                    parent_step_id = None if parent is None else parent.step_id
+                with self._lock:
+                    self.steps.append(step._replace(step_id=step_ids[step.step_id], parent_step_id=parent_step_id,
+                                                    depth=step.depth + (0 if parent is None else parent.depth + 1)))
+        except Exception as e:
+            raise ConcreteException(e, sys) from e
+
+
+@contextmanager
+def profile_step(name: str):
+    """
+    Description: Function is used to record a step with the active profiler of the process, e.g.
+                 `with profile_step("read_csv"):` or `@profile_step("kaggle download")`
+    """
+    profiler = Profiler.active
+    if profiler is None:
+        yield
+        return
+    frame = profiler.start_step(name)
+    try:
+        yield
+    finally:
+        profiler.end_step(frame)
+
+
+def get_profile_breakdown(steps: list) -> list:
+    """
+    Description: Function is used to order profiled steps as a tree for display
+    param steps: dicts with the fields of ProfileStep
+    return: steps in tree order with self_time (wall time not spent in child steps) and share of the total
+            wall time
+    """
+    try:
+        children = {}
+        for step in steps:
+            children.setdefault(step["parent_step_id"], []).append(step)
+        step_ids = {step["step_id"] for step in steps}
+        roots = [step for step in steps if step["parent_step_id"] not in step_ids]
+        total_wall_time = sum(step["wall_time"] for step in roots) or None
+        breakdown = []
+
+        def add_step(step: dict):
+            step_children = sorted(children.get(step["step_id"], []), key=lambda child: child["start_time"])
+            child_wall_time = sum(child["wall_time"] for child in step_children
+                                  if child["process_id"] == step["process_id"])
+            breakdown.append({**step,
+                              "self_time": max(step["wall_time"] - child_wall_time, 0.0),
+                              "share": step["wall_time"] / total_wall_time if total_wall_time else None})
+            for child in step_children:
+                add_step(child)
+
+        for root in sorted(roots, key=lambda root: root["start_time"]):
+            add_step(root)
+        return breakdown
+    except Exception as e:
+        raise ConcreteException(e, sys) from e
@@ -1,8 +1,12 @@
 import yaml
 from concrete.exception import ConcreteException
+from concrete.util.profiler import profile_step
 import sys
 import numpy as np
 import dill
+import json
+import shutil
+import hashlib
 import pandas as pd
 from concrete.constant import *
 
@@ -49,13 +53,16 @@ def save_numpy_array_data(file_path: str, array: np.array):
         raise ConcreteException(e, sys) from e
 
 
-def load_numpy_array_data(file_path: str) -> np.array:
+def load_numpy_array_data(file_path: str, mmap_mode: str = None) -> np.array:
     """
     load numpy array data from file
     file_path: str location of file to load
+    mmap_mode: str numpy memory map mode, array is memory mapped instead of read if given
     return: np.array data loaded
     """
     try:
+        if mmap_mode is not None:
+            return np.load(file_path, mmap_mode=mmap_mode)
         with open(file_path, 'rb') as file_obj:
             return np.load(file_obj)
     except Exception as e:
@@ -70,7 +77,7 @@ def save_object(file_path: str, obj):
     try:
         dir_path = os.path.dirname(file_path)
         os.makedirs(dir_path, exist_ok=True)
-        with open(file_path, "wb") as file_obj:
+        with profile_step(f"dill dump {os.path.basename(file_path)}"), open(file_path, "wb") as file_obj:
             dill.dump(obj, file_obj)
     except Exception as e:
         raise ConcreteException(e, sys) from e
@@ -87,20 +94,134 @@ def load_object(file_path: str):
         raise ConcreteException(e, sys) from e
 
 
-def load_data(file_path: str, schema_file_path: str) -> pd.DataFrame:
+def get_file_hash(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Get sha256 of file content
+    file_path: str location of file
+    return: hex digest
+    """
+    try:
+        file_hash = hashlib.sha256()
+        with open(file_path, "rb") as file_obj:
+            for chunk in iter(lambda: file_obj.read(chunk_size), b""):
+                file_hash.update(chunk)
+        return file_hash.hexdigest()
+    except Exception as e:
+        raise ConcreteException(e, sys) from e
+
+
+def is_columnar_data(path: str) -> bool:
+    """
+    Check if path is a columnar data directory written by save_columnar_data
+    """
+    return os.path.isfile(os.path.join(path, COLUMNAR_METADATA_FILE_NAME))
+
+
+def save_columnar_data(dir_path: str, dataframe: pd.DataFrame):
+    """
+    Save dataframe as one .npy file per column with the column names and dtypes in a metadata file
+    The directory is written next to its final location and swapped in, so readers never see a partial write
+    dir_path: str location of columnar data directory
+    dataframe: pd.DataFrame data to save
+    """
+    try:
+        temp_dir_path = f"{dir_path.rstrip(os.sep)}.{os.getpid()}.tmp"
+        shutil.rmtree(temp_dir_path, ignore_errors=True)
+        os.makedirs(temp_dir_path)
+        columns = []
+        for index, column in enumerate(dataframe.columns):
+            array = dataframe[column].to_numpy()
+            column_file_name = f"{index}.npy"
+            np.save(os.path.join(temp_dir_path, column_file_name), array, allow_pickle=False)
+            columns.append({"name": column, "dtype": str(array.dtype), "file_name": column_file_name})
+        with open(os.path.join(temp_dir_path, COLUMNAR_METADATA_FILE_NAME), "w") as metadata_file:
+            json.dump({"row_count": len(dataframe), "columns": columns}, metadata_file, indent=4)
+
+        old_dir_path = f"{dir_path.rstrip(os.sep)}.{os.getpid()}.old"
+        if os.path.exists(dir_path):
+            os.replace(dir_path, old_dir_path)
+        os.makedirs(os.path.dirname(os.path.abspath(dir_path)), exist_ok=True)
+        os.replace(temp_dir_path, dir_path)
+        shutil.rmtree(old_dir_path, ignore_errors=True)
+    except Exception as e:
+        raise ConcreteException(e, sys) from e
+
+
+def load_columnar_data(dir_path: str, mmap_mode: str = "r") -> pd.DataFrame:
+    """
+    Load columnar data directory as dataframe, column files are memory mapped instead of parsed
+    dir_path: str location of columnar data directory
+    mmap_mode: str numpy memory map mode, None to read columns fully into memory
+    return: pd.DataFrame
+    """
+    try:
+        with open(os.path.join(dir_path, COLUMNAR_METADATA_FILE_NAME)) as metadata_file:
+            metadata = json.load(metadata_file)
+        # copy=False keeps one block per column backed by its memory map, a dict is copied into consolidated
+        # blocks by default which reads the whole file into memory
+        return pd.DataFrame({column["name"]: np.load(os.path.join(dir_path, column["file_name"]), mmap_mode=mmap_mode)
+                             for column in metadata["columns"]}, copy=False)
+    except Exception as e:
+        raise ConcreteException(e, sys) from e
+
+
+def read_data_frame(file_path: str) -> pd.DataFrame:
+    """
+    Read columnar data directory or csv file as dataframe
+    file_path: str location of data
+    return: pd.DataFrame
+    """
+    try:
+        if is_columnar_data(file_path):
+            return load_columnar_data(file_path)
+        with profile_step(f"read_csv {os.path.basename(file_path)}"):
+            return pd.read_csv(file_path)
+    except Exception as e:
+        raise ConcreteException(e, sys) from e
+
+
+def get_schema_typed_data_frame(dataframe: pd.DataFrame, schema_file_path: str) -> pd.DataFrame:
+    """
+    Cast columns of dataframe to dtypes of schema file, columns are matched ignoring spaces in their name
+    Columns missing in schema or failing to cast keep their dtype and are reported by data validation
+    return: pd.DataFrame
+    """
+    try:
+        schema = read_yaml_file(schema_file_path)[SCHEMA_COLUMNS_KEY]
+        for column in dataframe.columns:
+            dtype = schema.get(column.replace(" ", ""))
+            if dtype is None:
+                continue
+            try:
+                dataframe[column] = dataframe[column].astype(dtype)
+            except (TypeError, ValueError):
+                pass
+        return dataframe
+    except Exception as e:
+        raise ConcreteException(e, sys) from e
+
+
+def load_data(file_path: str, schema_file_path: str, dataframe: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    file_path: str location of columnar or csv data
+    schema_file_path: str location of schema file
+    dataframe: pd.DataFrame already in memory, checked against schema instead of reading file_path and left
+               unchanged as it may still be written by the artifact writer
+    """
     try:
         dataset_schema = read_yaml_file(schema_file_path)
 
         schema = dataset_schema["columns"]
 
-        dataframe = pd.read_csv(file_path)
+        dataframe = read_data_frame(file_path) if dataframe is None else dataframe.copy(deep=False)
         dataframe.columns = dataframe.columns.str.replace(" ", "")
 
         error_message = ""
 
         for column in dataframe.columns.str.rstrip():
             if column in list(schema.keys()):
-                dataframe[column].astype(schema[column])
+                if dataframe[column].dtype != schema[column]:
+                    dataframe[column].astype(schema[column])
             else:
                 error_message = f"{error_message} \nColumn: [{column}] is not in the schema."
         if len(error_message) > 0:
@@ -0,0 +1,22 @@
+# gunicorn settings of the flask app, loaded from the working directory by gunicorn
+# every worker writes its prometheus metrics to memory mapped files of PROMETHEUS_MULTIPROC_DIR and /metrics
+# aggregates them, the directory is emptied when the server starts so samples of a previous run are dropped
+import os
+import shutil
+
+from concrete.constant import ROOT_DIR, PROMETHEUS_MULTIPROC_DIR_ENV_KEY, METRICS_DIR_NAME
+from concrete.logger import configure_logging
+
+# set before the app is imported, prometheus_client picks the multiprocess mode when it is imported
+metrics_dir = os.environ.setdefault(PROMETHEUS_MULTIPROC_DIR_ENV_KEY, os.path.join(ROOT_DIR, METRICS_DIR_NAME))
+shutil.rmtree(metrics_dir, ignore_errors=True)
+os.makedirs(metrics_dir, exist_ok=True)
+
+# logging of the master, forked workers write their own log files
+configure_logging()
+
+
+def child_exit(server, worker):
+    # in progress gauges of a worker are dropped when it exits, its counters and histograms are kept
+    from concrete.entity.serving_metrics import mark_process_dead
+    mark_process_dead(worker.pid)
@@ -31,6 +31,6 @@ name=PROJECT_NAME,
 version=VERSION,
 author=AUTHOR,
 description=DESRCIPTION,
-packages=find_packages(), 
+packages=find_packages(exclude=["tests", "tests.*"]), 
 install_requires=get_requirements_list()
 )
\ No newline at end of file
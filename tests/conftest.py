@@ -0,0 +1,52 @@
+from concrete.component.model_trainer import ConcreteEstimatorModel
+from concrete.entity.predictor import ConcreteData
+from concrete.entity.model_registry import write_manifest
+from concrete.util.util import save_object
+from sklearn.preprocessing import StandardScaler
+from sklearn.linear_model import LinearRegression
+import numpy as np
+import pandas as pd
+import pytest
+import shutil
+import os
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA_FILE_PATH = os.path.join(REPO_DIR, "config", "schema.yaml")
+
+
+def get_concrete_data_frame(row_count: int = 200, seed: int = 0) -> pd.DataFrame:
+    # inputs of the concrete dataset with a strength linear in them
+    random_generator = np.random.default_rng(seed)
+    dataframe = pd.DataFrame({column: random_generator.uniform(0.0, 500.0, row_count).round(1)
+                              for column in ConcreteData.input_columns})
+    dataframe["age"] = random_generator.integers(1, 365, row_count)
+    dataframe["concrete_compressive_strength"] = (0.1 * dataframe["cement"] + 0.05 * dataframe["age"]
+                                                  - 0.05 * dataframe["water"]
+                                                  + random_generator.normal(0.0, 1.0, row_count)).round(2)
+    return dataframe
+
+
+def export_model_version(model_dir: str, version: str, model_file_path: str) -> str:
+    # version dir with the pickled model and its manifest as written by model pusher
+    version_dir = os.path.join(model_dir, version)
+    os.makedirs(version_dir)
+    shutil.copyfile(model_file_path, os.path.join(version_dir, os.path.basename(model_file_path)))
+    write_manifest(version_dir, version=version, model_file_name=os.path.basename(model_file_path))
+    return os.path.join(version_dir, os.path.basename(model_file_path))
+
+
+@pytest.fixture
+def concrete_data_frame() -> pd.DataFrame:
+    return get_concrete_data_frame()
+
+
+@pytest.fixture
+def concrete_model_file_path(tmp_path, concrete_data_frame) -> str:
+    X = concrete_data_frame[ConcreteData.input_columns]
+    preprocessing_object = StandardScaler().fit(X)
+    trained_model_object = LinearRegression().fit(preprocessing_object.transform(X),
+                                                  concrete_data_frame["concrete_compressive_strength"])
+    model_file_path = os.path.join(str(tmp_path), "model_trainer", "model.pkl")
+    save_object(file_path=model_file_path, obj=ConcreteEstimatorModel(preprocessing_object=preprocessing_object,
+                                                                      trained_model_object=trained_model_object))
+    return model_file_path
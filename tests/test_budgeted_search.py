@@ -0,0 +1,76 @@
+from concrete.entity.budgeted_search import BudgetedSearchCV, STRATEGY_HALVING, STRATEGY_EXHAUSTIVE
+from concrete.entity.predictor import ConcreteData
+from sklearn.base import BaseEstimator, RegressorMixin
+from sklearn.linear_model import Ridge
+from sklearn.model_selection import GridSearchCV
+import numpy as np
+import pytest
+import time
+
+FIT_SECONDS = 0.02
+
+
+class SlowRegressor(BaseEstimator, RegressorMixin):
+    # predicts the mean of the target, every fit takes FIT_SECONDS
+    def __init__(self, shift: float = 0.0):
+        self.shift = shift
+
+    def fit(self, X, y):
+        time.sleep(FIT_SECONDS)
+        self.mean_ = float(np.mean(y)) + self.shift
+        return self
+
+    def predict(self, X):
+        return np.full(len(X), self.mean_)
+
+
+class RowCountRegressor(Ridge):
+    # records the number of rows of every fit
+    row_counts = []
+
+    def fit(self, X, y, sample_weight=None):
+        RowCountRegressor.row_counts.append(len(X))
+        return super().fit(X, y, sample_weight=sample_weight)
+
+
+def get_features(concrete_data_frame):
+    return concrete_data_frame[ConcreteData.input_columns].to_numpy(), \
+        concrete_data_frame["concrete_compressive_strength"].to_numpy()
+
+
+@pytest.mark.parametrize("strategy", [STRATEGY_HALVING, STRATEGY_EXHAUSTIVE])
+def test_search_stops_within_time_budget(concrete_data_frame, strategy):
+    X, y = get_features(concrete_data_frame)
+    time_budget = 0.3
+    param_grid = {"shift": list(np.linspace(0.0, 1.0, 100))}
+    budgeted_search = BudgetedSearchCV(SlowRegressor(), param_grid, strategy=strategy, cv=2, min_resources=20,
+                                       time_budget=time_budget).fit(X, y)
+
+    assert budgeted_search.n_candidates_scored_ < len(param_grid["shift"])
+    # overrun by at most the candidate being scored (2 folds) and the refit
+    assert budgeted_search.search_time_ < time_budget + 3 * FIT_SECONDS + 0.2
+
+
+def test_halving_rounds_fit_subsamples(concrete_data_frame):
+    X, y = get_features(concrete_data_frame)
+    RowCountRegressor.row_counts = []
+    budgeted_search = BudgetedSearchCV(RowCountRegressor(), {"alpha": [0.01, 0.1, 1.0, 10.0, 100.0]},
+                                       strategy=STRATEGY_HALVING, cv=2, factor=2, min_resources=20).fit(X, y)
+
+    assert budgeted_search.cv_results_["n_resources"][0] < len(y)
+    assert budgeted_search.best_n_resources_ == len(y)
+    # 2 fold cross validation trains on half the rows of its round, the refit on all rows
+    fold_row_counts = {row_count for n_resources in budgeted_search.cv_results_["n_resources"]
+                       for row_count in [n_resources // 2, n_resources - n_resources // 2]}
+    assert set(RowCountRegressor.row_counts) <= fold_row_counts | {len(y)}
+    assert RowCountRegressor.row_counts[-1] == len(y)
+
+
+def test_exhaustive_search_matches_grid_search(concrete_data_frame):
+    X, y = get_features(concrete_data_frame)
+    param_grid = {"alpha": [0.01, 1.0, 100.0, 10000.0]}
+    budgeted_search = BudgetedSearchCV(Ridge(), param_grid, strategy=STRATEGY_EXHAUSTIVE, cv=5).fit(X, y)
+    grid_search = GridSearchCV(Ridge(), param_grid, cv=5).fit(X, y)
+
+    assert budgeted_search.best_params_ == grid_search.best_params_
+    assert budgeted_search.best_score_ == pytest.approx(grid_search.best_score_)
@@ -0,0 +1,34 @@
+from concrete.component.model_trainer import ConcreteEstimatorModel
+from concrete.entity.compiled_model import compile_model, save_compiled_model, load_compiled_model
+from concrete.entity.predictor import ConcreteData
+from sklearn.preprocessing import StandardScaler
+from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.tree import DecisionTreeRegressor
+from sklearn.ensemble import RandomForestRegressor
+from tests.conftest import get_concrete_data_frame
+import numpy as np
+import pytest
+import os
+
+REGRESSORS = [LinearRegression(), Ridge(alpha=0.5), DecisionTreeRegressor(max_depth=6, random_state=0),
+              RandomForestRegressor(n_estimators=10, max_depth=5, random_state=0)]
+
+
+@pytest.mark.parametrize("regressor", REGRESSORS, ids=lambda regressor: type(regressor).__name__)
+def test_compiled_model_predicts_as_pickled_model(tmp_path, concrete_data_frame, regressor):
+    X = concrete_data_frame[ConcreteData.input_columns]
+    preprocessing_object = StandardScaler().fit(X)
+    model = ConcreteEstimatorModel(preprocessing_object=preprocessing_object,
+                                   trained_model_object=regressor.fit(preprocessing_object.transform(X),
+                                                                      concrete_data_frame[
+                                                                          "concrete_compressive_strength"]))
+    compiled_model_dir = os.path.join(str(tmp_path), "compiled_model")
+    save_compiled_model(compile_model(model), compiled_model_dir)
+    compiled_model = load_compiled_model(compiled_model_dir)
+
+    # rows not seen in training, as a batch and one at a time
+    X_new = get_concrete_data_frame(50, seed=7)[ConcreteData.input_columns]
+    expected = np.asarray(model.predict(X_new), dtype=np.float64).ravel()
+    np.testing.assert_allclose(compiled_model.predict(X_new), expected, rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(np.concatenate([compiled_model.predict(X_new.iloc[index:index + 1])
+                                               for index in range(len(X_new))]), expected, rtol=1e-9, atol=1e-9)
@@ -0,0 +1,71 @@
+from concrete.component.data_ingestion import DataIngestion
+from concrete.entity.config_entity import DataIngestionConfig
+from concrete.util.util import load_columnar_data
+from tests.conftest import get_concrete_data_frame, SCHEMA_FILE_PATH
+import pandas as pd
+import pytest
+import os
+
+
+def get_data_ingestion_config(base_dir: str, run: str) -> DataIngestionConfig:
+    ingestion_dir = os.path.join(base_dir, "artifact", "data_ingestion")
+    return DataIngestionConfig(author_username=None, kaggel_dataset_name=None,
+                               raw_data_dir=os.path.join(ingestion_dir, run, "raw_data"),
+                               ingested_train_dir=os.path.join(ingestion_dir, run, "ingested_data", "train"),
+                               ingested_test_dir=os.path.join(ingestion_dir, run, "ingested_data", "test"),
+                               source_type="local", local_source_dir=os.path.join(base_dir, "data"),
+                               ingestion_mode="incremental",
+                               source_data_dir=os.path.join(ingestion_dir, "source_data"),
+                               partitioned_train_dir=os.path.join(ingestion_dir, "partitioned_data", "train"),
+                               partitioned_test_dir=os.path.join(ingestion_dir, "partitioned_data", "test"),
+                               state_file_path=os.path.join(ingestion_dir, "ingestion_state.json"),
+                               schema_file_path=SCHEMA_FILE_PATH, export_csv=False)
+
+
+def ingest(base_dir: str, run: str) -> pd.DataFrame:
+    data_ingestion_artifact = DataIngestion(get_data_ingestion_config(base_dir, run)).initiate_data_ingestion()
+    return pd.concat([load_columnar_data(data_ingestion_artifact.train_file_path, mmap_mode=None),
+                      load_columnar_data(data_ingestion_artifact.test_file_path, mmap_mode=None)],
+                     ignore_index=True)
+
+
+def write_source(base_dir: str, dataframe: pd.DataFrame):
+    os.makedirs(os.path.join(base_dir, "data"), exist_ok=True)
+    dataframe.to_csv(os.path.join(base_dir, "data", "concrete.csv"), index=False)
+
+
+def test_incremental_ingestion_appends_new_rows_only(tmp_path):
+    base_dir = str(tmp_path)
+    first_rows = get_concrete_data_frame(100, seed=1)
+    # identical mixes with identical strength are separate lab observations
+    first_rows = pd.concat([first_rows, first_rows.iloc[:5]], ignore_index=True)
+    write_source(base_dir, first_rows)
+    assert len(ingest(base_dir, "run_1")) == 105
+
+    # an unchanged source adds nothing
+    assert len(ingest(base_dir, "run_2")) == 105
+
+    new_rows = pd.concat([get_concrete_data_frame(20, seed=2), first_rows.iloc[:3]], ignore_index=True)
+    write_source(base_dir, pd.concat([first_rows, new_rows], ignore_index=True))
+    ingested_rows = ingest(base_dir, "run_3")
+    assert len(ingested_rows) == 128
+    assert ingested_rows.duplicated().sum() == 8
+
+
+def test_incremental_ingestion_recovers_from_interrupted_run(tmp_path, monkeypatch):
+    base_dir = str(tmp_path)
+    first_rows = get_concrete_data_frame(100, seed=1)
+    write_source(base_dir, first_rows)
+    ingest(base_dir, "run_1")
+
+    write_source(base_dir, pd.concat([first_rows, get_concrete_data_frame(50, seed=2)], ignore_index=True))
+    with monkeypatch.context() as patch:
+        # the run stops after the partitions are written, before its state
+        patch.setattr(DataIngestion, "write_ingestion_state", lambda self, state: 1 / 0)
+        with pytest.raises(Exception):
+            ingest(base_dir, "run_2")
+
+    assert len(ingest(base_dir, "run_3")) == 150
+    partitioned_dir = os.path.join(base_dir, "artifact", "data_ingestion", "partitioned_data")
+    # only the generation of the last run is kept
+    assert [os.listdir(os.path.join(partitioned_dir, split)) for split in ["train", "test"]] == [["2"], ["2"]]
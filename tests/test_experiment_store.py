@@ -0,0 +1,67 @@
+from concrete.entity.experiment_store import ExperimentStore
+from concrete.constant import EXPERIMENT_STATUS_QUEUED, EXPERIMENT_STATUS_RUNNING, EXPERIMENT_STATUS_COMPLETED, \
+    EXPERIMENT_STATUS_FAILED
+import pandas as pd
+import os
+
+# experiment.csv of earlier versions, one row per lifecycle change of an experiment and no status column
+LEGACY_EXPERIMENTS = [
+    {"experiment_id": "a", "running_status": True, "start_time": "2024-01-01 10:00:00", "stop_time": None,
+     "message": "Pipeline has been started.", "accuracy": None, "is_model_accepted": None,
+     "created_time_stamp": "2024-01-01 10:00:00"},
+    {"experiment_id": "a", "running_status": False, "start_time": "2024-01-01 10:00:00",
+     "stop_time": "2024-01-01 10:05:00", "message": "Pipeline has been completed.", "accuracy": 0.91,
+     "is_model_accepted": True, "created_time_stamp": "2024-01-01 10:05:00"},
+    {"experiment_id": "b", "running_status": False, "start_time": "2024-01-02 10:00:00",
+     "stop_time": "2024-01-02 10:01:00", "message": "Pipeline has failed: no data", "accuracy": None,
+     "is_model_accepted": False, "created_time_stamp": "2024-01-02 10:00:00"},
+    {"experiment_id": "c", "running_status": True, "start_time": "2024-01-03 10:00:00", "stop_time": None,
+     "message": "Pipeline has been started.", "accuracy": None, "is_model_accepted": None,
+     "created_time_stamp": "2024-01-03 10:00:00"},
+]
+
+
+def get_experiment_store(base_dir: str) -> ExperimentStore:
+    return ExperimentStore(db_file_path=os.path.join(base_dir, "experiment", "experiment.db"))
+
+
+def test_experiment_is_upserted(tmp_path):
+    experiment_store = get_experiment_store(str(tmp_path))
+    experiment_store.save_experiment({"experiment_id": "a", "status": EXPERIMENT_STATUS_QUEUED})
+    created_time_stamp = experiment_store.get_experiment("a")["created_time_stamp"]
+    experiment_store.save_experiment({"experiment_id": "a", "status": EXPERIMENT_STATUS_COMPLETED,
+                                      "accuracy": 0.9, "is_model_accepted": True})
+
+    experiment = experiment_store.get_experiment("a")
+    assert experiment_store.get_experiment_count() == 1
+    assert (experiment["status"], experiment["accuracy"], experiment["is_model_accepted"]) == \
+        (EXPERIMENT_STATUS_COMPLETED, 0.9, 1)
+    # the first record keeps its creation time
+    assert experiment["created_time_stamp"] == created_time_stamp
+
+    experiment_store.save_experiment({"experiment_id": "a", "status": EXPERIMENT_STATUS_QUEUED}, is_update=False)
+    assert experiment_store.get_experiment("a")["status"] == EXPERIMENT_STATUS_COMPLETED
+    assert experiment_store.get_experiment_count(status=EXPERIMENT_STATUS_COMPLETED, is_model_accepted=True) == 1
+
+
+def test_legacy_csv_is_imported_once(tmp_path):
+    csv_file_path = os.path.join(str(tmp_path), "experiment.csv")
+    pd.DataFrame(LEGACY_EXPERIMENTS).to_csv(csv_file_path, index=False)
+    experiment_store = get_experiment_store(str(tmp_path))
+
+    assert experiment_store.import_csv_file(csv_file_path) == 3
+    assert experiment_store.import_csv_file(csv_file_path) == 0
+    assert experiment_store.get_experiment_count() == 3
+
+    # last row of an experiment with the creation time of its first row
+    experiment = experiment_store.get_experiment("a")
+    assert (experiment["status"], experiment["accuracy"], experiment["is_model_accepted"]) == \
+        (EXPERIMENT_STATUS_COMPLETED, 0.91, 1)
+    assert experiment["created_time_stamp"] == "2024-01-01 10:00:00"
+    assert experiment_store.get_experiment("b")["status"] == EXPERIMENT_STATUS_FAILED
+    assert experiment_store.get_experiment("c")["status"] == EXPERIMENT_STATUS_RUNNING
+
+    experiment_df = experiment_store.get_experiments(limit=2)
+    assert experiment_df["experiment_id"].tolist() == ["c", "b"]
+    assert experiment_store.get_experiments(limit=2, offset=2)["experiment_id"].tolist() == ["a"]
+    assert experiment_store.get_experiments(is_model_accepted=True)["is_model_accepted"].tolist() == [True]
@@ -0,0 +1,61 @@
+from concrete.logger.log_reader import LogIndex
+import json
+import os
+
+
+def get_log_line(message: str, level: str = "INFO", logger_name: str = "concrete.component.data_ingestion") -> str:
+    return json.dumps({"time": "2026-01-01 00:00:00,000", "level": level, "logger": logger_name, "line": 1,
+                       "file": "data_ingestion.py", "function": "initiate_data_ingestion",
+                       "message": message}) + "\n"
+
+
+def write_log(file_path: str, messages: list, mode: str = "a"):
+    with open(file_path, mode) as log_file:
+        log_file.writelines(get_log_line(message) for message in messages)
+
+
+def get_messages(log_index: LogIndex, per_page: int = 200) -> list:
+    return [log_record.message for log_record in log_index.get_page(page=1, per_page=per_page).records]
+
+
+def test_log_index_is_extended_with_appended_records(tmp_path):
+    file_path = os.path.join(str(tmp_path), "log.log")
+    write_log(file_path, ["first", "second"])
+    log_index = LogIndex(file_path)
+    assert log_index.refresh() == 2
+
+    write_log(file_path, ["third"])
+    # line still being written
+    with open(file_path, "a") as log_file:
+        log_file.write(get_log_line("fourth")[:20])
+    assert log_index.refresh() == 3
+    assert get_messages(log_index) == ["first", "second", "third"]
+
+    log_page = log_index.get_page(per_page=2)
+    assert (log_page.page, log_page.page_count, log_page.record_count) == (2, 2, 3)
+    assert [log_record.message for log_record in log_page.records] == ["third"]
+    assert log_index.get_page(level="WARNING").record_count == 0
+
+
+def test_log_index_is_rebuilt_after_truncation(tmp_path):
+    file_path = os.path.join(str(tmp_path), "log.log")
+    write_log(file_path, ["first", "second", "third"])
+    log_index = LogIndex(file_path)
+    assert log_index.refresh() == 3
+
+    write_log(file_path, ["after truncation"], mode="w")
+    assert log_index.refresh() == 1
+    assert get_messages(log_index) == ["after truncation"]
+
+
+def test_log_index_is_rebuilt_after_rotation(tmp_path):
+    file_path = os.path.join(str(tmp_path), "log.log")
+    write_log(file_path, ["first", "second"])
+    log_index = LogIndex(file_path)
+    assert log_index.refresh() == 2
+
+    # the rotated file is renamed and a new file at least as big takes its path
+    os.rename(file_path, f"{file_path}.1")
+    write_log(file_path, ["rotated 1", "rotated 2", "rotated 3"])
+    assert log_index.refresh() == 3
+    assert get_messages(log_index) == ["rotated 1", "rotated 2", "rotated 3"]
@@ -0,0 +1,37 @@
+from concrete.entity.micro_batcher import MicroBatcher, PredictionQueueFull
+import asyncio
+import pytest
+
+
+def test_rows_are_scored_in_batches():
+    async def run():
+        micro_batcher = MicroBatcher(predict_function=lambda rows: [sum(row) for row in rows], max_batch_size=8)
+        await micro_batcher.start()
+        try:
+            predictions = await asyncio.gather(*[micro_batcher.predict([index, 1]) for index in range(20)])
+        finally:
+            await micro_batcher.close()
+        return predictions, micro_batcher.get_stats()
+
+    predictions, stats = asyncio.run(run())
+    assert predictions == [index + 1 for index in range(20)]
+    assert stats["rows"] == 20 and stats["batches"] < 20
+
+
+def test_full_queue_raises_prediction_queue_full():
+    async def run():
+        micro_batcher = MicroBatcher(predict_function=lambda rows: rows, max_pending_requests=2)
+        # not started, rows stay queued
+        micro_batcher.queue = asyncio.Queue(maxsize=micro_batcher.max_pending_requests)
+        pending = [asyncio.ensure_future(micro_batcher.predict([index])) for index in range(2)]
+        await asyncio.sleep(0)
+        try:
+            with pytest.raises(PredictionQueueFull):
+                await micro_batcher.predict([2])
+        finally:
+            for future in pending:
+                future.cancel()
+            micro_batcher.executor.shutdown()
+        return micro_batcher.get_stats()
+
+    assert asyncio.run(run())["rejected"] == 1
@@ -0,0 +1,45 @@
+from concrete.entity.model_cache import ModelCache
+from concurrent.futures import ThreadPoolExecutor
+import shutil
+import sys
+import os
+
+THREAD_COUNT = 8
+CALL_COUNT = 2000
+
+
+def test_counters_of_concurrent_requests(concrete_model_file_path):
+    model_cache = ModelCache(model_dir=os.path.dirname(concrete_model_file_path), check_interval=60.0)
+
+    def get_models(_):
+        for _ in range(CALL_COUNT):
+            model_cache.get_model(lambda: concrete_model_file_path)
+
+    switch_interval = sys.getswitchinterval()
+    # frequent thread switches so that unsynchronized counter updates would be lost
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(max_workers=THREAD_COUNT) as executor:
+            list(executor.map(get_models, range(THREAD_COUNT)))
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    stats = model_cache.get_stats()
+    assert stats["misses"] == 1 and stats["reloads"] == 0
+    assert stats["hits"] + stats["misses"] == THREAD_COUNT * CALL_COUNT
+    assert stats["model_path"] == concrete_model_file_path
+
+
+def test_new_model_is_reloaded(concrete_model_file_path):
+    model_dir = os.path.dirname(concrete_model_file_path)
+    model_cache = ModelCache(model_dir=model_dir, check_interval=0.0)
+    model_cache.get_model(lambda: concrete_model_file_path)
+
+    new_model_file_path = os.path.join(model_dir, "new_model.pkl")
+    shutil.copyfile(concrete_model_file_path, new_model_file_path)
+    os.utime(model_dir, ns=(0, os.stat(model_dir).st_mtime_ns + 1))
+    model_cache.get_model(lambda: new_model_file_path)
+
+    stats = model_cache.get_stats()
+    assert (stats["misses"], stats["reloads"]) == (1, 1)
+    assert stats["model_path"] == new_model_file_path
@@ -0,0 +1,70 @@
+from concrete.entity.model_factory import ModelFactory, EXECUTION_MODE_SERIAL, EXECUTION_MODE_THREADS, \
+    EXECUTION_MODE_PROCESSES
+from concrete.entity.predictor import ConcreteData
+from tests.conftest import get_concrete_data_frame, REPO_DIR
+import pytest
+import yaml
+import os
+
+MODEL_CONFIG_FILE_PATH = os.path.join(REPO_DIR, "config", "model.yaml")
+MODEL_CONFIG = {
+    "grid_search": {"class": "GridSearchCV", "module": "sklearn.model_selection", "params": {"cv": 3}},
+    "model_selection": {
+        "module_0": {"class": "LinearRegression", "module": "sklearn.linear_model",
+                     "search_param_grid": {"fit_intercept": [True, False]}},
+        "module_1": {"class": "Ridge", "module": "sklearn.linear_model",
+                     "search_param_grid": {"alpha": [0.1, 1.0, 10.0]}},
+        "module_2": {"class": "DecisionTreeRegressor", "module": "sklearn.tree", "params": {"random_state": 0},
+                     "search_param_grid": {"max_depth": [2, 5], "min_samples_leaf": [2, 4]}},
+    }
+}
+
+
+def get_best_model(tmp_path, concrete_data_frame, execution_mode: str, model_config: dict = MODEL_CONFIG):
+    model_config_path = os.path.join(str(tmp_path), f"model_{execution_mode}.yaml")
+    with open(model_config_path, "w") as model_config_file:
+        yaml.dump(dict(model_config, execution={"mode": execution_mode, "n_jobs": 2}), model_config_file)
+    return ModelFactory(model_config_path=model_config_path).get_best_model(
+        X=concrete_data_frame[ConcreteData.input_columns].to_numpy(),
+        y=concrete_data_frame["concrete_compressive_strength"].to_numpy(), base_accuracy=0.0)
+
+
+@pytest.mark.parametrize("execution_mode", [EXECUTION_MODE_THREADS, EXECUTION_MODE_PROCESSES])
+def test_parallel_search_selects_serial_best_model(tmp_path, concrete_data_frame, execution_mode):
+    serial_best_model = get_best_model(tmp_path, concrete_data_frame, EXECUTION_MODE_SERIAL)
+    best_model = get_best_model(tmp_path, concrete_data_frame, execution_mode)
+
+    assert best_model.model_serial_number == serial_best_model.model_serial_number
+    assert best_model.best_parameters == serial_best_model.best_parameters
+    assert best_model.best_score == pytest.approx(serial_best_model.best_score)
+
+
+@pytest.fixture(scope="module")
+def shipped_model_config() -> dict:
+    # model families and grids of the shipped model.yaml, fewer folds and no fit output to keep the test short
+    model_config = ModelFactory.read_params(MODEL_CONFIG_FILE_PATH)
+    model_config["grid_search"]["params"].update(cv=3, verbose=0)
+    return model_config
+
+
+@pytest.fixture(scope="module")
+def shipped_serial_best_model(tmp_path_factory, shipped_model_config):
+    return get_best_model(tmp_path_factory.mktemp("serial"), get_concrete_data_frame(100), EXECUTION_MODE_SERIAL,
+                          model_config=shipped_model_config)
+
+
+def test_shipped_model_config_runs_serial_searches():
+    model_factory = ModelFactory(model_config_path=MODEL_CONFIG_FILE_PATH)
+    assert model_factory.execution_mode == EXECUTION_MODE_SERIAL
+    assert model_factory.n_jobs == 1
+
+
+@pytest.mark.parametrize("execution_mode", [EXECUTION_MODE_THREADS, EXECUTION_MODE_PROCESSES])
+def test_shipped_model_config_selects_serial_best_model(tmp_path, shipped_model_config, shipped_serial_best_model,
+                                                        execution_mode):
+    best_model = get_best_model(tmp_path, get_concrete_data_frame(100), execution_mode,
+                                model_config=shipped_model_config)
+
+    assert best_model.model_serial_number == shipped_serial_best_model.model_serial_number
+    assert best_model.best_parameters == shipped_serial_best_model.best_parameters
+    assert best_model.best_score == pytest.approx(shipped_serial_best_model.best_score)
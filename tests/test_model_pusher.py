@@ -0,0 +1,52 @@
+from concrete.component import model_pusher
+from concrete.component.model_pusher import ModelPusher
+from concrete.entity.artifact_entity import ModelEvaluationArtifact
+from concrete.entity.config_entity import ModelPusherConfig
+from concrete.entity.model_registry import ModelRegistry
+from concrete.constant import COMPILED_MODEL_FILE_NAME
+import os
+
+MODEL_VERSION = "20260101000000"
+
+
+def push_model(model_dir: str, model_file_path: str):
+    return ModelPusher(model_pusher_config=ModelPusherConfig(export_dir_path=os.path.join(model_dir, MODEL_VERSION),
+                                                             compile_model=True),
+                       model_evaluation_artifact=ModelEvaluationArtifact(is_model_accepted=True,
+                                                                         evaluated_model_path=model_file_path)
+                       ).initiate_model_pusher()
+
+
+class ShiftedModel:
+    # compiled model predicting other values than the model it was compiled from
+    def __init__(self, compiled_model):
+        self.compiled_model = compiled_model
+
+    def predict(self, X):
+        return self.compiled_model.predict(X) + 1.0
+
+
+def test_compiled_model_is_exported(tmp_path, concrete_model_file_path):
+    model_dir = os.path.join(str(tmp_path), "saved_models")
+    model_pusher_artifact = push_model(model_dir, concrete_model_file_path)
+
+    assert model_pusher_artifact.compiled_model_file_path == os.path.join(model_dir, MODEL_VERSION,
+                                                                          COMPILED_MODEL_FILE_NAME)
+    assert os.path.isdir(model_pusher_artifact.compiled_model_file_path)
+    assert ModelRegistry(model_dir=model_dir).get_current().model_path == \
+        model_pusher_artifact.compiled_model_file_path
+
+
+def test_compiled_model_mismatch_pushes_pickled_model(tmp_path, concrete_model_file_path, monkeypatch):
+    load_compiled_model = model_pusher.load_compiled_model
+    monkeypatch.setattr(model_pusher, "load_compiled_model",
+                        lambda dir_path: ShiftedModel(load_compiled_model(dir_path)))
+    model_dir = os.path.join(str(tmp_path), "saved_models")
+    model_pusher_artifact = push_model(model_dir, concrete_model_file_path)
+
+    assert model_pusher_artifact.is_model_pusher
+    assert model_pusher_artifact.compiled_model_file_path is None
+    assert not os.path.exists(os.path.join(model_dir, MODEL_VERSION, COMPILED_MODEL_FILE_NAME))
+    current_model = ModelRegistry(model_dir=model_dir).get_current()
+    assert current_model.version == MODEL_VERSION
+    assert current_model.model_path == model_pusher_artifact.export_model_file_path
@@ -0,0 +1,63 @@
+from concrete.entity.model_registry import ModelRegistry
+from concrete.exception import ConcreteException
+from tests.conftest import export_model_version
+import pytest
+import os
+
+
+def get_model_registry(base_dir: str, model_file_path: str, versions: list) -> ModelRegistry:
+    # versions exported and promoted one after another as model pusher does
+    model_registry = ModelRegistry(model_dir=os.path.join(base_dir, "saved_models"))
+    for version in versions:
+        export_model_version(model_registry.model_dir, version, model_file_path)
+        model_registry.promote(version)
+    return model_registry
+
+
+def test_promote_keeps_pinned_version(tmp_path, concrete_model_file_path):
+    model_registry = get_model_registry(str(tmp_path), concrete_model_file_path, ["1", "2"])
+    model_registry.pin("1")
+
+    export_model_version(model_registry.model_dir, "3", concrete_model_file_path)
+    assert not model_registry.promote("3")
+    current = model_registry.get_current()
+    assert (current.version, current.is_pinned) == ("1", True)
+    assert current.model_path == os.path.join(model_registry.model_dir, "1", "model.pkl")
+
+    current = model_registry.unpin()
+    assert (current.version, current.is_pinned) == ("3", False)
+    assert model_registry.get_current() == current
+
+
+def test_rollback(tmp_path, concrete_model_file_path):
+    model_registry = get_model_registry(str(tmp_path), concrete_model_file_path, ["1", "2"])
+
+    current = model_registry.rollback()
+    assert (current.version, current.is_pinned) == ("1", True)
+    # nothing older than the oldest version, the current version is kept
+    with pytest.raises(ConcreteException, match="No model version older than"):
+        model_registry.rollback()
+    assert model_registry.get_current().version == "1"
+
+
+def test_verify_version_detects_changed_file(tmp_path, concrete_model_file_path):
+    model_registry = get_model_registry(str(tmp_path), concrete_model_file_path, ["1", "2"])
+    model_registry.verify_version("1")
+
+    with open(os.path.join(model_registry.model_dir, "1", "model.pkl"), "ab") as model_file:
+        model_file.write(b"\0")
+    with pytest.raises(ConcreteException, match="does not match its manifest"):
+        model_registry.verify_version("1")
+    # a corrupted version is never pointed at
+    with pytest.raises(ConcreteException):
+        model_registry.pin("1")
+    assert model_registry.get_current().version == "2"
+
+
+def test_latest_version_is_served_without_current_file(tmp_path, concrete_model_file_path):
+    model_dir = os.path.join(str(tmp_path), "saved_models")
+    for version in ["9", "10"]:
+        export_model_version(model_dir, version, concrete_model_file_path)
+
+    current = ModelRegistry(model_dir=model_dir).get_current()
+    assert (current.version, current.is_pinned) == ("10", False)
@@ -0,0 +1,78 @@
+from concrete.entity import prediction_cache
+from concrete.entity.prediction_cache import PredictionCache
+from concrete.entity.predictor import ConcretePredictor, ConcreteData
+from concrete.entity.config_entity import ServingConfig
+from concrete.entity.model_cache import ModelCache
+from concrete.entity.model_registry import ModelRegistry
+from tests.conftest import export_model_version
+import os
+
+MODEL_VERSION = "model_1"
+
+
+class Clock:
+    # stands in for the time module of prediction_cache
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+def test_prediction_expires_after_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(prediction_cache, "time", clock)
+    cache = PredictionCache(max_size=10, ttl=60)
+    key = cache.get_key([540, 0, 0, 162, 2.5, 1040, 676, 28])
+    cache.put(MODEL_VERSION, key, 79.99)
+
+    clock.now += 59
+    assert cache.get(MODEL_VERSION, key) == 79.99
+    clock.now += 2
+    assert cache.get(MODEL_VERSION, key) is None
+    assert cache.get_stats()["size"] == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_prediction_is_evicted():
+    cache = PredictionCache(max_size=2, ttl=60)
+    cache.put(MODEL_VERSION, (1.0,), 1.0)
+    cache.put(MODEL_VERSION, (2.0,), 2.0)
+    assert cache.get(MODEL_VERSION, (1.0,)) == 1.0
+    cache.put(MODEL_VERSION, (3.0,), 3.0)
+
+    assert cache.get(MODEL_VERSION, (2.0,)) is None
+    assert cache.get(MODEL_VERSION, (1.0,)) == 1.0
+    assert cache.get(MODEL_VERSION, (3.0,)) == 3.0
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_keys_are_rounded():
+    cache = PredictionCache(decimals=3)
+    assert cache.get_key([28, 0.0004]) == cache.get_key([28.0, 0.0]) == (28.0, 0.0)
+
+
+def test_new_model_version_invalidates_predictions(tmp_path, concrete_model_file_path, concrete_data_frame):
+    model_dir = os.path.join(str(tmp_path), "saved_models")
+    model_registry = ModelRegistry(model_dir=model_dir)
+    export_model_version(model_dir, "1", concrete_model_file_path)
+    model_registry.promote("1")
+    # model dir is checked on every request
+    ModelCache.get_instance(model_dir=model_dir, check_interval=0.0)
+    concrete_predictor = ConcretePredictor(model_dir=model_dir, serving_config=ServingConfig(
+        max_batch_size=64, max_batch_delay=0.002, executor_workers=1, max_pending_requests=100,
+        prediction_cache_size=100, prediction_cache_ttl=3600, prediction_cache_decimals=3))
+    row = concrete_data_frame[ConcreteData.input_columns].iloc[0].tolist()
+
+    prediction = concrete_predictor.predict_row(row)
+    assert concrete_predictor.get_cached_prediction(row) == prediction
+
+    new_model_path = export_model_version(model_dir, "2", concrete_model_file_path)
+    model_registry.promote("2")
+    assert concrete_predictor.get_cached_prediction(row) is None
+    assert concrete_predictor.predict_row(row) == prediction
+
+    stats = concrete_predictor.get_prediction_cache_stats()
+    assert stats["invalidations"] == 1
+    assert stats["model_version"] == new_model_path
+    assert concrete_predictor.get_cached_prediction(row) == prediction
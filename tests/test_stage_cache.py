@@ -0,0 +1,63 @@
+from concrete.entity.artifact_entity import DataIngestionArtifact
+from concrete.pipline.stage_cache import StageCache, get_code_version
+from concrete.component.data_ingestion import DataIngestion
+from concrete.config.configuration import Configuration
+from concrete.util.util import read_yaml_file, write_yaml_file
+from tests.conftest import REPO_DIR
+import os
+
+CONFIG_FILE_PATH = os.path.join(REPO_DIR, "config", "config.yaml")
+
+STAGE_NAME = "data_ingestion"
+
+
+def get_stage_key(source_fingerprint: str) -> str:
+    return StageCache.get_stage_key(STAGE_NAME, [{"source_type": "local"}, source_fingerprint,
+                                                 get_code_version([DataIngestion])])
+
+
+def save_ingestion_artifact(base_dir: str, stage_cache: StageCache, stage_key: str) -> DataIngestionArtifact:
+    train_file_path = os.path.join(base_dir, "train.cols")
+    with open(train_file_path, "w") as train_file:
+        train_file.write("train")
+    artifact = DataIngestionArtifact(train_file_path=train_file_path, test_file_path=train_file_path,
+                                     is_ingested=True, message="Data ingestion completed successfully.")
+    stage_cache.save_artifact(STAGE_NAME, stage_key, artifact)
+    return artifact
+
+
+def test_stage_cache_hit_on_unchanged_inputs(tmp_path):
+    stage_cache = StageCache(cache_dir=os.path.join(str(tmp_path), "stage_cache"))
+    artifact = save_ingestion_artifact(str(tmp_path), stage_cache, get_stage_key("fingerprint"))
+
+    assert get_stage_key("fingerprint") == get_stage_key("fingerprint")
+    assert stage_cache.get_artifact(STAGE_NAME, get_stage_key("fingerprint"), DataIngestionArtifact) == artifact
+
+
+def test_stage_cache_miss(tmp_path):
+    stage_cache = StageCache(cache_dir=os.path.join(str(tmp_path), "stage_cache"))
+    artifact = save_ingestion_artifact(str(tmp_path), stage_cache, get_stage_key("fingerprint"))
+
+    # changed source data
+    assert stage_cache.get_artifact(STAGE_NAME, get_stage_key("new fingerprint"), DataIngestionArtifact) is None
+    # input that could not be fingerprinted
+    assert StageCache.get_stage_key(STAGE_NAME, [{"source_type": "local"}, None]) is None
+    assert stage_cache.get_artifact(STAGE_NAME, None, DataIngestionArtifact) is None
+    # file of the cached artifact removed
+    os.remove(artifact.train_file_path)
+    assert stage_cache.get_artifact(STAGE_NAME, get_stage_key("fingerprint"), DataIngestionArtifact) is None
+
+
+def test_shipped_config_runs_without_stage_cache():
+    assert Configuration(config_file_path=CONFIG_FILE_PATH).training_pipeline_config.stage_cache_dir is None
+
+
+def test_stage_cache_is_turned_on_in_config(tmp_path):
+    config_info = read_yaml_file(CONFIG_FILE_PATH)
+    config_info["training_pipeline_config"]["stage_cache"] = True
+    config_file_path = os.path.join(str(tmp_path), "config.yaml")
+    write_yaml_file(config_file_path, config_info)
+
+    training_pipeline_config = Configuration(config_file_path=config_file_path).training_pipeline_config
+    assert training_pipeline_config.stage_cache_dir == os.path.join(training_pipeline_config.artifact_dir,
+                                                                    "stage_cache")
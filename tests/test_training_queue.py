@@ -0,0 +1,66 @@
+from concrete.pipline.training_queue import TrainingJobQueue, JOB_STATUS_PENDING, JOB_STATUS_RUNNING, \
+    JOB_STATUS_DONE, JOB_STATUS_FAILED, STALE_JOB_MESSAGE
+from contextlib import closing
+import subprocess
+import sys
+import os
+
+
+def get_dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_claim_runs_one_job_at_a_time(tmp_path):
+    queue_dir = os.path.join(str(tmp_path), "training_queue")
+    training_job, is_enqueued = TrainingJobQueue(queue_dir).enqueue("experiment_1")
+    assert is_enqueued and training_job.status == JOB_STATUS_PENDING
+    # a second web process gets the pending job back
+    assert TrainingJobQueue(queue_dir).enqueue("experiment_2") == (training_job, False)
+
+    claimed_job = TrainingJobQueue(queue_dir).claim()
+    assert claimed_job.job_id == training_job.job_id
+    assert claimed_job.status == JOB_STATUS_RUNNING and claimed_job.worker_pid == os.getpid()
+    assert TrainingJobQueue(queue_dir).claim() is None
+    assert TrainingJobQueue(queue_dir).enqueue("experiment_2")[0].job_id == training_job.job_id
+
+    training_job_queue = TrainingJobQueue(queue_dir)
+    assert training_job_queue.heartbeat(claimed_job)
+    training_job_queue.complete(claimed_job)
+    assert training_job_queue.get_job("experiment_1").status == JOB_STATUS_DONE
+    assert not training_job_queue.is_busy()
+    assert training_job_queue.claim() is None
+
+
+def test_stale_job_of_dead_worker_is_failed(tmp_path):
+    training_job_queue = TrainingJobQueue(os.path.join(str(tmp_path), "training_queue"))
+    training_job_queue.enqueue("experiment_1")
+    claimed_job = training_job_queue.claim()
+    # worker crashed while training
+    with closing(training_job_queue.get_connection()) as connection:
+        connection.execute("UPDATE training_job SET worker_pid = ? WHERE job_id = ?",
+                           [get_dead_pid(), claimed_job.job_id])
+
+    assert not training_job_queue.is_busy()
+    assert [training_job.job_id for training_job in training_job_queue.recover_stale_jobs()] == \
+        [claimed_job.job_id]
+    failed_job = training_job_queue.get_job("experiment_1")
+    assert failed_job.status == JOB_STATUS_FAILED and failed_job.message == STALE_JOB_MESSAGE
+    assert not training_job_queue.heartbeat(claimed_job)
+
+    training_job, is_enqueued = training_job_queue.enqueue("experiment_2")
+    assert is_enqueued
+    assert training_job_queue.claim().job_id == training_job.job_id
+
+
+def test_stale_job_without_heartbeat_is_failed(tmp_path):
+    queue_dir = os.path.join(str(tmp_path), "training_queue")
+    TrainingJobQueue(queue_dir).enqueue("experiment_1")
+    claimed_job = TrainingJobQueue(queue_dir).claim()
+
+    assert TrainingJobQueue(queue_dir).recover_stale_jobs() == []
+    # the worker process is alive but its heartbeat is older than the timeout
+    assert [training_job.job_id for training_job in TrainingJobQueue(queue_dir, stale_timeout=-1)
+            .recover_stale_jobs()] == [claimed_job.job_id]
+    assert TrainingJobQueue(queue_dir).get_job("experiment_1").status == JOB_STATUS_FAILED
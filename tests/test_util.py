@@ -0,0 +1,34 @@
+from concrete.util.util import save_columnar_data, load_columnar_data, read_data_frame, load_data
+from tests.conftest import SCHEMA_FILE_PATH
+import numpy as np
+import os
+
+
+def get_memory_map_file_path(array: np.ndarray) -> str:
+    # file of the memory map the array is a view of, None when the array owns its data
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return os.path.abspath(array.filename)
+        array = array.base if isinstance(array.base, np.ndarray) else None
+    return None
+
+
+def test_columnar_data_is_read_from_memory_maps(tmp_path, concrete_data_frame):
+    dir_path = os.path.join(str(tmp_path), "train.cols")
+    save_columnar_data(dir_path, concrete_data_frame)
+
+    for dataframe in [load_columnar_data(dir_path), read_data_frame(dir_path),
+                      load_data(file_path=dir_path, schema_file_path=SCHEMA_FILE_PATH)]:
+        assert dataframe.equals(concrete_data_frame)
+        for index, column in enumerate(dataframe.columns):
+            assert get_memory_map_file_path(dataframe[column].to_numpy()) == \
+                os.path.abspath(os.path.join(dir_path, f"{index}.npy"))
+
+
+def test_columnar_data_is_read_into_memory(tmp_path, concrete_data_frame):
+    dir_path = os.path.join(str(tmp_path), "train.cols")
+    save_columnar_data(dir_path, concrete_data_frame)
+
+    dataframe = load_columnar_data(dir_path, mmap_mode=None)
+    assert dataframe.equals(concrete_data_frame)
+    assert all(get_memory_map_file_path(dataframe[column].to_numpy()) is None for column in dataframe.columns)